@@ -0,0 +1,134 @@
+"""集計処理の最大メモリ使用量を入力の行数ごとに計測する
+
+各計測は別プロセスで実行し、プロセスの最大RSSと匿名メモリの最大値を比較する
+入力のCSVはメモリマップで読み込まれ、その大きさの分だけRSSが増えるため
+処理が使うメモリは匿名メモリで判断する
+/proc を読むためLinuxでのみ動作する
+
+    python -m api.benchmarks.agg --sizes 100000 1000000 4000000
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from api.libs import agg
+
+COORDS = ["ND", "N12", "S3", "N12~S3", "s3~4", "p5", "m5", "m1.5~p2.5"]
+
+
+def create_csv(path: Path, rows: int, *, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    pl.DataFrame(
+        {
+            "date": rng.integers(1950, 2030, rows),
+            "month": rng.integers(1, 13, rows),
+            "day": rng.integers(1, 29, rows),
+            "no": rng.integers(1, 100, rows),
+            "lat": rng.choice(COORDS, rows),
+            "lon": rng.choice(COORDS, rows),
+            "num": rng.integers(1, 1000, rows),
+        }
+    ).select(
+        pl.concat_str("date", "month", "day", separator="-").alias("date"),
+        "no",
+        "lat",
+        "lon",
+        "num",
+    ).write_csv(path)
+
+
+def read_rss_anon() -> int:
+    with Path("/proc/self/status").open() as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1])
+    return 0
+
+
+class PeakSampler(threading.Thread):
+    """匿名メモリの使用量を一定間隔で記録し、最大値を保持する"""
+
+    def __init__(self: "PeakSampler", interval: float = 0.01) -> None:
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def run(self: "PeakSampler") -> None:
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, read_rss_anon())
+
+    def stop(self: "PeakSampler") -> int:
+        self._stop_event.set()
+        self.join()
+        return max(self.peak, read_rss_anon())
+
+
+def run(input_path: Path, output_path: Path, *, streaming: bool) -> None:
+    df = (
+        pl.scan_csv(input_path, infer_schema_length=0)
+        .pipe(agg.convert_number)
+        .pipe(agg.convert_date)
+        .pipe(agg.convert_coord, col="lat", dtype=pl.Int8)
+        .pipe(agg.convert_coord, col="lon", dtype=pl.Int16)
+    )
+    if streaming:
+        df.sink_parquet(output_path)
+    else:
+        df.collect().write_parquet(output_path)
+
+
+def measure(input_path: Path, output_path: Path, *, streaming: bool) -> str:
+    args = [sys.executable, "-m", "api.benchmarks.agg", "--run"]
+    args += [str(input_path), str(output_path)]
+    if streaming:
+        args.append("--streaming")
+    result = subprocess.run(args, capture_output=True, check=True, text=True)  # noqa: S603
+    return result.stdout.strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100_000, 1_000_000]
+    )
+    parser.add_argument("--run", type=Path, nargs=2)
+    parser.add_argument("--streaming", action="store_true")
+    args = parser.parse_args()
+
+    if args.run is not None:
+        sampler = PeakSampler()
+        sampler.start()
+        start = time.perf_counter()
+        run(*args.run, streaming=args.streaming)
+        elapsed = time.perf_counter() - start
+        peak_anon = sampler.stop() / 1024
+        # Linuxでは最大RSSがキロバイト単位で得られる
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{max_rss:8.1f} MiB {peak_anon:8.1f} MiB {elapsed:8.2f} s")
+        return
+
+    header = ["rows", "mode", "max rss", "peak anon", "time"]
+    print("{:>10} {:>9} {:>12} {:>12} {:>10}".format(*header))
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            input_path = Path(tmp) / f"{rows}.csv"
+            output_path = Path(tmp) / f"{rows}.parquet"
+            create_csv(input_path, rows)
+            for streaming in (True, False):
+                mode = "streaming" if streaming else "collect"
+                result = measure(input_path, output_path, streaming=streaming)
+                print(f"{rows:>10} {mode:>9} {result}")
+
+
+if __name__ == "__main__":
+    main()
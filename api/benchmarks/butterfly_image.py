@@ -0,0 +1,90 @@
+"""蝶形図の画像データの作成時間を計測する
+
+100年分の日ごとの緯度データから、一列ずつ作成する方法とまとめて作成する方法を比較する
+
+    python -m api.benchmarks.butterfly_image
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from datetime import date
+
+import numpy as np
+import numpy.typing as npt
+import polars as pl
+
+from api.libs import butterfly, butterfly_image
+
+
+def create_data(days: int, *, seed: int = 0) -> pl.DataFrame:
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(0, 6, days)
+    lat_min = rng.integers(-45, 40, counts.sum())
+    lat_max = lat_min + rng.integers(0, 6, counts.sum())
+    offsets = np.cumsum(counts)[:-1]
+    return pl.DataFrame(
+        {
+            "min": [x.tolist() for x in np.split(lat_min, offsets)],
+            "max": [x.tolist() for x in np.split(lat_max, offsets)],
+        },
+        schema={"min": pl.List(pl.Int8), "max": pl.List(pl.Int8)},
+    )
+
+
+def create_image_by_line(
+    df: pl.DataFrame, info: butterfly.ButterflyInfo
+) -> npt.NDArray[np.uint8]:
+    lines = [
+        butterfly_image.create_line(
+            data["min"], data["max"], info.lat_min, info.lat_max
+        ).reshape(-1, 1)
+        for data in df.iter_rows(named=True)
+    ]
+    return np.hstack(lines)
+
+
+def measure(
+    fn: Callable[[], npt.NDArray[np.uint8]], repeat: int
+) -> tuple[float, npt.NDArray[np.uint8]]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        img = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, img
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    days = 365 * args.years + args.years // 4
+    df = create_data(days)
+    info = butterfly.ButterflyInfo(
+        -50,
+        50,
+        date(1924, 1, 1),
+        date(2023, 12, 31),
+        butterfly.DateDelta(days=1),
+    )
+
+    time_line, img_line = measure(
+        lambda: create_image_by_line(df, info), args.repeat
+    )
+    time_image, img = measure(
+        lambda: butterfly_image.create_image(df, info), args.repeat
+    )
+    if not np.array_equal(img_line, img):
+        msg = "images are different"
+        raise RuntimeError(msg)
+
+    print(f"size: {img.shape[0]} x {img.shape[1]}")
+    print(f"by line: {time_line:8.3f} s")
+    print(f"image:   {time_image:8.3f} s ({time_line / time_image:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
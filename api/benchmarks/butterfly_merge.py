@@ -0,0 +1,101 @@
+"""複数の緯度データの合成時間を計測する
+
+層ごとに画像を作成して足し合わせる方法と、全ての層をまとめて作成する方法を
+1層と16層で比較する
+
+    python -m api.benchmarks.butterfly_merge
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from datetime import date
+from functools import partial
+
+import numpy as np
+import numpy.typing as npt
+import polars as pl
+
+from api.benchmarks.butterfly_image import create_data
+from api.libs import butterfly, butterfly_image, butterfly_merge
+
+
+def create_merged_image_by_layer(
+    dfl: list[pl.DataFrame], info: butterfly.ButterflyInfo
+) -> npt.NDArray[np.uint16]:
+    img = np.zeros(
+        (
+            butterfly_merge.calc_lat_size(info),
+            butterfly_merge.calc_date_size(info),
+        ),
+        dtype=np.uint16,
+    )
+    for i, df in enumerate(dfl):
+        # 9層目以降のビットが落ちないよう、シフトの前に型を広げる
+        img = img + (
+            butterfly_image.create_image(
+                butterfly.fill_lat(
+                    df.lazy(),
+                    info.date_start,
+                    info.date_end,
+                    info.date_interval.to_interval(),
+                ).collect(),
+                info,
+            ).astype(np.uint16)
+            << np.uint16(i)
+        )
+    return img
+
+
+def measure(
+    fn: Callable[[], npt.NDArray[np.uint16]], repeat: int
+) -> tuple[float, npt.NDArray[np.uint16]]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        img = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, img
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    info = butterfly.ButterflyInfo(
+        -50,
+        50,
+        date(1924, 1, 1),
+        date(1924 + args.years - 1, 12, 31),
+        butterfly.DateDelta(days=1),
+    )
+    dates = pl.date_range(
+        info.date_start, info.date_end, "1d", eager=True
+    ).alias("date")
+    dfl = [
+        create_data(dates.len(), seed=seed).with_columns(dates)
+        for seed in range(16)
+    ]
+
+    for layers in (1, 16):
+        time_layer, img_layer = measure(
+            partial(create_merged_image_by_layer, dfl[:layers], info),
+            args.repeat,
+        )
+        time_merged, img = measure(
+            partial(butterfly_merge.create_merged_image, dfl[:layers], info),
+            args.repeat,
+        )
+        if not np.array_equal(img_layer, img):
+            msg = "images are different"
+            raise RuntimeError(msg)
+        print(
+            f"{layers:2} layers: by layer {time_layer:8.3f} s, "
+            f"merged {time_merged:8.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""グループ番号の検査時間を計測する
+
+100年分の黒点群データから、日付ごとに期待値を作る方法と式のみで検査する方法を比較する
+
+    python -m api.benchmarks.check_data
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from datetime import date
+
+import numpy as np
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from api.libs import check_data
+
+
+def create_data(years: int, *, seed: int = 0) -> pl.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pl.date_range(
+        date(1924, 1, 1), date(1924 + years - 1, 12, 31), "1d", eager=True
+    )
+    counts = rng.integers(1, 8, dates.len())
+    no = np.concatenate([np.arange(1, c + 1) for c in counts])
+    # 一部の番号を書き換えて不正な日付を作る
+    broken = rng.random(no.size) < 0.01  # noqa: PLR2004
+    no[broken] = rng.integers(0, 8, broken.sum())
+    return pl.DataFrame(
+        {"date": dates.gather(np.repeat(np.arange(dates.len()), counts))}
+    ).with_columns(pl.Series("no", no, dtype=pl.UInt8))
+
+
+def find_invalid_group_number_by_date(df: pl.DataFrame) -> pl.DataFrame:
+    return (
+        df.lazy()
+        .group_by("date")
+        .agg(
+            pl.col("no").alias("original"),
+            pl.col("no")
+            .count()
+            .map_elements(
+                check_data.create_expected_group_numbers,
+                return_dtype=pl.List(pl.UInt8),
+            )
+            .alias("expected"),
+        )
+        .with_columns(pl.col("original", "expected").list.sort())
+        .filter(
+            (pl.col("original") != pl.col("expected"))
+            & (pl.col("original") != [0])
+        )
+        .collect()
+    )
+
+
+def measure(
+    fn: Callable[[], pl.DataFrame], repeat: int
+) -> tuple[float, pl.DataFrame]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, df
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = create_data(args.years)
+
+    time_date, df_date = measure(
+        lambda: find_invalid_group_number_by_date(df), args.repeat
+    )
+    time_expr, df_expr = measure(
+        lambda: check_data.find_invalid_group_number(df), args.repeat
+    )
+    assert_frame_equal(
+        df_date.sort("date"), df_expr.sort("date"), check_column_order=False
+    )
+
+    print(f"rows: {df.height}, invalid dates: {df_expr.height}")
+    print(f"by date:    {time_date:8.3f} s")
+    print(f"expression: {time_expr:8.3f} s ({time_date / time_expr:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,105 @@
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
 import polars as pl
 
 
+@dataclass(frozen=True, slots=True)
+class SourceFile:
+    """集計元のファイルの情報"""
+
+    path: str
+    size: int
+    mtime: int
+    digest: str
+
+    def same_content(self: "SourceFile", other: "SourceFile") -> bool:
+        """同じパスで内容が同一かどうか
+
+        Args:
+            other (SourceFile): 比較するファイルの情報
+
+        Returns:
+            bool: 同一であればTrue
+        """
+        return self.path == other.path and self.digest == other.digest
+
+
+def hash_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint_file(
+    path: Path, previous: SourceFile | None = None
+) -> SourceFile:
+    """ファイルの情報を取得する
+
+    大きさと更新日時が前回と同じであれば、内容のハッシュを使い回す
+
+    Args:
+        path (Path): ファイルのパス
+        previous (SourceFile | None): 前回のファイルの情報
+
+    Returns:
+        SourceFile: ファイルの情報
+    """
+    stat = path.stat()
+    if (
+        previous is not None
+        and previous.path == str(path)
+        and previous.size == stat.st_size
+        and previous.mtime == stat.st_mtime_ns
+    ):
+        return previous
+    return SourceFile(
+        path=str(path),
+        size=stat.st_size,
+        mtime=stat.st_mtime_ns,
+        digest=hash_file(path),
+    )
+
+
+def load_manifest(path: Path) -> list[SourceFile]:
+    """集計元のファイルの一覧を読み込む
+
+    Args:
+        path (Path): 一覧のパス
+
+    Returns:
+        list[SourceFile]: ファイルの一覧、存在しなければ空
+    """
+    if not path.exists():
+        return []
+    with path.open("r") as f:
+        return [SourceFile(**file) for file in json.load(f)]
+
+
+def save_manifest(path: Path, files: list[SourceFile]) -> None:
+    with path.open("w") as f:
+        json.dump([asdict(file) for file in files], f, indent=2)
+
+
+def is_appended(previous: list[SourceFile], current: list[SourceFile]) -> bool:
+    """前回のファイルの一覧へ追加しただけかどうか
+
+    Args:
+        previous (list[SourceFile]): 前回のファイルの一覧
+        current (list[SourceFile]): 今回のファイルの一覧
+
+    Returns:
+        bool: 前回の一覧を変更せずに末尾へ追加しただけであればTrue
+    """
+    return len(previous) <= len(current) and all(
+        p.same_content(c) for p, c in zip(previous, current, strict=False)
+    )
+
+
 def fill_date(df: pl.LazyFrame) -> pl.LazyFrame:
     return df.with_columns(pl.col("date").forward_fill())
 
@@ -21,6 +120,14 @@ def convert_date(df: pl.LazyFrame) -> pl.LazyFrame:
     )
 
 
+def _to_sign(sign: pl.Expr) -> pl.Expr:
+    return (
+        pl.when(sign.str.contains("^[swm-]$"))
+        .then(pl.lit(-1.0))
+        .otherwise(pl.lit(1.0))
+    )
+
+
 def convert_coord(
     df: pl.LazyFrame, *, col: str, dtype: type[pl.DataType]
 ) -> pl.LazyFrame:
@@ -31,55 +138,47 @@ def convert_coord(
     pat_right = r"(?P<right>\d{1,3}(?:\.\d+)?)"
     pat_right = f"{pat_right_sign}{pat_right}"
     pat = f"(?i)(?:ND|{pat_left}(?:~{pat_right})?)"
+    # ストリーミングで処理できるよう、中間の収集を挟まず式のみで変換する
+    # when の条件に is_in を使うとストリーミングされないため正規表現で判定する
+    field = pl.col(col).struct.field
+    # 符号の文字を小文字へ変換
+    left_sign = field("left_sign").str.to_lowercase()
+    right_sign = field("right_sign").str.to_lowercase()
+    right_sign = (
+        # 右の符号が存在しなければ左で埋める
+        pl.when(right_sign.is_null())
+        .then(left_sign)
+        # 右の符号が存在せず、左の符号が東西南北のマイナスの場合
+        # 右の符号を左の符号で埋める
+        .when(right_sign.eq("") & left_sign.str.contains("^[sw]$"))
+        .then(pl.lit("-"))
+        .otherwise(right_sign)
+    )
+    left = field("left").cast(pl.Float64)
+    # 右の数値が存在しなければ左で埋める
+    right = field("right").cast(pl.Float64).fill_null(left)
     return (
         df.with_columns(
             # 正規表現で構造体へ分解
             pl.col(col).str.extract_groups(pat)
         )
-        .unnest(col)  # 構造体から列へ分解
-        .with_columns(
-            # 符号の文字を小文字へ変換
-            pl.col("left_sign", "right_sign").str.to_lowercase()
-        )
-        .with_columns(
-            # 右の符号と数値が存在しなければ左で埋める
-            pl.col("right_sign").fill_null(pl.col("left_sign")),
-            pl.col("right").fill_null(pl.col("left")),
-        )
-        .with_columns(
-            # 右の符号が存在せず、左の符号が東西南北のマイナスの場合
-            # 右の符号を左の符号で埋める
-            pl.when(
-                pl.col("right_sign").eq("")
-                & pl.col("left_sign").is_in({"s", "w"})
-            )
-            .then(pl.lit("-"))
-            .otherwise(pl.col("right_sign"))
-            .alias("right_sign")
-        )
-        .collect()
-        .lazy()
         .with_columns(
-            # 文字の符号を数式の符号へ変換
-            pl.col("left_sign", "right_sign").str.replace_many(
-                ["n", "s", "e", "w", "p", "m"], ["+", "-", "+", "-", "+", "-"]
-            )
-        )
-        .with_columns(
-            # 符号を数値へ反映
-            pl.concat_str("left_sign", "left").alias("left"),
-            pl.concat_str("right_sign", "right").alias("right"),
-        )
-        .with_columns(
-            # 文字列から小数へ変換し、四捨五入
-            pl.col("left", "right").cast(pl.Float64).round()
+            # 符号を数値へ反映し、四捨五入
+            pl.struct(
+                (_to_sign(left_sign) * left).round().alias("left"),
+                (_to_sign(right_sign) * right).round().alias("right"),
+            ).alias(col)
         )
         .with_columns(
             # 最大値と最小値を算出し、整数へ変換
-            pl.min_horizontal("left", "right").cast(dtype).alias(f"{col}_min"),
-            pl.max_horizontal("left", "right").cast(dtype).alias(f"{col}_max"),
+            pl.min_horizontal(field("left"), field("right"))
+            .cast(dtype)
+            .alias(f"{col}_min"),
+            pl.max_horizontal(field("left"), field("right"))
+            .cast(dtype)
+            .alias(f"{col}_max"),
         )
-        .drop("left_sign", "right_sign", "left", "right")
+        .drop(col)
     )
 
 
@@ -87,3 +186,14 @@ def sort(df: pl.LazyFrame) -> pl.LazyFrame:
     return df.select(
         ["date", "no", "lat_min", "lat_max", "lon_min", "lon_max", "num"]
     ).sort("date", "no")
+
+
+def convert(df: pl.LazyFrame) -> pl.LazyFrame:
+    return (
+        df.pipe(fill_date)
+        .pipe(convert_number)
+        .pipe(convert_date)
+        .pipe(convert_coord, col="lat", dtype=pl.Int8)
+        .pipe(convert_coord, col="lon", dtype=pl.Int16)
+        .pipe(sort)
+    )
@@ -1,6 +1,8 @@
 import json
 from dataclasses import asdict, dataclass, fields
 from datetime import date
+from math import ceil
+from pathlib import Path
 
 import polars as pl
 
@@ -160,6 +162,32 @@ def adjust_dates(start: date, end: date) -> tuple[date, date]:
     return start.replace(day=1), end.replace(day=1)
 
 
+def align_dates(start: date, end: date, delta: DateDelta) -> tuple[date, date]:
+    """日付の範囲を集計する期間の区切りに合わせる
+
+    集計した緯度データの日付と揃うよう、開始日と最終日をそれぞれ含む期間の
+    始まりへ切り捨てる
+
+    Args:
+        start (date): 開始日
+        end (date): 最終日
+        delta (DateDelta): 区切る期間
+
+    Returns:
+        tuple[date, date]: 開始日と最終日
+
+    Examples:
+        >>> align_dates(date(2002, 3, 3), date(2003, 1, 4), DateDelta(days=1))
+        (datetime.date(2002, 3, 3), datetime.date(2003, 1, 4))
+        >>> align_dates(date(2002, 3, 3), date(2003, 1, 4), DateDelta(years=1))
+        (datetime.date(2002, 1, 1), datetime.date(2003, 1, 1))
+    """
+    start, end = (
+        pl.Series([start, end]).dt.truncate(delta.to_interval()).to_list()
+    )
+    return start, end
+
+
 def agg_lat(df: pl.LazyFrame, interval: str) -> pl.LazyFrame:
     """緯度を期間ごとに集計.
 
@@ -179,6 +207,81 @@ def agg_lat(df: pl.LazyFrame, interval: str) -> pl.LazyFrame:
     )
 
 
+def derive_lat(df: pl.LazyFrame, interval: str) -> pl.LazyFrame:
+    """細かい期間の緯度データを粗い期間へまとめ直す
+
+    Args:
+        df (pl.LazyFrame): 細かい期間の緯度データ
+        interval (str): 区切る期間
+
+    Returns:
+        pl.LazyFrame: 緯度データ
+    """
+    return (
+        df.with_columns(pl.col("date").dt.truncate(interval))
+        .group_by("date")
+        .agg(pl.col("min").flatten(), pl.col("max").flatten())
+    )
+
+
+def can_derive_lat(df: pl.DataFrame, fine: str, coarse: str) -> bool:
+    """細かい期間の緯度データから粗い期間の緯度データを求められるか判定する
+
+    細かい期間の各区間が、粗い期間の一つの区間に収まっていれば求められる
+
+    Args:
+        df (pl.DataFrame): 細かい期間の緯度データ
+        fine (str): 細かい期間
+        coarse (str): 粗い期間
+
+    Returns:
+        bool: 求められる場合はTrue
+    """
+    date = pl.col("date")
+    last = date.dt.offset_by(fine).dt.offset_by("-1d")
+    return bool(
+        df.select(
+            (date.dt.truncate(coarse) == last.dt.truncate(coarse)).all()
+        ).item()
+    )
+
+
+def agg_lat_levels(
+    df: pl.LazyFrame, intervals: list[DateDelta]
+) -> dict[DateDelta, pl.DataFrame]:
+    """複数の期間の緯度データをまとめて集計する
+
+    黒点群データは最も細かい期間の集計にのみ使い、粗い期間はそれまでに
+    集計した緯度データから求める
+
+    Args:
+        df (pl.LazyFrame): 黒点群データ
+        intervals (list[DateDelta]): 区切る期間
+
+    Returns:
+        dict[DateDelta, pl.DataFrame]: 期間ごとの緯度データ
+    """
+    levels: dict[DateDelta, pl.DataFrame] = {}
+    for delta in sorted(
+        set(intervals), key=lambda d: (d.years * 12 + d.months) * 31 + d.days
+    ):
+        interval = delta.to_interval()
+        # 最も粗い期間から求めると、まとめる行が少なくて済む
+        source = next(
+            (
+                level
+                for fine, level in reversed(levels.items())
+                if can_derive_lat(level, fine.to_interval(), interval)
+            ),
+            None,
+        )
+        if source is None:
+            levels[delta] = agg_lat(df, interval).collect()
+        else:
+            levels[delta] = derive_lat(source.lazy(), interval).collect()
+    return levels
+
+
 def fill_lat(
     df: pl.LazyFrame, start: date, end: date, interval: str
 ) -> pl.LazyFrame:
@@ -221,3 +324,42 @@ def calc_lat(df: pl.LazyFrame, info: ButterflyInfo) -> pl.DataFrame:
         )
         .collect()
     )
+
+
+def calc_row_group_size(delta: DateDelta, years: int = 5) -> int:
+    """指定した年数分の緯度データが収まる行グループの大きさを算出する
+
+    Args:
+        delta (DateDelta): 緯度データの期間
+        years (int, optional): 一つの行グループに収める年数
+
+    Returns:
+        int: 行グループの行数
+
+    Examples:
+        >>> calc_row_group_size(DateDelta(months=1))
+        60
+        >>> calc_row_group_size(DateDelta(days=1))
+        1827
+        >>> calc_row_group_size(DateDelta(years=10))
+        1
+    """
+    days = delta.years * 365.25 + delta.months * 30.4375 + delta.days
+    return ceil(years * 365.25 / days)
+
+
+def write_lat(df: pl.DataFrame, path: Path, info: ButterflyInfo) -> None:
+    """緯度データを日付で絞り込んで読み込めるよう保存する
+
+    日付順に並べ、一定の年数ごとの行グループへ統計情報と共に書き込む
+
+    Args:
+        df (pl.DataFrame): 緯度データ
+        path (Path): 保存先のパス
+        info (ButterflyInfo): 蝶形図の情報
+    """
+    df.sort("date").write_parquet(
+        path,
+        statistics=True,
+        row_group_size=calc_row_group_size(info.date_interval),
+    )
@@ -52,11 +52,50 @@ def create_line(
     return line
 
 
+def calc_row_index(
+    arr_min: npt.NDArray[np.int64],
+    arr_max: npt.NDArray[np.int64],
+    info: ButterflyInfo,
+) -> tuple[
+    npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.bool_]
+]:
+    """緯度の区間から塗りつぶす行の範囲を算出する
+
+    Args:
+        arr_min (npt.NDArray[np.int64]): 区間の最小値
+        arr_max (npt.NDArray[np.int64]): 区間の最大値
+        info (ButterflyInfo): 蝶形図の情報
+
+    Returns:
+        tuple[npt.NDArray, npt.NDArray, npt.NDArray]:
+            行の開始位置、終了位置(この行を含まない)、範囲内かつ空でない区間
+    """
+    # 緯度のインデックスの最大値
+    max_index = 2 * (info.lat_max - info.lat_min)
+
+    # 赤道のインデックス
+    equator_index = 2 * info.lat_max
+
+    # 行のインデックスを範囲内に収まるよう調整
+    index_min = np.clip(equator_index - arr_max * 2, 0, max_index)
+    index_max = np.clip(equator_index - arr_min * 2 + 1, 1, max_index + 1)
+
+    # 範囲外と空の区間を除く
+    index_valid = (
+        (info.lat_min <= arr_max)
+        & (arr_min <= info.lat_max)
+        & (index_min < index_max)
+    )
+    return index_min, index_max, index_valid
+
+
 def create_image(
     df: pl.DataFrame, info: ButterflyInfo
 ) -> npt.NDArray[np.uint8]:
     """緯度データから蝶形図のデータを作成する
 
+    全ての列の区間をまとめて差分配列へ書き込み、累積和で塗りつぶす
+
     Args:
         df (pl.DataFrame): 緯度データ
         info (ButterflyInfo): 蝶形図の情報
@@ -64,10 +103,34 @@ def create_image(
     Returns:
         npt.NDArray[np.uint8]: 蝶形図の画像データ
     """
-    lines: list[npt.NDArray[np.uint8]] = []
-    for data in df.iter_rows(named=True):
-        data_min: list[int] = data["min"]
-        data_max: list[int] = data["max"]
-        line = create_line(data_min, data_max, info.lat_min, info.lat_max)
-        lines.append(line.reshape(-1, 1))
-    return np.hstack(lines)
+    # 緯度のインデックスの最大値
+    max_index = 2 * (info.lat_max - info.lat_min)
+    height = max_index + 1
+    width = df.height
+
+    # 区間ごとに列番号と最小値、最大値を持つ形へ展開
+    df_interval = (
+        df.select(
+            pl.int_range(pl.len(), dtype=pl.Int64).alias("col"), "min", "max"
+        )
+        .explode("min", "max")
+        .drop_nulls()
+    )
+    col = df_interval.get_column("col").to_numpy()
+    arr_min = df_interval.get_column("min").to_numpy().astype(np.int64)
+    arr_max = df_interval.get_column("max").to_numpy().astype(np.int64)
+
+    index_min, index_max, index_valid = calc_row_index(arr_min, arr_max, info)
+    col = col[index_valid]
+    index_min = index_min[index_valid]
+    index_max = index_max[index_valid]
+
+    # 区間の始まりに+1、終わりの次に-1を加えた差分配列を作成
+    size = (height + 1) * width
+    diff = np.bincount(index_min * width + col, minlength=size) - np.bincount(
+        index_max * width + col, minlength=size
+    )
+
+    # 行方向の累積和が正であれば区間内
+    count = np.cumsum(diff.reshape(height + 1, width)[:height], axis=0)
+    return (count > 0).astype(np.uint8)
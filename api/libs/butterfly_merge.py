@@ -1,8 +1,10 @@
+from pathlib import Path
+
 import numpy as np
 import numpy.typing as npt
 import polars as pl
 
-from api.libs import butterfly, butterfly_image
+from api.libs import butterfly_image
 from api.libs.butterfly import ButterflyInfo
 from api.libs.butterfly_config import ColorMap
 
@@ -33,34 +35,171 @@ def calc_date_size(info: ButterflyInfo) -> int:
     ).len()
 
 
+def merge_intervals(
+    key: npt.NDArray[np.int64],
+    start: npt.NDArray[np.int64],
+    end: npt.NDArray[np.int64],
+) -> tuple[
+    npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.int64]
+]:
+    """同じキーで重なる区間を一つにまとめる
+
+    Args:
+        key (npt.NDArray[np.int64]): 区間をまとめる単位
+        start (npt.NDArray[np.int64]): 区間の開始位置、0以上
+        end (npt.NDArray[np.int64]): 区間の終了位置(含まない)
+
+    Returns:
+        tuple[npt.NDArray, npt.NDArray, npt.NDArray]:
+            重なりの無い区間のキー、開始位置、終了位置
+    """
+    if key.size == 0:
+        return key, start, end
+    order = np.lexsort((start, key))
+    key = key[order]
+    start = start[order]
+    end = end[order]
+
+    # キーごとに終了位置をずらし、全体の累積最大値をキー内の累積最大値とする
+    is_first = np.r_[True, key[1:] != key[:-1]]
+    offset = np.cumsum(is_first) * (end.max() + 1)
+    prev = np.maximum.accumulate(end + offset)[:-1] - offset[1:]
+
+    # 前の区間と重ならなければ新しい区間とする
+    is_new = is_first.copy()
+    is_new[1:] |= start[1:] >= prev
+    index = np.flatnonzero(is_new)
+    return key[index], start[index], np.maximum.reduceat(end, index)
+
+
 def create_merged_image(
     dfl: list[pl.DataFrame], info: ButterflyInfo
 ) -> npt.NDArray[np.uint16]:
+    """複数の緯度データを一度にまとめて、層ごとのビットを持つ画像を作成する
+
+    Args:
+        dfl (list[pl.DataFrame]): 緯度データ、順にビットへ割り当てる
+        info (ButterflyInfo): 蝶形図の情報
+
+    Returns:
+        npt.NDArray[np.uint16]: 蝶形図の画像データ
+    """
     lat_size = calc_lat_size(info)
     date_size = calc_date_size(info)
-    img: npt.NDArray[np.uint16] = np.zeros(
+
+    # 全ての層を日付の列番号と結合し、区間ごとに展開
+    df_date = pl.LazyFrame(
+        {
+            "date": pl.date_range(
+                info.date_start,
+                info.date_end,
+                info.date_interval.to_interval(),
+                eager=True,
+            )
+        }
+    ).with_row_index("col")
+    df_interval = (
+        pl.concat(
+            [
+                df.lazy().select(
+                    pl.lit(i, dtype=pl.Int64).alias("layer"),
+                    "date",
+                    pl.col("min", "max").cast(pl.List(pl.Int64)),
+                )
+                for i, df in enumerate(dfl)
+            ]
+        )
+        .join(df_date, on="date", how="inner")
+        .explode("min", "max")
+        .drop_nulls()
+        .collect()
+    )
+
+    index_min, index_max, index_valid = butterfly_image.calc_row_index(
+        df_interval.get_column("min").to_numpy(),
+        df_interval.get_column("max").to_numpy(),
+        info,
+    )
+    key = (
+        df_interval.get_column("layer").to_numpy() * date_size
+        + df_interval.get_column("col").cast(pl.Int64).to_numpy()
+    )
+    key, start, end = merge_intervals(
+        key[index_valid], index_min[index_valid], index_max[index_valid]
+    )
+    layer, col = np.divmod(key, date_size)
+    weight = np.left_shift(1, layer)
+
+    # 重なりの無い区間へ層のビットを重みとした差分配列を作成
+    size = (lat_size + 1) * date_size
+    diff = (
+        np.bincount(start * date_size + col, weight, minlength=size)
+        - np.bincount(end * date_size + col, weight, minlength=size)
+    ).astype(np.int32)
+
+    # 行方向の累積和で各画素のビットを求める
+    img: npt.NDArray[np.uint16] = np.empty(
         (lat_size, date_size), dtype=np.uint16
     )
-    for i, df in enumerate(dfl):
-        img = img + (
-            butterfly_image.create_image(
-                butterfly.fill_lat(
-                    df.lazy(),
-                    info.date_start,
-                    info.date_end,
-                    info.date_interval.to_interval(),
-                ).collect(),
-                info,
-            )
-            << i
-        ).astype(np.uint16)
+    np.cumsum(
+        diff.reshape(lat_size + 1, date_size)[:lat_size], axis=0, out=img
+    )
     return img
 
 
+def create_palette(cmap: ColorMap) -> npt.NDArray[np.uint8]:
+    """カラーマップから画素値ごとの色の表を作成する
+
+    0とカラーマップに無い値は白とし、その値は表の先頭と末尾に置く
+
+    Args:
+        cmap (ColorMap): カラーマップ
+
+    Returns:
+        npt.NDArray[np.uint8]: 色の表
+    """
+    palette = np.full((len(cmap.cmap) + 2, 3), 0xFF, dtype=np.uint8)
+    palette[1:-1] = np.array(
+        [(c.red, c.green, c.blue) for c in cmap.cmap], dtype=np.uint8
+    ).reshape(-1, 3)
+    return palette
+
+
 def create_color_image(
-    img: npt.NDArray[np.uint16], cmap: ColorMap
+    img: npt.NDArray[np.integer],
+    cmap: ColorMap,
+    out: npt.NDArray[np.uint8] | None = None,
 ) -> npt.NDArray[np.uint8]:
-    img_merged = np.full((*img.shape, 3), 0xFF, dtype=np.uint8)
-    for i, c in enumerate(cmap.cmap, 1):
-        img_merged[img == i] = (c.red, c.green, c.blue)
-    return img_merged
+    """画素値に対応する色を付けた画像を作成する
+
+    Args:
+        img (npt.NDArray[np.integer]): 蝶形図の画像データ
+        cmap (ColorMap): カラーマップ
+        out (npt.NDArray[np.uint8] | None, optional): 書き込み先の配列
+
+    Returns:
+        npt.NDArray[np.uint8]: 色付けされた画像データ
+    """
+    # 範囲外の値は表の端の白に丸める
+    return np.take(create_palette(cmap), img, axis=0, out=out, mode="clip")
+
+
+def create_color_image_file(
+    img: npt.NDArray[np.integer], cmap: ColorMap, path: Path
+) -> np.memmap:
+    """色付けされた画像をメモリマップした.npyファイルへ直接書き込む
+
+    Args:
+        img (npt.NDArray[np.integer]): 蝶形図の画像データ
+        cmap (ColorMap): カラーマップ
+        path (Path): 出力先のファイル
+
+    Returns:
+        np.memmap: 書き込んだ画像データ
+    """
+    out = np.lib.format.open_memmap(
+        path, mode="w+", dtype=np.uint8, shape=(*img.shape, 3)
+    )
+    create_color_image(img, cmap, out)
+    out.flush()
+    return out
@@ -0,0 +1,190 @@
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+import numpy.typing as npt
+
+from api.libs import butterfly_merge
+from api.libs.butterfly_config import ColorMap
+
+ArrayFormat = Literal["npz", "npy"]
+ImageFormat = Literal[ArrayFormat, "bits"]
+
+SUFFIXES: dict[ImageFormat, str] = {
+    "npy": ".npy",
+    "bits": ".npb",
+    "npz": ".npz",
+}
+
+
+def image_path(path: Path, fmt: ImageFormat) -> Path:
+    """保存形式に対応する画像データのパスを作成する
+
+    Args:
+        path (Path): 拡張子を除いたパス
+        fmt (ImageFormat): 保存形式
+
+    Returns:
+        Path: 画像データのパス
+    """
+    return path.with_suffix(SUFFIXES[fmt])
+
+
+def image_format(path: Path) -> ImageFormat:
+    """画像データのパスから保存形式を求める
+
+    Args:
+        path (Path): 画像データのパス
+
+    Raises:
+        ValueError: 対応する保存形式が無い場合
+
+    Returns:
+        ImageFormat: 保存形式
+    """
+    for fmt, suffix in SUFFIXES.items():
+        if path.suffix == suffix:
+            return fmt
+    msg = f"unknown image format {path.suffix}"
+    raise ValueError(msg)
+
+
+def find_image(path: Path) -> Path | None:
+    """いずれかの保存形式で保存された画像データを探す
+
+    Args:
+        path (Path): 拡張子を除いたパス
+
+    Returns:
+        Path | None: 画像データのパス、見つからない場合はNone
+    """
+    for fmt in SUFFIXES:
+        img_path = image_path(path, fmt)
+        if img_path.exists():
+            return img_path
+    return None
+
+
+def pack_image(img: npt.NDArray[Any]) -> npt.NDArray[np.uint8]:
+    """0と1の画像データを緯度方向に8行ずつ1バイトへ詰める
+
+    Args:
+        img (npt.NDArray[Any]): 0と1の画像データ
+
+    Returns:
+        npt.NDArray[np.uint8]: 詰めた画像データ
+    """
+    if img.size and img.max() > 1:
+        msg = "Image must be binary to pack"
+        raise ValueError(msg)
+    return np.packbits(img, axis=0)
+
+
+def unpack_image(
+    bits: npt.NDArray[np.uint8], rows: int
+) -> npt.NDArray[np.uint8]:
+    """詰めた画像データを0と1の画像データへ戻す
+
+    Args:
+        bits (npt.NDArray[np.uint8]): 詰めた画像データ
+        rows (int): 元の画像データの行数
+
+    Returns:
+        npt.NDArray[np.uint8]: 0と1の画像データ
+    """
+    return np.unpackbits(bits, axis=0, count=rows)
+
+
+def _write(path: Path, fmt: ImageFormat, fn: Callable[[Path], None]) -> Path:
+    img_path = image_path(path, fmt)
+    # 読み込み中のメモリマップを壊さないよう、一時ファイルから置き換える
+    tmp_path = img_path.with_name(f"{img_path.name}.tmp")
+    try:
+        fn(tmp_path)
+        tmp_path.replace(img_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    # 他の形式の古い画像データが読まれないよう削除する
+    for other in SUFFIXES:
+        if other != fmt:
+            image_path(path, other).unlink(missing_ok=True)
+    return img_path
+
+
+def save_image(
+    path: Path, img: npt.NDArray[np.generic], fmt: ImageFormat
+) -> Path:
+    """画像データを保存する
+
+    npzは圧縮して保存し、npyは読み込み時にメモリマップできるよう無圧縮で保存する
+    bitsは0と1の画像データをビット単位に詰め、行数と共に無圧縮で保存する
+
+    Args:
+        path (Path): 拡張子を除いたパス
+        img (npt.NDArray[np.generic]): 画像データ
+        fmt (ImageFormat): 保存形式
+
+    Returns:
+        Path: 保存した画像データのパス
+    """
+    if fmt == "bits":
+        bits = pack_image(img)
+
+    def write(tmp_path: Path) -> None:
+        with tmp_path.open("wb") as f:
+            if fmt == "npz":
+                np.savez_compressed(f, img=img)
+            elif fmt == "bits":
+                np.savez(f, bits=bits, rows=img.shape[0])
+            else:
+                np.save(f, img)
+
+    return _write(path, fmt, write)
+
+
+def save_color_image(
+    path: Path, img: npt.NDArray[np.integer], cmap: ColorMap, fmt: ArrayFormat
+) -> Path:
+    """色付けした画像データを保存する
+
+    npyの場合はメモリ上に色付けした画像を作らず、ファイルへ直接書き込む
+
+    Args:
+        path (Path): 拡張子を除いたパス
+        img (npt.NDArray[np.integer]): 蝶形図の画像データ
+        cmap (ColorMap): カラーマップ
+        fmt (ArrayFormat): 保存形式
+
+    Returns:
+        Path: 保存した画像データのパス
+    """
+    if fmt == "npz":
+        return save_image(
+            path, butterfly_merge.create_color_image(img, cmap), fmt
+        )
+
+    def write(tmp_path: Path) -> None:
+        butterfly_merge.create_color_image_file(img, cmap, tmp_path)
+
+    return _write(path, fmt, write)
+
+
+def load_image(path: Path) -> npt.NDArray[Any]:
+    """画像データを読み込む
+
+    npyは読み取り専用でメモリマップし、必要な部分のみ読み込む
+    bitsは読み込んだ後に0と1の画像データへ戻す
+
+    Args:
+        path (Path): 画像データのパス
+
+    Returns:
+        npt.NDArray[Any]: 画像データ
+    """
+    if path.suffix == SUFFIXES["npy"]:
+        return np.load(path, mmap_mode="r")
+    with np.load(path) as f:
+        if path.suffix == SUFFIXES["bits"]:
+            return unpack_image(f["bits"], int(f["rows"]))
+        return f["img"]
@@ -0,0 +1,166 @@
+from io import BytesIO
+from math import ceil, log2
+from typing import Any
+
+import matplotlib.pyplot as plt
+import numpy as np
+import numpy.typing as npt
+
+TILE_SIZE = 256
+
+# 色付けされていない画像の次元数
+_GRAY_NDIM = 2
+
+
+def calc_max_zoom(height: int, width: int, tile_size: int = TILE_SIZE) -> int:
+    """元の解像度で表示するズームレベルを算出する
+
+    ズームレベル0で画像全体が1枚のタイルに収まる
+
+    Args:
+        height (int): 画像の高さ
+        width (int): 画像の幅
+        tile_size (int, optional): タイルの大きさ
+
+    Returns:
+        int: 最大のズームレベル
+
+    Examples:
+        >>> calc_max_zoom(181, 256)
+        0
+        >>> calc_max_zoom(181, 257)
+        1
+        >>> calc_max_zoom(361, 36525)
+        8
+    """
+    return max(0, ceil(log2(max(height, width) / tile_size)))
+
+
+def calc_tile_count(
+    height: int, width: int, zoom: int, tile_size: int = TILE_SIZE
+) -> tuple[int, int]:
+    """ズームレベルごとのタイルの数を算出する
+
+    Args:
+        height (int): 画像の高さ
+        width (int): 画像の幅
+        zoom (int): ズームレベル
+        tile_size (int, optional): タイルの大きさ
+
+    Returns:
+        tuple[int, int]: 緯度方向と日付方向のタイルの数
+
+    Examples:
+        >>> calc_tile_count(361, 36525, 8)
+        (2, 143)
+        >>> calc_tile_count(361, 36525, 0)
+        (1, 1)
+    """
+    span = tile_size << (calc_max_zoom(height, width, tile_size) - zoom)
+    return -(-height // span), -(-width // span)
+
+
+def downsample(img: npt.NDArray[Any], factor: int) -> npt.NDArray[Any]:
+    """画像をブロックごとにまとめて縮小する
+
+    点のまばらな画像でも消えないよう、2次元の画像はブロック内の論理和を取り、
+    色付けされた画像は白の背景より濃い色を優先する
+
+    Args:
+        img (npt.NDArray[Any]): 画像データ
+        factor (int): 縮小率
+
+    Returns:
+        npt.NDArray[Any]: 縮小した画像データ
+
+    Examples:
+        >>> downsample(np.array([[0, 1, 0], [0, 0, 2], [4, 0, 0]]), 2)
+        array([[1, 2],
+               [4, 0]])
+    """
+    if factor == 1:
+        return np.asarray(img)
+    height, width = img.shape[:2]
+    pad = [(0, -height % factor), (0, -width % factor)]
+    pad += [(0, 0)] * (img.ndim - 2)
+    padded = np.pad(img, pad, constant_values=_background(img))
+    blocks = padded.reshape(
+        padded.shape[0] // factor,
+        factor,
+        padded.shape[1] // factor,
+        factor,
+        *img.shape[2:],
+    )
+    if img.ndim == _GRAY_NDIM:
+        return np.bitwise_or.reduce(blocks, axis=(1, 3))
+    return blocks.min(axis=(1, 3))
+
+
+def create_tile(
+    img: npt.NDArray[Any],
+    zoom: int,
+    x: int,
+    y: int,
+    tile_size: int = TILE_SIZE,
+) -> npt.NDArray[Any]:
+    """画像から1枚のタイルを切り出す
+
+    タイルの範囲の画素のみを読み込むため、メモリマップされた画像でも
+    必要な部分のみが読み込まれる
+
+    Args:
+        img (npt.NDArray[Any]): 画像データ
+        zoom (int): ズームレベル
+        x (int): 日付方向のタイルの位置
+        y (int): 緯度方向のタイルの位置
+        tile_size (int, optional): タイルの大きさ
+
+    Raises:
+        ValueError: タイルが範囲外の場合
+
+    Returns:
+        npt.NDArray[Any]: タイルの画像データ
+    """
+    height, width = img.shape[:2]
+    max_zoom = calc_max_zoom(height, width, tile_size)
+    if not 0 <= zoom <= max_zoom:
+        msg = f"zoom must be between 0 and {max_zoom}"
+        raise ValueError(msg)
+    rows, cols = calc_tile_count(height, width, zoom, tile_size)
+    if not (0 <= x < cols and 0 <= y < rows):
+        msg = f"tile {zoom}/{x}/{y} is out of range"
+        raise ValueError(msg)
+    factor = 1 << (max_zoom - zoom)
+    span = tile_size * factor
+    tile = downsample(
+        img[y * span : (y + 1) * span, x * span : (x + 1) * span], factor
+    )
+    # 端のタイルは背景で埋めて大きさを揃える
+    pad = [(0, tile_size - tile.shape[0]), (0, tile_size - tile.shape[1])]
+    pad += [(0, 0)] * (img.ndim - 2)
+    return np.pad(tile, pad, constant_values=_background(img))
+
+
+def tile_to_png(tile: npt.NDArray[Any], cmap: str) -> bytes:
+    """タイルをPNG画像へ変換する
+
+    2次元のタイルは値の有無をカラーマップで塗り、色付けされたタイルはそのまま使う
+
+    Args:
+        tile (npt.NDArray[Any]): タイルの画像データ
+        cmap (str): カラーマップの名前
+
+    Returns:
+        bytes: PNG画像
+    """
+    buf = BytesIO()
+    if tile.ndim == _GRAY_NDIM:
+        plt.imsave(buf, tile != 0, cmap=cmap, vmin=0, vmax=1, format="png")
+    else:
+        plt.imsave(buf, tile, format="png")
+    return buf.getvalue()
+
+
+def _background(img: npt.NDArray[Any]) -> int:
+    # 色付けされた画像の背景は白
+    return 0 if img.ndim == _GRAY_NDIM else 0xFF
@@ -1,9 +1,15 @@
 from datetime import date
+from typing import Any
 
+import numpy as np
+import numpy.typing as npt
 import polars as pl
 
 from api.libs.butterfly import ButterflyInfo, fill_lat
 
+# 色付けされていない画像の次元数
+_GRAY_NDIM = 2
+
 
 def trim_info(
     info: ButterflyInfo,
@@ -21,7 +27,10 @@ def trim_info(
     )
 
 
-def trim_data(df: pl.DataFrame, info: ButterflyInfo) -> pl.DataFrame:
+def trim_data(
+    df: pl.DataFrame | pl.LazyFrame, info: ButterflyInfo
+) -> pl.DataFrame:
+    # 遅延評価の場合は日付の条件がファイルの読み込みへ渡される
     return (
         df.lazy()
         .filter(pl.col("date").is_between(info.date_start, info.date_end))
@@ -33,3 +42,79 @@ def trim_data(df: pl.DataFrame, info: ButterflyInfo) -> pl.DataFrame:
         )
         .collect()
     )
+
+
+def calc_col_index(
+    info: ButterflyInfo, trimmed_info: ButterflyInfo
+) -> npt.NDArray[np.int64]:
+    """切り取った画像の各列に対応する元の画像の列を算出する
+
+    Args:
+        info (ButterflyInfo): 元の蝶形図の情報
+        trimmed_info (ButterflyInfo): 切り取った蝶形図の情報
+
+    Returns:
+        npt.NDArray[np.int64]: 元の画像の列、対応する列が無い場合は-1
+    """
+    interval = info.date_interval.to_interval()
+    dates = pl.date_range(info.date_start, info.date_end, interval, eager=True)
+    trimmed_dates = pl.date_range(
+        trimmed_info.date_start, trimmed_info.date_end, interval, eager=True
+    )
+    index = dates.search_sorted(trimmed_dates).to_numpy().astype(np.int64)
+    found = index < dates.len()
+    found[found] = (
+        dates.gather(index[found]).to_numpy()
+        == trimmed_dates.filter(pl.Series(found)).to_numpy()
+    )
+    return np.where(found, index, -1)
+
+
+def trim_image(
+    img: npt.NDArray[Any], info: ButterflyInfo, trimmed_info: ButterflyInfo
+) -> npt.NDArray[Any]:
+    """画像を作り直さずに、蝶形図の情報から画像を切り取る
+
+    切り取る範囲が元の画像に収まる場合はコピーせずにビューを返し、
+    日付がはみ出す場合ははみ出した部分を空白で埋めた新しい画像を返す
+
+    Args:
+        img (npt.NDArray[Any]): 元の画像データ
+        info (ButterflyInfo): 元の蝶形図の情報
+        trimmed_info (ButterflyInfo): 切り取った蝶形図の情報
+
+    Raises:
+        ValueError: 期間が異なる場合、緯度が元の画像の範囲外の場合
+
+    Returns:
+        npt.NDArray[Any]: 切り取った画像データ
+    """
+    if info.date_interval != trimmed_info.date_interval:
+        msg = "date interval must be equal"
+        raise ValueError(msg)
+    # 範囲外の緯度は画像に含まれないため、作り直さなければ求められない
+    if (
+        trimmed_info.lat_min < info.lat_min
+        or info.lat_max < trimmed_info.lat_max
+    ):
+        msg = "latitude must be within the range of the image"
+        raise ValueError(msg)
+    # 緯度は0.5度ごとに北から並ぶ
+    row_start = 2 * (info.lat_max - trimmed_info.lat_max)
+    row_end = 2 * (info.lat_max - trimmed_info.lat_min) + 1
+    img = img[row_start:row_end]
+    col_index = calc_col_index(info, trimmed_info)
+    col_start = int(col_index[0])
+    if col_start >= 0 and np.array_equal(
+        col_index, np.arange(col_start, col_start + col_index.size)
+    ):
+        return img[:, col_start : col_start + col_index.size]
+
+    # 色付けされた画像の空白は白
+    fill = 0 if img.ndim == _GRAY_NDIM else 0xFF
+    trimmed = np.full(
+        (img.shape[0], col_index.size, *img.shape[2:]), fill, dtype=img.dtype
+    )
+    found = col_index >= 0
+    trimmed[:, found] = img[:, col_index[found]]
+    return trimmed
@@ -0,0 +1,366 @@
+import contextlib
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from pathlib import Path
+from typing import Generic, TypeVar
+
+import polars as pl
+
+_K = TypeVar("_K", bound=Hashable)
+_V = TypeVar("_V")
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(path: Path) -> str:
+    """ファイルの更新日時と大きさから識別子を作成する
+
+    Args:
+        path (Path): ファイルのパス
+
+    Returns:
+        str: 識別子
+    """
+    stat = path.stat()
+    return f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def create_key(*parts: str | bytes) -> str:
+    """複数の要素からキャッシュのキーを作成する
+
+    Args:
+        *parts (str | bytes): キーの要素
+
+    Returns:
+        str: キー
+
+    Examples:
+        >>> create_key("a", "b") == create_key("a", "b")
+        True
+        >>> create_key("a", "b") == create_key("ab")
+        False
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        data = part.encode() if isinstance(part, str) else part
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class MemoryCache(Generic[_K, _V]):
+    """合計の大きさで制限したメモリ上のLRUキャッシュ"""
+
+    def __init__(
+        self: "MemoryCache[_K, _V]",
+        max_bytes: int,
+        sizeof: Callable[[_V], int],
+    ) -> None:
+        """キャッシュを作成する
+
+        Args:
+            max_bytes (int): 保持する値の大きさの合計の上限
+            sizeof (Callable[[_V], int]): 値の大きさを算出する関数
+        """
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._items: OrderedDict[_K, tuple[_V, int]] = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self: "MemoryCache[_K, _V]") -> int:
+        return self._nbytes
+
+    def __len__(self: "MemoryCache[_K, _V]") -> int:
+        return len(self._items)
+
+    def __contains__(self: "MemoryCache[_K, _V]", key: _K) -> bool:
+        return key in self._items
+
+    def get(self: "MemoryCache[_K, _V]", key: _K) -> _V | None:
+        """値を取得する
+
+        Args:
+            key (_K): キー
+
+        Returns:
+            _V | None: 値、存在しなければNone
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def put(self: "MemoryCache[_K, _V]", key: _K, value: _V) -> None:
+        """値を保存し、上限を超えた分を古い順に破棄する
+
+        上限より大きい値は保存しない
+
+        Args:
+            key (_K): キー
+            value (_V): 値
+        """
+        size = self._sizeof(value)
+        with self._lock:
+            self._pop(key)
+            if size > self._max_bytes:
+                return
+            self._items[key] = (value, size)
+            self._nbytes += size
+            while self._nbytes > self._max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self._nbytes -= evicted
+
+    def _pop(self: "MemoryCache[_K, _V]", key: _K) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._nbytes -= item[1]
+
+    def pop(self: "MemoryCache[_K, _V]", key: _K) -> None:
+        """値を破棄する
+
+        Args:
+            key (_K): キー
+        """
+        with self._lock:
+            self._pop(key)
+
+    def discard_if(
+        self: "MemoryCache[_K, _V]", predicate: Callable[[_K], bool]
+    ) -> None:
+        """条件に合うキーの値を全て破棄する
+
+        Args:
+            predicate (Callable[[_K], bool]): 破棄するキーの条件
+        """
+        with self._lock:
+            for key in [key for key in self._items if predicate(key)]:
+                self._pop(key)
+
+    def clear(self: "MemoryCache[_K, _V]") -> None:
+        """全ての値を破棄する"""
+        with self._lock:
+            self._items.clear()
+            self._nbytes = 0
+
+
+class DiskCache:
+    """合計の大きさで制限したディレクトリ上のLRUキャッシュ"""
+
+    suffix = ".cache"
+
+    def __init__(self: "DiskCache", directory: Path, max_bytes: int) -> None:
+        """キャッシュを作成する
+
+        Args:
+            directory (Path): 保存先のディレクトリ
+            max_bytes (int): 保持するファイルの大きさの合計の上限
+        """
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._index: OrderedDict[str, int] | None = None
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self: "DiskCache", key: str) -> Path:
+        return self._directory / f"{key}{self.suffix}"
+
+    def _load_index(self: "DiskCache") -> OrderedDict[str, int]:
+        if self._index is None:
+            # 既存のファイルを最終アクセスの古い順に並べる
+            files = sorted(
+                (path.stat().st_mtime_ns, path.stem, path.stat().st_size)
+                for path in self._directory.glob(f"*{self.suffix}")
+            )
+            self._index = OrderedDict((key, size) for _, key, size in files)
+            self._nbytes = sum(self._index.values())
+        return self._index
+
+    @property
+    def nbytes(self: "DiskCache") -> int:
+        with self._lock:
+            self._load_index()
+            return self._nbytes
+
+    def get(self: "DiskCache", key: str) -> bytes | None:
+        """値を取得する
+
+        Args:
+            key (str): キー
+
+        Returns:
+            bytes | None: 値、存在しなければNone
+        """
+        with self._lock:
+            index = self._load_index()
+            if key not in index:
+                return None
+            path = self._path(key)
+            try:
+                with path.open("rb") as f:
+                    data = f.read()
+                os.utime(path)
+            except FileNotFoundError:
+                self._nbytes -= index.pop(key)
+                return None
+            index.move_to_end(key)
+            return data
+
+    def put(self: "DiskCache", key: str, value: bytes) -> None:
+        """値を保存し、上限を超えた分を古い順に削除する
+
+        上限より大きい値は保存しない
+        読み取り専用や容量不足で書き込めない場合は、保存せずに記録のみ残す
+
+        Args:
+            key (str): キー
+            value (bytes): 値
+        """
+        if len(value) > self._max_bytes:
+            return
+        with self._lock:
+            path = self._path(key)
+            tmp_path = path.with_suffix(".tmp")
+            try:
+                index = self._load_index()
+                self._directory.mkdir(exist_ok=True, parents=True)
+                with tmp_path.open("wb") as f:
+                    f.write(value)
+                tmp_path.replace(path)
+            except OSError:
+                logger.warning(
+                    "failed to write cache to %s",
+                    self._directory,
+                    exc_info=True,
+                )
+                with contextlib.suppress(OSError):
+                    tmp_path.unlink(missing_ok=True)
+                return
+            if key in index:
+                self._nbytes -= index.pop(key)
+            index[key] = len(value)
+            self._nbytes += len(value)
+            while self._nbytes > self._max_bytes:
+                evicted, size = index.popitem(last=False)
+                with contextlib.suppress(OSError):
+                    self._path(evicted).unlink(missing_ok=True)
+                self._nbytes -= size
+
+
+class TieredCache:
+    """メモリとディスクの二段のキャッシュ"""
+
+    def __init__(
+        self: "TieredCache",
+        memory: MemoryCache[str, bytes],
+        disk: DiskCache | None = None,
+    ) -> None:
+        self._memory = memory
+        self._disk = disk
+
+    def get(self: "TieredCache", key: str) -> bytes | None:
+        """値を取得する、ディスクにのみ存在すればメモリへ載せる
+
+        Args:
+            key (str): キー
+
+        Returns:
+            bytes | None: 値、存在しなければNone
+        """
+        value = self._memory.get(key)
+        if value is None and self._disk is not None:
+            value = self._disk.get(key)
+            if value is not None:
+                self._memory.put(key, value)
+        return value
+
+    def put(self: "TieredCache", key: str, value: bytes) -> None:
+        """値を両方のキャッシュへ保存する
+
+        Args:
+            key (str): キー
+            value (bytes): 値
+        """
+        self._memory.put(key, value)
+        if self._disk is not None:
+            self._disk.put(key, value)
+
+
+class FrameCache:
+    """parquetファイルを読み込んだデータフレームのキャッシュ
+
+    ファイルの更新日時と大きさをキーに含めるため、更新されたファイルは読み直す
+    """
+
+    def __init__(self: "FrameCache", max_bytes: int) -> None:
+        """キャッシュを作成する
+
+        Args:
+            max_bytes (int): 保持するデータフレームの大きさの合計の上限
+        """
+        self._memory: MemoryCache[tuple[str, str], pl.DataFrame] = MemoryCache(
+            max_bytes, lambda df: int(df.estimated_size())
+        )
+
+    @property
+    def nbytes(self: "FrameCache") -> int:
+        return self._memory.nbytes
+
+    def __len__(self: "FrameCache") -> int:
+        return len(self._memory)
+
+    def read_parquet(self: "FrameCache", path: Path) -> pl.DataFrame:
+        """parquetファイルを読み込む、保持していればそのまま返す
+
+        Args:
+            path (Path): ファイルのパス
+
+        Returns:
+            pl.DataFrame: データフレーム
+        """
+        name = str(path.resolve())
+        key = (name, fingerprint(path))
+        df = self._memory.get(key)
+        if df is None:
+            df = pl.read_parquet(path)
+            # 更新前のファイルのデータフレームは使われないため破棄する
+            self._memory.discard_if(lambda k: k[0] == name)
+            self._memory.put(key, df)
+        return df
+
+    def scan_parquet(self: "FrameCache", path: Path) -> pl.LazyFrame:
+        """parquetファイルを遅延評価で読み込む、保持していればそれを使う
+
+        保持していない場合は読み込まずに走査するため、条件をファイルの
+        読み込みへ渡せる
+
+        Args:
+            path (Path): ファイルのパス
+
+        Returns:
+            pl.LazyFrame: データフレーム
+        """
+        df = self._memory.get((str(path.resolve()), fingerprint(path)))
+        if df is None:
+            return pl.scan_parquet(path)
+        return df.lazy()
+
+    def invalidate(self: "FrameCache", path: Path) -> None:
+        """ファイルのデータフレームを破棄する
+
+        Args:
+            path (Path): ファイルのパス
+        """
+        name = str(path.resolve())
+        self._memory.discard_if(lambda k: k[0] == name)
+
+    def clear(self: "FrameCache") -> None:
+        """全てのデータフレームを破棄する"""
+        self._memory.clear()
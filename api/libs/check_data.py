@@ -1,49 +1,66 @@
+from collections.abc import Callable, Iterable
+from typing import TypeVar
+
 import polars as pl
 
+_FrameT = TypeVar("_FrameT", pl.DataFrame, pl.LazyFrame)
+
 
 def create_expected_group_numbers(no: int) -> pl.Series:
     return pl.Series(range(1, no + 1), dtype=pl.UInt8)
 
 
-def find_invalid_group_number(df: pl.DataFrame) -> pl.DataFrame:
+def find_invalid_group_number(df: _FrameT) -> _FrameT:
     """不正なグループ番号を検索する
 
     Args:
-        df (pl.DataFrame): 黒点群データ
+        df (_FrameT): 黒点群データ
 
     Returns:
-        pl.DataFrame: 不正値を含む行のみの新しいデータフレーム
+        _FrameT: 不正値を含む日付ごとの新しいデータフレーム
     """
-    return (
+    # 日付と番号で並べ替えると、正しい番号は日付内の位置と一致する
+    is_first = pl.col("date").shift().ne_missing(pl.col("date"))
+    is_last = pl.col("date").shift(-1).ne_missing(pl.col("date"))
+    index = pl.int_range(pl.len(), dtype=pl.UInt32)
+    invalid_dates = (
         df.lazy()
+        .sort("date", "no")
+        .with_columns(
+            (index - pl.when(is_first).then(index).forward_fill() + 1).alias(
+                "expected"
+            ),
+            (is_first & is_last & pl.col("no").eq_missing(0)).alias("empty"),
+        )
+        .filter(pl.col("no").ne_missing(pl.col("expected")) & ~pl.col("empty"))
+        .select("date")
+        .unique()
+    )
+    # 不正な日付のみ番号の一覧を作成する
+    lf = (
+        df.lazy()
+        .join(invalid_dates, on="date", how="semi")
         .group_by("date")
         .agg(
-            pl.col("no").alias("original"),
-            pl.col("no")
-            .count()
-            .map_elements(
-                create_expected_group_numbers, return_dtype=pl.List(pl.UInt8)
-            )
-            .alias("expected"),
-        )
-        .with_columns(pl.col("original", "expected").list.sort())
-        .filter(
-            (pl.col("original") != pl.col("expected"))
-            & (pl.col("original") != [0])
+            pl.col("no").sort().alias("original"),
+            # 欠損値は番号の数に含めない
+            pl.int_range(1, pl.col("no").count() + 1, dtype=pl.UInt8).alias(
+                "expected"
+            ),
         )
-        .collect()
     )
+    return lf.collect() if isinstance(df, pl.DataFrame) else lf
 
 
-def find_invalid_lat_range(df: pl.DataFrame, threshold: int) -> pl.DataFrame:
+def find_invalid_lat_range(df: _FrameT, threshold: int) -> _FrameT:
     """不正な範囲に存在する緯度を検索する
 
     Args:
-        df (pl.DataFrame): 黒点群データ
+        df (_FrameT): 黒点群データ
         threshold (int): 緯度の閾値
 
     Returns:
-        pl.DataFrame: 不正値を含む行のみの新しいデータフレーム
+        _FrameT: 不正値を含む行のみの新しいデータフレーム
     """
     return df.filter(
         pl.any_horizontal(
@@ -54,17 +71,17 @@ def find_invalid_lat_range(df: pl.DataFrame, threshold: int) -> pl.DataFrame:
 
 
 def find_invalid_lon_range(
-    df: pl.DataFrame, min_threshold: int, max_threshold: int
-) -> pl.DataFrame:
+    df: _FrameT, min_threshold: int, max_threshold: int
+) -> _FrameT:
     """不正な範囲に存在する経度を検索する
 
     Args:
-        df (pl.DataFrame): 黒点群データ
+        df (_FrameT): 黒点群データ
         min_threshold (int): 経度の閾値の最小
         max_threshold (int): 経度の閾値の最大
 
     Returns:
-        pl.DataFrame: 不正値を含む行のみの新しいデータフレーム
+        _FrameT: 不正値を含む行のみの新しいデータフレーム
     """
     return df.filter(
         pl.any_horizontal(
@@ -74,31 +91,66 @@ def find_invalid_lon_range(
     )
 
 
-def find_invalid_lat_interval(df: pl.DataFrame, interval: int) -> pl.DataFrame:
+def find_invalid_lat_interval(df: _FrameT, interval: int) -> _FrameT:
     """不正な間隔を持つ緯度を検索する
 
     Args:
-        df (pl.DataFrame): 黒点群データ
+        df (_FrameT): 黒点群データ
         interval (int): 緯度の間隔の最大値
 
     Returns:
-        pl.DataFrame: 不正値を含む行のみの新しいデータフレーム
+        _FrameT: 不正値を含む行のみの新しいデータフレーム
     """
     return df.with_columns(
         (pl.col("lat_max") - pl.col("lat_min")).alias("interval")
     ).filter(pl.col("interval") > interval)
 
 
-def find_invalid_lon_interval(df: pl.DataFrame, interval: int) -> pl.DataFrame:
+def find_invalid_lon_interval(df: _FrameT, interval: int) -> _FrameT:
     """不正な間隔を持つ経度を検索する
 
     Args:
-        df (pl.DataFrame): 黒点群データ
+        df (_FrameT): 黒点群データ
         interval (int): 経度の間隔の最大値
 
     Returns:
-        pl.DataFrame: 不正値を含む行のみの新しいデータフレーム
+        _FrameT: 不正値を含む行のみの新しいデータフレーム
     """
     return df.with_columns(
         (pl.col("lon_max") - pl.col("lon_min")).alias("interval")
     ).filter(pl.col("interval") > interval)
+
+
+def find_invalid_all(
+    df: pl.DataFrame | pl.LazyFrame,
+    checks: Iterable[Callable[[pl.LazyFrame], pl.LazyFrame]],
+) -> list[pl.DataFrame]:
+    """複数の検査をまとめて行う
+
+    全ての検査を一つの実行計画として評価するため、
+    遅延評価の場合はファイルの読み込みが共有される
+
+    Args:
+        df (pl.DataFrame | pl.LazyFrame): 黒点群データ
+        checks (Iterable[Callable[[pl.LazyFrame], pl.LazyFrame]]): 検査
+
+    Returns:
+        list[pl.DataFrame]: 検査ごとの不正値を含む新しいデータフレーム
+
+    Examples:
+        >>> from functools import partial
+        >>> df = pl.DataFrame({"lat_min": [-60, 10], "lat_max": [-40, 30]})
+        >>> [
+        ...     df.height
+        ...     for df in find_invalid_all(
+        ...         df,
+        ...         [
+        ...             partial(find_invalid_lat_range, threshold=50),
+        ...             partial(find_invalid_lat_interval, interval=15),
+        ...         ],
+        ...     )
+        ... ]
+        [1, 2]
+    """
+    lf = df.lazy()
+    return pl.collect_all([check(lf) for check in checks])
@@ -1,8 +1,13 @@
 from collections.abc import Iterable
 from csv import DictReader
 from datetime import date
+from io import StringIO
+from pathlib import Path
 from re import compile
 
+import nkf
+import polars as pl
+
 _pat_case = r"(?i)"
 _pat_number = r"\d+"
 _pat_date = (
@@ -295,3 +300,207 @@ def validate_file(file: Iterable[str]) -> list[dict]:
         if first:
             first = False
     return errors
+
+
+def _validate_unique(
+    df: pl.DataFrame, *, col: str, pat: str, valid: pl.Expr
+) -> pl.DataFrame:
+    # 値の種類は行数より十分少ないため、重複を除いた値のみ検査して結合する
+    values = (
+        df.select(pl.col(col).unique())
+        # 正規表現の抽出を一度で済ませるため構造体へ分解
+        .with_columns(pl.col(col).str.extract_groups(pat).alias("groups"))
+        .select(col, valid.fill_null(value=False).alias(f"{col}_valid"))
+    )
+    return df.join(values, on=col, how="left")
+
+
+def _validate_date_col(df: pl.DataFrame, *, col: str) -> pl.DataFrame:
+    pat = (
+        r"^(?P<year>\d{4})(?P<sep1>[-/\. ])(?P<month>\d{1,2})"
+        r"(?P<sep2>[-/\. ])(?P<day>\d{1,2})$"
+    )
+    field = pl.col("groups").struct.field
+    valid = (
+        field("sep1").eq(field("sep2"))
+        & field("year").cast(pl.Int32).ge(1)
+        & pl.concat_str(
+            field("year"), field("month"), field("day"), separator="-"
+        )
+        .str.strptime(pl.Date, "%Y-%m-%d", strict=False)
+        .is_not_null()
+    )
+    return _validate_unique(df, col=col, pat=pat, valid=valid)
+
+
+def _validate_coord_col(
+    df: pl.DataFrame, *, col: str, digits: int, chars_dir: str, coord_max: int
+) -> pl.DataFrame:
+    number = rf"\d{{1,{digits}}}(?:\.\d+)?"
+    sign = rf"[{chars_dir}pm+-]?"
+    pat = (
+        rf"^(?i)(?:(?P<not_detected>ND)|(?P<left_sign>{sign})"
+        rf"(?P<left>{number})(?:~(?P<right_sign>{sign})(?P<right>{number}))?)$"
+    )
+    field = pl.col("groups").struct.field
+    left_sign = field("left_sign").str.to_lowercase()
+    left = field("left").cast(pl.Float64)
+    right_sign = field("right_sign").str.to_lowercase()
+    right = field("right").cast(pl.Float64)
+    dirs = list(chars_dir)
+    signs = ["p", "m", "+", "-", ""]
+    in_range = left.le(coord_max) & right.le(coord_max)
+    valid = (
+        field("not_detected").is_not_null()
+        | (right.is_null() & left.le(coord_max))
+        | (left_sign.is_in(dirs) & right_sign.is_in([*dirs, ""]) & in_range)
+        | (left_sign.is_in(signs) & right_sign.is_in(signs) & in_range)
+        | (
+            left_sign.eq("")
+            & right_sign.is_in(dirs)
+            & left.eq(0)
+            & right.le(coord_max)
+        )
+    )
+    return _validate_unique(df, col=col, pat=pat, valid=valid)
+
+
+def validate_file_columnar(text: str) -> list[dict]:
+    """CSVファイル全体が妥当か、列ごとにまとめて検査
+
+    validate_file と同じ結果を返す
+    引用符やASCII以外の文字などを含む場合は validate_file で検査する
+
+    Args:
+        text (str): 改行をLFへ統一したCSVファイルの内容
+
+    Returns:
+        list[dict]: 不正と検出された箇所と種類
+    """
+    if any(c in text for c in ['"', "\r", "\0"]) or not text.isascii():
+        return validate_file(StringIO(text))
+    if text == "":
+        return [{"type": "header", "header": None}]
+
+    lines = text.split("\n")
+    if text.endswith("\n"):
+        lines.pop()
+    cols = ["date", "no", "lat", "lon", "num"]
+    header = lines[0].split(",") if lines[0] != "" else []
+    if header != cols:
+        return [{"type": "header", "header": header}]
+
+    no_error = pl.col("no").is_null() | ~pl.col("no").str.contains(
+        r"^\d+$"
+    ).fill_null(value=False)
+    is_zero = pl.col("no").str.contains(r"^0+$").fill_null(value=False)
+    date_error = pl.col("date").is_null() | (
+        ~pl.col("date_valid").fill_null(value=False)
+        & (pl.col("line").eq(pl.col("line").min()) | pl.col("date").ne(""))
+    )
+    field_errors = {
+        col: ~no_error
+        & pl.when(is_zero)
+        .then(pl.col(col).is_null() | pl.col(col).ne(""))
+        .otherwise(
+            pl.col(col).is_null()
+            | ~pl.col(f"{col}_valid").fill_null(value=False)
+        )
+        for col in ["lat", "lon", "num"]
+    }
+    df = (
+        pl.DataFrame({"text": lines[1:]}, schema={"text": pl.String})
+        .with_row_index("line", offset=2)
+        # 空行は読み飛ばす
+        .filter(pl.col("text").ne(""))
+        # 6列目以降は余分な列としてまとめて残す
+        .select(
+            "line",
+            pl.col("text")
+            .str.splitn(",", len(cols) + 1)
+            .struct.rename_fields([*cols, "over"])
+            .alias("fields"),
+        )
+        .unnest("fields")
+        .pipe(_validate_date_col, col="date")
+        .pipe(
+            _validate_coord_col,
+            col="lat",
+            digits=2,
+            chars_dir="ns",
+            coord_max=90,
+        )
+        .pipe(
+            _validate_coord_col,
+            col="lon",
+            digits=3,
+            chars_dir="ew",
+            coord_max=360,
+        )
+        .with_columns(
+            pl.col("num").str.contains(r"^\d*[1-9]\d*$").alias("num_valid")
+        )
+        .select(
+            "line",
+            "over",
+            date_error.alias("date"),
+            no_error.alias("no"),
+            *(error.alias(col) for col, error in field_errors.items()),
+        )
+        .filter(pl.col("over").is_not_null() | pl.any_horizontal(cols))
+        .sort("line")
+    )
+
+    errors: list[dict[str, str | int | list[str]]] = []
+    for row in df.iter_rows(named=True):
+        if row["over"] is not None:
+            errors.append(
+                {
+                    "type": "row",
+                    "line": row["line"],
+                    "over": row["over"].split(","),
+                }
+            )
+        if len(fields := [col for col in cols if row[col]]) != 0:
+            errors.append(
+                {"type": "field", "line": row["line"], "fields": fields}
+            )
+    return errors
+
+
+def guess_encoding(path: Path, size: int = 64 * 1024) -> str:
+    """ファイルの先頭から文字コードを推定する
+
+    ASCII以外の文字が現れるまで読み進め、その範囲から推定する
+    途中で切れた文字で誤判定しないよう、推定する範囲は行末まで広げる
+    全体がASCIIの場合は、UTF-8とする
+
+    Args:
+        path (Path): ファイルのパス
+        size (int): 一度に読み込む大きさ
+
+    Returns:
+        str: 文字コード
+    """
+    with path.open("rb") as f:
+        while chunk := f.read(size):
+            if not chunk.isascii():
+                break
+        else:
+            return "utf-8"
+        # 直前までは全てASCIIのため、読み込んだ範囲の先頭は文字の境界になる
+        chunk += f.readline()
+    return nkf.guess(chunk).lower()
+
+
+def validate_path(path: Path) -> list[dict]:
+    """CSVファイルを読み込み、全体が妥当か検査
+
+    Args:
+        path (Path): CSVファイルのパス
+
+    Returns:
+        list[dict]: 不正と検出された箇所と種類
+    """
+    with path.open("r", encoding=guess_encoding(path)) as f:
+        return validate_file_columnar(f.read())
@@ -1,9 +1,21 @@
+import json
+import threading
+from bisect import bisect_left, bisect_right
 from csv import DictReader
+from datetime import date
 from pathlib import Path
 from re import compile
 
 from pydantic import BaseModel
 
+_pattern = compile(
+    r"(?P<year>\d{4})"
+    r"(?:[-/\. ])"
+    r"(?P<month>\d{1,2})"
+    r"(?:[-/\. ])"
+    r"(?P<day>\d{1,2})"
+)
+
 
 class FinderResult(BaseModel):
     path: str
@@ -13,13 +25,7 @@ class FinderResult(BaseModel):
 def finder(
     search_path: Path, year: int, month: int, day: int
 ) -> list[FinderResult]:
-    pattern = compile(
-        r"(?P<year>\d{4})"
-        r"(?:[-/\. ])"
-        r"(?P<month>\d{1,2})"
-        r"(?:[-/\. ])"
-        r"(?P<day>\d{1,2})"
-    )
+    pattern = _pattern
     result: list[FinderResult] = []
     for path in search_path.glob("*.csv"):
         with path.open("r") as f:
@@ -37,3 +43,195 @@ def finder(
         if len(match_line_num) != 0:
             result.append(FinderResult(path=str(path), lines=match_line_num))
     return result
+
+
+def create_date_key(year: int, month: int, day: int) -> str:
+    """日付から索引のキーを作成する
+
+    文字列の順序が日付の順序と一致するよう桁を揃える
+
+    Args:
+        year (int): 年
+        month (int): 月
+        day (int): 日
+
+    Returns:
+        str: キー
+
+    Examples:
+        >>> create_date_key(2020, 8, 1)
+        '2020-08-01'
+        >>> create_date_key(2020, 8, 1) < create_date_key(2020, 10, 1)
+        True
+    """
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def is_valid_date_key(key: str) -> bool:
+    """索引のキーが存在する日付か判定する
+
+    Args:
+        key (str): キー
+
+    Returns:
+        bool: 存在する日付であればTrue
+
+    Examples:
+        >>> is_valid_date_key("2020-02-29")
+        True
+        >>> is_valid_date_key("2020-13-01")
+        False
+    """
+    year, month, day = map(int, key.split("-"))
+    try:
+        date(year, month, day)
+    except ValueError:
+        return False
+    return True
+
+
+def index_file(path: Path) -> dict[str, list[int]]:
+    """ファイル内の日付ごとの行番号を取得する
+
+    Args:
+        path (Path): CSVファイルのパス
+
+    Returns:
+        dict[str, list[int]]: 日付のキーと行番号
+    """
+    dates: dict[str, list[int]] = {}
+    with path.open("r") as f:
+        reader = DictReader(f)
+        for row in reader:
+            if match := _pattern.fullmatch(row["date"]):
+                key = create_date_key(*map(int, match.groups()))
+                dates.setdefault(key, []).append(reader.line_num)
+    return dates
+
+
+class FinderIndex:
+    """日付からファイルと行番号を引く索引
+
+    ファイルの更新日時と大きさを記録し、変更されたファイルのみ読み直す
+    """
+
+    def __init__(
+        self: "FinderIndex", search_path: Path, index_path: Path | None = None
+    ) -> None:
+        """索引を作成する
+
+        Args:
+            search_path (Path): CSVファイルを探すディレクトリ
+            index_path (Path | None): 索引の保存先、Noneであれば保存しない
+        """
+        self._search_path = search_path
+        self._index_path = index_path
+        self._files: dict[str, dict] | None = None
+        self._keys: list[str] = []
+        self._dates: dict[str, list[tuple[str, list[int]]]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self: "FinderIndex") -> dict[str, dict]:
+        if self._index_path is not None and self._index_path.exists():
+            try:
+                with self._index_path.open("r") as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                pass
+        return {}
+
+    def _save(self: "FinderIndex", files: dict[str, dict]) -> None:
+        if self._index_path is None:
+            return
+        self._index_path.parent.mkdir(exist_ok=True, parents=True)
+        tmp_path = self._index_path.with_suffix(".tmp")
+        with tmp_path.open("w") as f:
+            json.dump(files, f)
+        tmp_path.replace(self._index_path)
+
+    def _rebuild(self: "FinderIndex", files: dict[str, dict]) -> None:
+        dates: dict[str, list[tuple[str, list[int]]]] = {}
+        for path in sorted(files):
+            for key, lines in files[path]["dates"].items():
+                dates.setdefault(key, []).append((path, lines))
+        self._dates = dates
+        # 存在しない日付は文字列の範囲に含まれるため、期間の検索から除く
+        self._keys = sorted(key for key in dates if is_valid_date_key(key))
+
+    def refresh(self: "FinderIndex") -> None:
+        """変更、追加、削除されたファイルを索引へ反映する"""
+        with self._lock:
+            if self._files is None:
+                self._files = self._load()
+                self._rebuild(self._files)
+            files = self._files
+            changed = False
+            paths: set[str] = set()
+            for path in self._search_path.glob("*.csv"):
+                paths.add(str(path))
+                stat = path.stat()
+                entry = files.get(str(path))
+                if (
+                    entry is not None
+                    and entry["mtime"] == stat.st_mtime_ns
+                    and entry["size"] == stat.st_size
+                ):
+                    continue
+                files[str(path)] = {
+                    "mtime": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "dates": index_file(path),
+                }
+                changed = True
+            for removed in set(files) - paths:
+                del files[removed]
+                changed = True
+            if changed:
+                self._rebuild(files)
+                self._save(files)
+
+    def find(
+        self: "FinderIndex", year: int, month: int, day: int
+    ) -> list[FinderResult]:
+        """日付が一致する行を検索する
+
+        Args:
+            year (int): 年
+            month (int): 月
+            day (int): 日
+
+        Returns:
+            list[FinderResult]: ファイルごとの行番号
+        """
+        self.refresh()
+        entries = self._dates.get(create_date_key(year, month, day), [])
+        return [
+            FinderResult(path=path, lines=lines) for path, lines in entries
+        ]
+
+    def find_range(
+        self: "FinderIndex", start: date, end: date
+    ) -> list[FinderResult]:
+        """期間内の日付の行を検索する
+
+        Args:
+            start (date): 開始日
+            end (date): 終了日、この日を含む
+
+        Returns:
+            list[FinderResult]: ファイルごとの行番号
+        """
+        self.refresh()
+        keys = self._keys
+        lo = bisect_left(
+            keys, create_date_key(start.year, start.month, start.day)
+        )
+        hi = bisect_right(keys, create_date_key(end.year, end.month, end.day))
+        result: dict[str, list[int]] = {}
+        for key in keys[lo:hi]:
+            for path, lines in self._dates[key]:
+                result.setdefault(path, []).extend(lines)
+        return [
+            FinderResult(path=path, lines=sorted(lines))
+            for path, lines in sorted(result.items())
+        ]
@@ -0,0 +1,297 @@
+import contextvars
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Literal, ParamSpec, TypedDict
+
+_P = ParamSpec("_P")
+
+JobStatus = Literal["pending", "running", "done", "failed", "cancelled"]
+
+FINISHED: frozenset[JobStatus] = frozenset({"done", "failed", "cancelled"})
+
+
+class JobCancelledError(Exception):
+    """ジョブの取り消しが要求された"""
+
+
+class JobState(TypedDict):
+    id: str
+    name: str
+    status: JobStatus
+    progress: float
+    message: str
+    result: Any
+    error: str | None
+    created_at: float
+    started_at: float | None
+    finished_at: float | None
+    version: int
+
+
+class Job:
+    """バックグラウンドで実行する処理の状態"""
+
+    def __init__(self: "Job", name: str) -> None:
+        """ジョブを作成する
+
+        Args:
+            name (str): ジョブの名前
+        """
+        self.id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._state = JobState(
+            id=self.id,
+            name=name,
+            status="pending",
+            progress=0.0,
+            message="",
+            result=None,
+            error=None,
+            created_at=time.time(),
+            started_at=None,
+            finished_at=None,
+            version=0,
+        )
+
+    @property
+    def status(self: "Job") -> JobStatus:
+        return self._state["status"]
+
+    @property
+    def finished(self: "Job") -> bool:
+        return self.status in FINISHED
+
+    @property
+    def cancel_requested(self: "Job") -> bool:
+        return self._cancel.is_set()
+
+    def snapshot(self: "Job") -> JobState:
+        """現在の状態の複製を取得する
+
+        Returns:
+            JobState: ジョブの状態
+        """
+        with self._lock:
+            return self._state.copy()
+
+    def start(self: "Job") -> None:
+        """実行中にする"""
+        with self._lock:
+            self._state["status"] = "running"
+            self._state["started_at"] = time.time()
+            self._state["version"] += 1
+
+    def finish(
+        self: "Job",
+        status: JobStatus,
+        *,
+        result: Any = None,  # noqa: ANN401
+        error: str | None = None,
+    ) -> None:
+        """終了した状態にする
+
+        Args:
+            status (JobStatus): 終了した状態
+            result (Any, optional): 処理の結果
+            error (str | None, optional): 失敗した理由
+        """
+        with self._lock:
+            self._state["status"] = status
+            self._state["result"] = result
+            self._state["error"] = error
+            if status == "done":
+                self._state["progress"] = 1.0
+            self._state["finished_at"] = time.time()
+            self._state["version"] += 1
+
+    def report(self: "Job", progress: float, message: str = "") -> None:
+        """進捗を報告する
+
+        取り消しが要求されていれば、ここで処理を中断する
+
+        Args:
+            progress (float): 0から1までの進捗
+            message (str, optional): 進捗の説明
+
+        Raises:
+            JobCancelledError: 取り消しが要求されている場合
+        """
+        if self.cancel_requested:
+            raise JobCancelledError
+        with self._lock:
+            self._state["progress"] = min(max(progress, 0.0), 1.0)
+            self._state["message"] = message
+            self._state["version"] += 1
+
+    def request_cancel(self: "Job") -> None:
+        """取り消しを要求する"""
+        self._cancel.set()
+
+
+_current_job: contextvars.ContextVar[Job | None] = contextvars.ContextVar(
+    "current_job", default=None
+)
+
+
+def progress(value: float, message: str = "") -> None:
+    """実行中のジョブの進捗を報告する
+
+    ジョブの外から呼ばれた場合は何もしないため、同期的な処理と共有できる
+    取り消しはこの呼び出しの時点で反映されるため、書き込みの前などの
+    中断しても問題の無い箇所で呼ぶ
+
+    Args:
+        value (float): 0から1までの進捗
+        message (str, optional): 進捗の説明
+
+    Raises:
+        JobCancelledError: 取り消しが要求されている場合
+    """
+    job = _current_job.get()
+    if job is not None:
+        job.report(value, message)
+
+
+class JobManager:
+    """同時に実行する数を制限してジョブを実行する"""
+
+    def __init__(
+        self: "JobManager", max_workers: int, max_finished: int = 100
+    ) -> None:
+        """ジョブの実行器を作成する
+
+        Args:
+            max_workers (int): 同時に実行するジョブの最大数
+            max_finished (int, optional): 保持する終了したジョブの最大数
+        """
+        if max_workers < 1:
+            msg = "max_workers must be greater than 0"
+            raise ValueError(msg)
+        self._max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._max_finished = max_finished
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._futures: dict[str, Future[None]] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self: "JobManager",
+        name: str,
+        fn: Callable[_P, Any],
+        /,
+        *args: _P.args,
+        **kwargs: _P.kwargs,
+    ) -> Job:
+        """ジョブを登録し、空きができ次第実行する
+
+        Args:
+            name (str): ジョブの名前
+            fn (Callable[_P, Any]): 実行する関数
+            *args: 関数の引数
+            **kwargs: 関数のキーワード引数
+
+        Returns:
+            Job: 登録したジョブ
+        """
+        job = Job(name)
+        with self._lock:
+            self._prune()
+            # 終了した後も、次のジョブの登録で作り直す
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self._max_workers, thread_name_prefix="job"
+                )
+            self._jobs[job.id] = job
+            self._futures[job.id] = self._executor.submit(
+                self._run, job, partial(fn, *args, **kwargs)
+            )
+        return job
+
+    def _run(self: "JobManager", job: Job, fn: Callable[[], Any]) -> None:
+        if job.cancel_requested:
+            job.finish("cancelled")
+            return
+        token = _current_job.set(job)
+        job.start()
+        try:
+            result = fn()
+        except JobCancelledError:
+            job.finish("cancelled")
+        except Exception as e:  # noqa: BLE001
+            job.finish("failed", error=str(e))
+        else:
+            job.finish("done", result=result)
+        finally:
+            _current_job.reset(token)
+
+    def _prune(self: "JobManager") -> None:
+        # 呼び出し側でロックを取得しておく
+        finished = [
+            job_id for job_id, job in self._jobs.items() if job.finished
+        ]
+        for job_id in finished[: len(finished) - self._max_finished]:
+            del self._jobs[job_id]
+            self._futures.pop(job_id, None)
+
+    def get(self: "JobManager", job_id: str) -> Job | None:
+        """ジョブを取得する
+
+        Args:
+            job_id (str): ジョブのID
+
+        Returns:
+            Job | None: ジョブ、存在しなければNone
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self: "JobManager") -> list[Job]:
+        """全てのジョブを登録の古い順に取得する
+
+        Returns:
+            list[Job]: ジョブの一覧
+        """
+        with self._lock:
+            self._prune()
+            return list(self._jobs.values())
+
+    def cancel(self: "JobManager", job_id: str) -> Job | None:
+        """ジョブを取り消す
+
+        実行前のジョブはすぐに取り消し、実行中のジョブは次に進捗を報告した時点で中断する
+
+        Args:
+            job_id (str): ジョブのID
+
+        Returns:
+            Job | None: ジョブ、存在しなければNone
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            future = self._futures.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.request_cancel()
+        if future is not None and future.cancel():
+            job.finish("cancelled")
+        return job
+
+    def shutdown(self: "JobManager", *, wait: bool = True) -> None:
+        """全てのジョブを取り消して終了する
+
+        Args:
+            wait (bool): 実行中のジョブの終了を待つかどうか
+        """
+        for job in self.jobs():
+            self.cancel(job.id)
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
@@ -6,6 +6,8 @@ from typing import NamedTuple, TypedDict
 import polars as pl
 from more_itertools import chunked
 
+MONTHS_IN_YEAR = 12
+
 
 class ObsDay(NamedTuple):
     date: date
@@ -19,25 +21,120 @@ class ObsCalendar(TypedDict):
     calendar: list[list[ObsDay]]
 
 
+def calc_calendar_dates(
+    year: int, month: int, first_weekday: int = 0
+) -> list[date]:
+    """カレンダーに表示する日付を算出する
+
+    前後の月の日付を含め、週の始まりから終わりまでの日付を並べる
+
+    Args:
+        year (int): 年
+        month (int): 月
+        first_weekday (int, optional): 週の始まりの曜日
+
+    Returns:
+        list[date]: カレンダーの日付
+    """
+    return list(Calendar(first_weekday).itermonthdates(year, month))
+
+
+def calc_obs_days(
+    df: pl.DataFrame | pl.LazyFrame, dates: list[date]
+) -> list[int]:
+    """日付ごとの観測を算出する
+
+    日付の範囲で絞り込んだ観測データを一度だけ結合する
+    同じ日付の観測が複数ある場合や観測が無い場合は0とする
+
+    Args:
+        df (pl.DataFrame | pl.LazyFrame): 日ごとの観測データ
+        dates (list[date]): 昇順に並んだ日付
+
+    Returns:
+        list[int]: 日付ごとの観測
+    """
+    if not dates:
+        return []
+    df_obs = (
+        df.lazy()
+        .filter(pl.col("date").is_between(dates[0], dates[-1]))
+        .group_by("date")
+        .agg(
+            pl.when(pl.len() == 1)
+            .then(pl.col("obs").first())
+            .otherwise(0)
+            .alias("obs")
+        )
+    )
+    return (
+        pl.LazyFrame({"date": dates}, schema={"date": pl.Date})
+        .join(df_obs, on="date", how="left")
+        .select(pl.col("obs").fill_null(0))
+        .collect()
+        .to_series()
+        .to_list()
+    )
+
+
 def create_calendar(
-    df: pl.DataFrame, year: int, month: int, first_weekday: int = 0
+    df: pl.DataFrame | pl.LazyFrame,
+    year: int,
+    month: int,
+    first_weekday: int = 0,
 ) -> ObsCalendar:
-    c = Calendar(firstweekday=first_weekday)
+    return create_calendars(df, year, month, 1, first_weekday)[0]
 
-    calendar: list[list[ObsDay]] = []
-    for week in chunked(c.itermonthdates(year, month), 7):
-        calendar.append([])
-        for day in week:
-            df_obs = df.filter(pl.col("date") == day)
-            obs = df_obs.item(0, "obs") if df_obs.height == 1 else 0
-            calendar[-1].append(ObsDay(day, obs))
-
-    return {
-        "year": year,
-        "month": month,
-        "first_weekday": first_weekday,
-        "calendar": calendar,
-    }
+
+def create_calendars(
+    df: pl.DataFrame | pl.LazyFrame,
+    year: int,
+    month: int,
+    months: int = 12,
+    first_weekday: int = 0,
+) -> list[ObsCalendar]:
+    """連続する複数の月のカレンダーを作成する
+
+    全ての月の日付をまとめて観測データと一度だけ結合する
+
+    Args:
+        df (pl.DataFrame | pl.LazyFrame): 日ごとの観測データ
+        year (int): 最初の月の年
+        month (int): 最初の月
+        months (int, optional): 月の数
+        first_weekday (int, optional): 週の始まりの曜日
+
+    Raises:
+        ValueError: 最初の月が1から12の範囲外の場合
+
+    Returns:
+        list[ObsCalendar]: 月ごとのカレンダー
+    """
+    if not 1 <= month <= MONTHS_IN_YEAR:
+        msg = f"month must be between 1 and {MONTHS_IN_YEAR}"
+        raise ValueError(msg)
+    months_list = [
+        divmod(year * 12 + month - 1 + i, 12) for i in range(months)
+    ]
+    dates_list = [
+        calc_calendar_dates(y, m + 1, first_weekday) for y, m in months_list
+    ]
+    # 隣り合う月の前後の週は重なるため、重複を除いてから結合する
+    dates = sorted({day for dates in dates_list for day in dates})
+    obs_days = dict(zip(dates, calc_obs_days(df, dates), strict=True))
+
+    return [
+        {
+            "year": y,
+            "month": m + 1,
+            "first_weekday": first_weekday,
+            "calendar": [
+                [ObsDay(day, obs_days[day]) for day in week]
+                for week in chunked(dates, 7)
+            ],
+        }
+        for (y, m), dates in zip(months_list, dates_list, strict=True)
+    ]
 
 
 def print_calendar(calendar: ObsCalendar) -> None:
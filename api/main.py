@@ -1,3 +1,6 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import matplotlib as mpl
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
@@ -5,6 +8,8 @@ from fastapi.staticfiles import StaticFiles
 from api.routers.agg import router as router_agg
 from api.routers.butterfly import router as router_butterfly
 from api.routers.check import router as router_check
+from api.routers.common import job_manager
+from api.routers.jobs import router as router_jobs
 from api.routers.observations import router as router_observations
 from api.routers.sunspot_number import router as router_sunspot_number
 from api.routers.sunspot_number_with_flare import (
@@ -14,14 +19,33 @@ from api.routers.sunspot_number_with_silso import (
     router as router_sunspot_number_with_silso,
 )
 from api.routers.utils import router as router_utils
+from api.tasks.pool import (
+    check_pool,
+    compute_executor,
+    io_executor,
+    render_pool,
+)
 
 mpl.use("Agg")
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    render_pool.start()
+    yield
+    render_pool.shutdown()
+    check_pool.shutdown()
+    job_manager.shutdown(wait=False)
+    compute_executor.shutdown()
+    io_executor.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(router_agg, prefix="/api")
 app.include_router(router_butterfly, prefix="/api")
 app.include_router(router_check, prefix="/api")
+app.include_router(router_jobs, prefix="/api")
 app.include_router(router_observations, prefix="/api")
 app.include_router(router_sunspot_number, prefix="/api")
 app.include_router(router_sunspot_number_with_flare, prefix="/api")
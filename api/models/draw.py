@@ -1,9 +1,13 @@
+from typing import Literal
+
 from pydantic import BaseModel
 
 
 class PreviewQuery(BaseModel):
     filename: str
     config_name: str
+    binary: bool = False
+    format: Literal["png", "webp"] = "png"
 
 
 class PreviewRes(BaseModel):
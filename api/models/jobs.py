@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+
+from api.libs.jobs import JobStatus
+
+
+class JobSubmitRes(BaseModel):
+    job_id: str
+
+
+class JobRes(BaseModel):
+    id: str
+    name: str
+    status: JobStatus
+    progress: float
+    message: str
+    result: dict[str, Any] | None
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+
+class JobsRes(BaseModel):
+    jobs: list[JobRes]
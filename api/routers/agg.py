@@ -1,16 +1,27 @@
+import tempfile
 from pathlib import Path
+from typing import Literal
 
 import polars as pl
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, PositiveInt
 
-from api.libs import agg
+from api.libs import agg, jobs
+from api.models.jobs import JobSubmitRes
+from api.routers.common import frame_cache, job_manager
+from api.tasks.pool import compute_executor, offload
 
 
 class AggMain(BaseModel):
     files: list[str]
     filename: str
     overwrite: bool = False
+    incremental: bool = False
+    streaming: bool = False
+    compression: Literal[
+        "lz4", "uncompressed", "snappy", "gzip", "lzo", "brotli", "zstd"
+    ] = "zstd"
+    row_group_size: PositiveInt | None = None
 
 
 class AggMainRes(BaseModel):
@@ -21,7 +32,18 @@ router = APIRouter(prefix="/agg", tags=["agg"])
 
 
 @router.post("", response_model=AggMainRes)
+@offload(compute_executor)
 def agg_main(body: AggMain) -> AggMainRes:
+    return run_agg(body)
+
+
+@router.post("/jobs", response_model=JobSubmitRes)
+def agg_main_job(body: AggMain) -> JobSubmitRes:
+    job = job_manager.submit("agg", run_agg, body)
+    return JobSubmitRes(job_id=job.id)
+
+
+def run_agg(body: AggMain) -> AggMainRes:
     for file in body.files:
         if not Path(file).exists():
             raise HTTPException(
@@ -30,19 +52,106 @@ def agg_main(body: AggMain) -> AggMainRes:
     output_dir = Path("out")
     output_dir.mkdir(exist_ok=True)
     output_path = output_dir / f"{body.filename}.parquet"
-    if not body.overwrite and output_path.exists():
+    manifest_path = output_dir / f"{body.filename}.manifest.json"
+    # 以前の差分集計で作成した出力のみ、上書きの指定無しで更新できる
+    updatable = body.incremental and manifest_path.exists()
+    if not body.overwrite and not updatable and output_path.exists():
         raise HTTPException(
             status_code=400, detail=f"file {output_path} already exists"
         )
-    df = (
-        pl.scan_csv(body.files, infer_schema_length=0)
-        .pipe(agg.fill_date)
-        .pipe(agg.convert_number)
-        .pipe(agg.convert_date)
-        .pipe(agg.convert_coord, col="lat", dtype=pl.Int8)
-        .pipe(agg.convert_coord, col="lon", dtype=pl.Int16)
-        .pipe(agg.sort)
-        .collect()
-    )
-    df.write_parquet(output_path)
+    files = [Path(file) for file in body.files]
+    jobs.progress(0.1, "converting")
+    # 既存の出力を読みながら書き込めるよう、一時ファイルへ書いてから置き換える
+    tmp_path = output_path.with_suffix(".parquet.tmp")
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        if body.incremental:
+            df, current = agg_incremental(
+                files,
+                output_path,
+                manifest_path,
+                output_dir / ".cache" / "agg" / body.filename,
+            )
+        elif body.streaming:
+            # 日付の前方補完はストリーミングできないため、ファイルごとに変換
+            df = pl.concat(
+                [
+                    convert_file(file, Path(tmp_dir) / f"{i}.parquet")
+                    for i, file in enumerate(files)
+                ]
+            ).pipe(agg.sort)
+        else:
+            df = pl.scan_csv(files, infer_schema_length=0).pipe(agg.convert)
+        jobs.progress(0.3, "writing")
+        write_parquet(df, tmp_path, body)
+    tmp_path.replace(output_path)
+    frame_cache.invalidate(output_path)
+    if body.incremental:
+        agg.save_manifest(manifest_path, current)
+    else:
+        # 一覧が出力と一致しなくなるため削除する
+        manifest_path.unlink(missing_ok=True)
     return AggMainRes(output=str(output_path))
+
+
+def write_parquet(df: pl.LazyFrame, path: Path, body: AggMain) -> None:
+    if body.streaming:
+        df.sink_parquet(
+            path,
+            compression=body.compression,
+            row_group_size=body.row_group_size,
+        )
+    else:
+        df.collect().write_parquet(
+            path,
+            compression=body.compression,
+            row_group_size=body.row_group_size,
+        )
+
+
+def convert_file(path: Path, part_path: Path) -> pl.LazyFrame:
+    pl.scan_csv(path, infer_schema_length=0).pipe(
+        agg.convert
+    ).collect().write_parquet(part_path)
+    return pl.scan_parquet(part_path)
+
+
+def agg_incremental(
+    files: list[Path], output_path: Path, manifest_path: Path, parts_dir: Path
+) -> tuple[pl.LazyFrame, list[agg.SourceFile]]:
+    previous = agg.load_manifest(manifest_path)
+    previous_by_path = {file.path: file for file in previous}
+    current = [
+        agg.fingerprint_file(file, previous_by_path.get(str(file)))
+        for file in files
+    ]
+
+    # 新規または変更されたファイルのみ変換して保存する
+    parts_dir.mkdir(exist_ok=True, parents=True)
+    for file in current:
+        part_path = parts_dir / f"{file.digest}.parquet"
+        if not part_path.exists():
+            convert_file(Path(file.path), part_path)
+    digests = {file.digest for file in current}
+    for part_path in parts_dir.glob("*.parquet"):
+        if part_path.stem not in digests:
+            part_path.unlink()
+
+    if (
+        previous
+        and output_path.exists()
+        and agg.is_appended(previous, current)
+    ):
+        # 追加されたファイルのみ既存の出力へ併合する
+        sources = [
+            pl.scan_parquet(output_path),
+            *(
+                pl.scan_parquet(parts_dir / f"{file.digest}.parquet")
+                for file in current[len(previous) :]
+            ),
+        ]
+    else:
+        sources = [
+            pl.scan_parquet(parts_dir / f"{file.digest}.parquet")
+            for file in current
+        ]
+    return pl.concat(sources).pipe(agg.sort), current
@@ -3,7 +3,6 @@ import shutil
 from datetime import date
 from pathlib import Path
 
-import numpy as np
 import polars as pl
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
@@ -14,10 +13,15 @@ from api.libs import (
     butterfly_fromtext,
     butterfly_image,
     butterfly_merge,
+    butterfly_store,
     butterfly_trim,
+    jobs,
 )
+from api.models.jobs import JobSubmitRes
+from api.routers.common import frame_cache, job_manager
 from api.routers.config.butterfly import router as router_config
 from api.routers.draw.butterfly import router as router_draw
+from api.tasks.pool import compute_executor, offload
 
 
 class ButterflyAgg(BaseModel):
@@ -26,11 +30,23 @@ class ButterflyAgg(BaseModel):
     overwrite: bool = False
 
 
+class ButterflyAggLevels(ButterflyAgg):
+    intervals: list[str] = []
+
+
 class ButterflyAggRes(BaseModel):
     output_data: str
     output_info: str
 
 
+class ButterflyAggLevel(ButterflyAggRes):
+    interval: str
+
+
+class ButterflyAggLevelsRes(ButterflyAggRes):
+    levels: list[ButterflyAggLevel] = []
+
+
 class ButterflyTrim(BaseModel):
     input_name: str
     output_name: str
@@ -46,9 +62,19 @@ class ButterflyTrimRes(BaseModel):
     output_info: str
 
 
+class ButterflyTrimImage(ButterflyTrim):
+    format: butterfly_store.ImageFormat | None = None
+
+
+class ButterflyTrimImageRes(BaseModel):
+    output_info: str
+    output_image: str
+
+
 class ButterflyImage(BaseModel):
     input_name: str
     overwrite: bool = False
+    format: butterfly_store.ImageFormat = "npz"
 
 
 class ButterflyImageRes(BaseModel):
@@ -60,6 +86,7 @@ class ButterflyImageColor(BaseModel):
     colors_name: str
     output_name: str
     overwrite: bool = False
+    format: butterfly_store.ArrayFormat = "npz"
 
 
 class ButterflyImageColorRes(BaseModel):
@@ -71,6 +98,7 @@ class ButterflyMerge(BaseModel):
     input_names: list[str]
     output_name: str
     overwrite: bool = False
+    format: butterfly_store.ArrayFormat = "npz"
 
 
 class ButterflyMergeRes(BaseModel):
@@ -83,43 +111,100 @@ router.include_router(router_config)
 router.include_router(router_draw)
 
 
-@router.post("/agg", response_model=ButterflyAggRes)
-def butterfly_agg(body: ButterflyAgg) -> ButterflyAggRes:
+@router.post("/agg", response_model=ButterflyAggLevelsRes)
+@offload(compute_executor)
+def butterfly_agg(body: ButterflyAggLevels) -> ButterflyAggLevelsRes:
     input_path = Path(body.input_name)
     if not input_path.exists():
         raise HTTPException(
             status_code=404, detail=f"file {input_path} not found"
         )
+    base = butterfly.DateDelta(months=1)
+    try:
+        intervals = [
+            butterfly.DateDelta.fromisoformat(interval)
+            for interval in body.intervals
+        ]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    # 基本の期間は従来通りの名前で、他の期間は期間を付けた名前で保存する
+    names = {base: body.output_name} | {
+        delta: f"{body.output_name}_{delta.isoformat()}"
+        for delta in intervals
+        if delta != base
+    }
     output_dir = Path("out/butterfly")
     output_dir.mkdir(exist_ok=True, parents=True)
     output_paths = {
-        "data": output_dir / f"{body.output_name}.parquet",
-        "info": output_dir / f"{body.output_name}.json",
+        delta: {
+            "data": output_dir / f"{name}.parquet",
+            "info": output_dir / f"{name}.json",
+        }
+        for delta, name in names.items()
     }
-    for path in output_paths.values():
-        if not body.overwrite and path.exists():
-            raise HTTPException(
-                status_code=400, detail=f"file {path} already exists"
-            )
+    for paths in output_paths.values():
+        for path in paths.values():
+            if not body.overwrite and path.exists():
+                raise HTTPException(
+                    status_code=400, detail=f"file {path} already exists"
+                )
     data = pl.scan_parquet(input_path)
-    start, end = butterfly.adjust_dates(*butterfly.calc_date_limit(data))
+    limit = butterfly.calc_date_limit(data)
     try:
-        info = butterfly.ButterflyInfo(
-            -90, 90, start, end, butterfly.DateDelta(months=1)
-        )
+        # 月より細かい期間が最後の月の途中で切れないよう、期間ごとに合わせる
+        infos = {
+            delta: butterfly.ButterflyInfo(
+                -90,
+                90,
+                *(
+                    butterfly.adjust_dates(*limit)
+                    if delta == base
+                    else butterfly.align_dates(*limit, delta)
+                ),
+                delta,
+            )
+            for delta in names
+        }
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
-    with (output_paths["info"]).open("w") as f_info:
-        f_info.write(info.to_json())
-    df = butterfly.calc_lat(data, info)
-    df.write_parquet(output_paths["data"])
-    return ButterflyAggRes(
-        output_data=str(output_paths["data"]),
-        output_info=str(output_paths["info"]),
+    levels = butterfly.agg_lat_levels(data, list(names))
+    for delta, info in infos.items():
+        with output_paths[delta]["info"].open("w") as f_info:
+            f_info.write(info.to_json())
+        df = butterfly.fill_lat(
+            levels[delta].lazy(),
+            info.date_start,
+            info.date_end,
+            delta.to_interval(),
+        ).collect()
+        butterfly.write_lat(df, output_paths[delta]["data"], info)
+        frame_cache.invalidate(output_paths[delta]["data"])
+    return ButterflyAggLevelsRes(
+        output_data=str(output_paths[base]["data"]),
+        output_info=str(output_paths[base]["info"]),
+        levels=[
+            ButterflyAggLevel(
+                interval=delta.isoformat(),
+                output_data=str(paths["data"]),
+                output_info=str(paths["info"]),
+            )
+            for delta, paths in output_paths.items()
+            if delta != base
+        ],
     )
 
 
+def check_image_overwrite(stem: Path, *, overwrite: bool) -> None:
+    # 保存時に他の形式の画像も削除するため、いずれかの形式があれば上書きになる
+    img_path = butterfly_store.find_image(stem)
+    if not overwrite and img_path is not None:
+        raise HTTPException(
+            status_code=400, detail=f"file {img_path} already exists"
+        )
+
+
 @router.post("/fromtext", response_model=ButterflyAggRes)
+@offload(compute_executor)
 def fromtext(body: ButterflyAgg) -> ButterflyAggRes:
     input_path = Path(body.input_name)
     if not input_path.exists():
@@ -148,7 +233,8 @@ def fromtext(body: ButterflyAgg) -> ButterflyAggRes:
     with (output_paths["info"]).open("w") as f_info:
         f_info.write(info.to_json())
     df = butterfly.calc_lat(lf, info)
-    df.write_parquet(output_paths["data"])
+    butterfly.write_lat(df, output_paths["data"], info)
+    frame_cache.invalidate(output_paths["data"])
     return ButterflyAggRes(
         output_data=str(output_paths["data"]),
         output_info=str(output_paths["info"]),
@@ -156,6 +242,7 @@ def fromtext(body: ButterflyAgg) -> ButterflyAggRes:
 
 
 @router.post("/trim", response_model=ButterflyTrimRes)
+@offload(compute_executor)
 def trim_butterfly(body: ButterflyTrim) -> ButterflyTrimRes:
     data_path = Path(body.input_name).with_suffix(".parquet")
     if not data_path.exists():
@@ -188,7 +275,7 @@ def trim_butterfly(body: ButterflyTrim) -> ButterflyTrimRes:
         if body.date_end is not None
         else None
     )
-    data = pl.read_parquet(data_path)
+    data = frame_cache.scan_parquet(data_path)
     with info_path.open("r") as f_info:
         info = butterfly.ButterflyInfo.from_dict(json.load(f_info))
     try:
@@ -200,14 +287,77 @@ def trim_butterfly(body: ButterflyTrim) -> ButterflyTrimRes:
     with (output_paths["info"]).open("w") as f_info:
         f_info.write(trimmed_info.to_json())
     trimmed_data = butterfly_trim.trim_data(data, trimmed_info)
-    trimmed_data.write_parquet(output_paths["data"])
+    butterfly.write_lat(trimmed_data, output_paths["data"], trimmed_info)
+    frame_cache.invalidate(output_paths["data"])
     return ButterflyTrimRes(
         output_data=str(output_paths["data"]),
         output_info=str(output_paths["info"]),
     )
 
 
+@router.post("/trim_image", response_model=ButterflyTrimImageRes)
+@offload(compute_executor)
+def trim_image(body: ButterflyTrimImage) -> ButterflyTrimImageRes:
+    info_path = Path(body.input_name).with_suffix(".json")
+    if not info_path.exists():
+        raise HTTPException(
+            status_code=404, detail=f"file {info_path} not found"
+        )
+    img_path = butterfly_store.find_image(info_path.with_suffix(""))
+    if img_path is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"image {info_path.with_suffix('')} not found",
+        )
+    # 指定が無ければ元の画像と同じ形式で保存する
+    fmt = body.format or butterfly_store.image_format(img_path)
+    output_dir = Path("out/butterfly")
+    output_dir.mkdir(exist_ok=True, parents=True)
+    output_paths = {
+        "info": output_dir / f"{body.output_name}.json",
+        "img": butterfly_store.image_path(output_dir / body.output_name, fmt),
+    }
+    if not body.overwrite and output_paths["info"].exists():
+        raise HTTPException(
+            status_code=400,
+            detail=f"file {output_paths['info']} already exists",
+        )
+    check_image_overwrite(
+        output_paths["img"].with_suffix(""), overwrite=body.overwrite
+    )
+    date_start = (
+        date.fromisoformat(body.date_start)
+        if body.date_start is not None
+        else None
+    )
+    date_end = (
+        date.fromisoformat(body.date_end)
+        if body.date_end is not None
+        else None
+    )
+    with info_path.open("r") as f_info:
+        info = butterfly.ButterflyInfo.from_dict(json.load(f_info))
+    img = butterfly_store.load_image(img_path)
+    try:
+        trimmed_info = butterfly_trim.trim_info(
+            info, body.lat_min, body.lat_max, date_start, date_end
+        )
+        trimmed_img = butterfly_trim.trim_image(img, info, trimmed_info)
+        butterfly_store.save_image(
+            output_paths["img"].with_suffix(""), trimmed_img, fmt
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    with output_paths["info"].open("w") as f_info:
+        f_info.write(trimmed_info.to_json())
+    return ButterflyTrimImageRes(
+        output_info=str(output_paths["info"]),
+        output_image=str(output_paths["img"]),
+    )
+
+
 @router.post("/image", response_model=ButterflyImageRes)
+@offload(compute_executor)
 def butterfly_img(body: ButterflyImage) -> ButterflyImageRes:
     data_path = Path(body.input_name).with_suffix(".parquet")
     if not data_path.exists():
@@ -219,31 +369,30 @@ def butterfly_img(body: ButterflyImage) -> ButterflyImageRes:
         raise HTTPException(
             status_code=404, detail=f"file {info_path} not found"
         )
-    output_path = Path("out/butterfly") / f"{data_path.stem}.npz"
-    if not body.overwrite and output_path.exists():
-        raise HTTPException(
-            status_code=400, detail=f"file {output_path} already exists"
-        )
-    df = pl.read_parquet(data_path)
+    output_stem = Path("out/butterfly") / data_path.stem
+    output_path = butterfly_store.image_path(output_stem, body.format)
+    check_image_overwrite(output_stem, overwrite=body.overwrite)
+    df = frame_cache.read_parquet(data_path)
     with info_path.open("r") as f_info:
         info = butterfly.ButterflyInfo.from_dict(json.load(f_info))
     img = butterfly_image.create_image(df, info)
-    with output_path.open("wb") as f_img:
-        np.savez_compressed(f_img, img=img)
+    butterfly_store.save_image(output_stem, img, body.format)
     return ButterflyImageRes(output_image=str(output_path))
 
 
 @router.post("/image_color", response_model=ButterflyImageColorRes)
+@offload(compute_executor)
 def image_color(body: ButterflyImageColor) -> ButterflyImageColorRes:
     info_path = Path(body.input_name).with_suffix(".json")
     if not info_path.exists():
         raise HTTPException(
             status_code=404, detail=f"file {info_path} not found"
         )
-    img_path = info_path.with_suffix(".npz")
-    if not img_path.exists():
+    img_path = butterfly_store.find_image(info_path.with_suffix(""))
+    if img_path is None:
         raise HTTPException(
-            status_code=404, detail=f"file {img_path} not found"
+            status_code=404,
+            detail=f"image {info_path.with_suffix('')} not found",
         )
     colors_path = Path(body.colors_name)
     if not colors_path.exists():
@@ -254,20 +403,24 @@ def image_color(body: ButterflyImageColor) -> ButterflyImageColorRes:
     output_dir.mkdir(exist_ok=True, parents=True)
     output_paths = {
         "info": output_dir / f"{body.output_name}.json",
-        "img": output_dir / f"{body.output_name}.npz",
+        "img": butterfly_store.image_path(
+            output_dir / body.output_name, body.format
+        ),
     }
-    for path in output_paths.values():
-        if not body.overwrite and path.exists():
-            raise HTTPException(
-                status_code=400, detail=f"file {path} already exists"
-            )
-    with np.load(img_path) as f_img:
-        img = f_img["img"]
+    if not body.overwrite and output_paths["info"].exists():
+        raise HTTPException(
+            status_code=400,
+            detail=f"file {output_paths['info']} already exists",
+        )
+    check_image_overwrite(
+        output_paths["img"].with_suffix(""), overwrite=body.overwrite
+    )
+    img = butterfly_store.load_image(img_path)
     with colors_path.open("r") as f_cmap:
         cmap = butterfly_config.ColorMap(**json.load(f_cmap))
-    img_color = butterfly_merge.create_color_image(img, cmap)
-    with output_paths["img"].open("wb") as f_img_color:
-        np.savez_compressed(f_img_color, img=img_color)
+    butterfly_store.save_color_image(
+        output_paths["img"].with_suffix(""), img, cmap, body.format
+    )
     shutil.copy(info_path, output_paths["info"])
     return ButterflyImageColorRes(
         output_info=str(output_paths["info"]),
@@ -276,7 +429,18 @@ def image_color(body: ButterflyImageColor) -> ButterflyImageColorRes:
 
 
 @router.post("/merge", response_model=ButterflyMergeRes)
+@offload(compute_executor)
 def merge(body: ButterflyMerge) -> ButterflyMergeRes:
+    return run_merge(body)
+
+
+@router.post("/merge/jobs", response_model=JobSubmitRes)
+def merge_job(body: ButterflyMerge) -> JobSubmitRes:
+    job = job_manager.submit("butterfly_merge", run_merge, body)
+    return JobSubmitRes(job_id=job.id)
+
+
+def run_merge(body: ButterflyMerge) -> ButterflyMergeRes:
     data_paths = [
         Path(name).with_suffix(".parquet") for name in body.input_names
     ]
@@ -290,13 +454,18 @@ def merge(body: ButterflyMerge) -> ButterflyMergeRes:
     output_dir.mkdir(exist_ok=True, parents=True)
     output_paths = {
         "info": output_dir / f"{body.output_name}.json",
-        "img": output_dir / f"{body.output_name}.npz",
+        "img": butterfly_store.image_path(
+            output_dir / body.output_name, body.format
+        ),
     }
-    for path in output_paths.values():
-        if not body.overwrite and path.exists():
-            raise HTTPException(
-                status_code=400, detail=f"file {path} already exists"
-            )
+    if not body.overwrite and output_paths["info"].exists():
+        raise HTTPException(
+            status_code=400,
+            detail=f"file {output_paths['info']} already exists",
+        )
+    check_image_overwrite(
+        output_paths["img"].with_suffix(""), overwrite=body.overwrite
+    )
     info_list: list[butterfly.ButterflyInfo] = []
     for path in info_paths:
         with path.open("r") as f_info:
@@ -304,12 +473,16 @@ def merge(body: ButterflyMerge) -> ButterflyMergeRes:
                 butterfly.ButterflyInfo.from_dict(json.load(f_info))
             )
     info = butterfly_merge.merge_info(info_list)
-    dfl = [pl.read_parquet(path) for path in data_paths]
+    jobs.progress(0.1, "loading")
+    dfl = [frame_cache.read_parquet(path) for path in data_paths]
+    jobs.progress(0.3, "merging")
     img = butterfly_merge.create_merged_image(dfl, info)
+    jobs.progress(0.8, "writing")
     with output_paths["info"].open("w") as f_info:
         f_info.write(info.to_json())
-    with output_paths["img"].open("wb") as f_img:
-        np.savez_compressed(f_img, img=img)
+    butterfly_store.save_image(
+        output_paths["img"].with_suffix(""), img, body.format
+    )
     return ButterflyMergeRes(
         output_info=str(output_paths["info"]),
         output_img=str(output_paths["img"]),
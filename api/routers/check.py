@@ -1,12 +1,15 @@
+from datetime import date
+from functools import partial
 from pathlib import Path
 from typing import Literal, TypeAlias
 
-import nkf
 import polars as pl
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
 from api.libs import check_data, check_file, finder
+from api.routers.common import frame_cache
+from api.tasks.pool import check_pool, compute_executor, io_executor, offload
 
 
 class CheckFileErrorHeader(BaseModel):
@@ -26,8 +29,16 @@ class CheckFileErrorField(BaseModel):
     fields: list[str]
 
 
+class CheckFileErrorRead(BaseModel):
+    type: Literal["read"]
+    message: str
+
+
 CheckFileError: TypeAlias = (
-    CheckFileErrorHeader | CheckFileErrorRow | CheckFileErrorField
+    CheckFileErrorHeader
+    | CheckFileErrorRow
+    | CheckFileErrorField
+    | CheckFileErrorRead
 )
 
 
@@ -39,6 +50,20 @@ class CheckFileRes(BaseModel):
     errors: list[CheckFileError]
 
 
+class CheckFilesQuery(BaseModel):
+    path: str
+    glob: str = "*.csv"
+
+
+class CheckFilesResult(BaseModel):
+    path: str
+    errors: list[CheckFileError]
+
+
+class CheckFilesRes(BaseModel):
+    results: list[CheckFilesResult]
+
+
 class CheckDataGroupNumberQuery(BaseModel):
     input: str
 
@@ -100,30 +125,44 @@ class CheckDataLonIntervalRes(BaseModel):
     interval: list[int]
 
 
+class CheckDataReportQuery(BaseModel):
+    input: str
+    lat_threshold: int
+    lon_min_threshold: int
+    lon_max_threshold: int
+    lat_interval: int
+    lon_interval: int
+
+
+class CheckDataReportRes(BaseModel):
+    group_number: CheckDataGroupNumberRes
+    lat_range: CheckDataLatRangeRes
+    lon_range: CheckDataLonRangeRes
+    lat_interval: CheckDataLatIntervalRes
+    lon_interval: CheckDataLonIntervalRes
+
+
 class FinderQuery(BaseModel):
     year: int
     month: int
     day: int
 
 
+class FinderRangeQuery(BaseModel):
+    start: date
+    end: date
+
+
 class FinderRes(BaseModel):
     result: list[finder.FinderResult]
 
 
 router = APIRouter(prefix="/check", tags=["check"])
 
+finder_index = finder.FinderIndex(Path("data"), Path("out/.cache/finder.json"))
 
-@router.get("/file", response_model=CheckFileRes)
-def validate_file(query: CheckFileQuery = Depends()) -> CheckFileRes:
-    input_path = Path(query.input)
-    if not input_path.exists():
-        raise HTTPException(
-            status_code=404, detail=f"file {input_path} not found"
-        )
-    with input_path.open("rb") as fb:
-        encoding = nkf.guess(fb.read()).lower()
-    with input_path.open("r", encoding=encoding) as f:
-        ret = check_file.validate_file(f)
+
+def to_errors(ret: list[dict]) -> list[CheckFileError]:
     errors: list[CheckFileError] = []
     for err in ret:
         match err["type"]:
@@ -133,10 +172,83 @@ def validate_file(query: CheckFileQuery = Depends()) -> CheckFileRes:
                 errors.append(CheckFileErrorRow(**err))
             case "field":
                 errors.append(CheckFileErrorField(**err))
-    return CheckFileRes(errors=errors)
+    return errors
+
+
+def to_dict(df: pl.DataFrame, *columns: str) -> dict[str, list]:
+    by = ["date", "no"] if "no" in columns else ["date"]
+    return (
+        df.select("date", *columns)
+        .sort(by)
+        .with_columns(pl.col("date").dt.to_string("%Y-%m-%d"))
+        .to_dict(as_series=False)
+    )
+
+
+def to_group_number_res(df: pl.DataFrame) -> CheckDataGroupNumberRes:
+    return CheckDataGroupNumberRes(**to_dict(df, "original", "expected"))
+
+
+def to_lat_range_res(df: pl.DataFrame) -> CheckDataLatRangeRes:
+    return CheckDataLatRangeRes(**to_dict(df, "no", "lat_min", "lat_max"))
+
+
+def to_lon_range_res(df: pl.DataFrame) -> CheckDataLonRangeRes:
+    return CheckDataLonRangeRes(**to_dict(df, "no", "lon_min", "lon_max"))
+
+
+def to_lat_interval_res(df: pl.DataFrame) -> CheckDataLatIntervalRes:
+    return CheckDataLatIntervalRes(
+        **to_dict(df, "no", "lat_min", "lat_max", "interval")
+    )
+
+
+def to_lon_interval_res(df: pl.DataFrame) -> CheckDataLonIntervalRes:
+    return CheckDataLonIntervalRes(
+        **to_dict(df, "no", "lon_min", "lon_max", "interval")
+    )
+
+
+@router.get("/file", response_model=CheckFileRes)
+@offload(compute_executor)
+def validate_file(query: CheckFileQuery = Depends()) -> CheckFileRes:
+    input_path = Path(query.input)
+    if not input_path.exists():
+        raise HTTPException(
+            status_code=404, detail=f"file {input_path} not found"
+        )
+    return CheckFileRes(errors=to_errors(check_file.validate_path(input_path)))
+
+
+@router.get("/files", response_model=CheckFilesRes)
+@offload(io_executor)
+def validate_files(query: CheckFilesQuery = Depends()) -> CheckFilesRes:
+    input_dir = Path(query.path)
+    if not input_dir.is_dir():
+        raise HTTPException(
+            status_code=404, detail=f"directory {input_dir} not found"
+        )
+    input_paths = sorted(
+        path for path in input_dir.glob(query.glob) if path.is_file()
+    )
+    # ファイルごとに並列で検査する
+    futures = [
+        check_pool.submit(check_file.validate_path, path)
+        for path in input_paths
+    ]
+    results: list[CheckFilesResult] = []
+    for path, future in zip(input_paths, futures, strict=True):
+        try:
+            errors = to_errors(future.result())
+        except Exception as e:  # noqa: BLE001
+            # 読み込めないファイルは、そのファイルのみの誤りとして返す
+            errors = [CheckFileErrorRead(type="read", message=str(e))]
+        results.append(CheckFilesResult(path=str(path), errors=errors))
+    return CheckFilesRes(results=results)
 
 
 @router.get("/data/group_number", response_model=CheckDataGroupNumberRes)
+@offload(compute_executor)
 def invalid_group_number(
     query: CheckDataGroupNumberQuery = Depends(),
 ) -> CheckDataGroupNumberRes:
@@ -145,16 +257,13 @@ def invalid_group_number(
         raise HTTPException(
             status_code=404, detail=f"file {input_path} not found"
         )
-    file = pl.read_parquet(input_path)
+    file = frame_cache.read_parquet(input_path)
     df = check_data.find_invalid_group_number(file)
-    df = df.sort("date").with_columns(pl.col("date").dt.to_string("%Y-%m-%d"))
-    data = df.to_dict(as_series=False)
-    return CheckDataGroupNumberRes(
-        date=data["date"], original=data["original"], expected=data["expected"]
-    )
+    return to_group_number_res(df)
 
 
 @router.get("/data/lat_range", response_model=CheckDataLatRangeRes)
+@offload(compute_executor)
 def invalid_lat_range(
     query: CheckDataLatRangeQuery = Depends(),
 ) -> CheckDataLatRangeRes:
@@ -163,23 +272,13 @@ def invalid_lat_range(
         raise HTTPException(
             status_code=404, detail=f"file {input_path} not found"
         )
-    file = pl.read_parquet(input_path)
+    file = frame_cache.read_parquet(input_path)
     df = check_data.find_invalid_lat_range(file, query.threshold)
-    df = (
-        df.select("date", "no", "lat_min", "lat_max")
-        .sort("date", "no")
-        .with_columns(pl.col("date").dt.to_string("%Y-%m-%d"))
-    )
-    data = df.to_dict(as_series=False)
-    return CheckDataLatRangeRes(
-        date=data["date"],
-        no=data["no"],
-        lat_min=data["lat_min"],
-        lat_max=data["lat_max"],
-    )
+    return to_lat_range_res(df)
 
 
 @router.get("/data/lon_range", response_model=CheckDataLonRangeRes)
+@offload(compute_executor)
 def invalid_lon_range(
     query: CheckDataLonRangeQuery = Depends(),
 ) -> CheckDataLonRangeRes:
@@ -188,25 +287,15 @@ def invalid_lon_range(
         raise HTTPException(
             status_code=404, detail=f"file {input_path} not found"
         )
-    file = pl.read_parquet(input_path)
+    file = frame_cache.read_parquet(input_path)
     df = check_data.find_invalid_lon_range(
         file, query.min_threshold, query.max_threshold
     )
-    df = (
-        df.select("date", "no", "lon_min", "lon_max")
-        .sort("date", "no")
-        .with_columns(pl.col("date").dt.to_string("%Y-%m-%d"))
-    )
-    data = df.to_dict(as_series=False)
-    return CheckDataLonRangeRes(
-        date=data["date"],
-        no=data["no"],
-        lon_min=data["lon_min"],
-        lon_max=data["lon_max"],
-    )
+    return to_lon_range_res(df)
 
 
 @router.get("/data/lat_interval", response_model=CheckDataLatIntervalRes)
+@offload(compute_executor)
 def invalid_lat_interval(
     query: CheckDataLatIntervalQuery = Depends(),
 ) -> CheckDataLatIntervalRes:
@@ -215,24 +304,13 @@ def invalid_lat_interval(
         raise HTTPException(
             status_code=404, detail=f"file {input_path} not found"
         )
-    file = pl.read_parquet(input_path)
+    file = frame_cache.read_parquet(input_path)
     df = check_data.find_invalid_lat_interval(file, query.interval)
-    df = (
-        df.select("date", "no", "lat_min", "lat_max", "interval")
-        .sort("date", "no")
-        .with_columns(pl.col("date").dt.to_string("%Y-%m-%d"))
-    )
-    data = df.to_dict(as_series=False)
-    return CheckDataLatIntervalRes(
-        date=data["date"],
-        no=data["no"],
-        lat_min=data["lat_min"],
-        lat_max=data["lat_max"],
-        interval=data["interval"],
-    )
+    return to_lat_interval_res(df)
 
 
 @router.get("/data/lon_interval", response_model=CheckDataLonIntervalRes)
+@offload(compute_executor)
 def invalid_lon_interval(
     query: CheckDataLonIntervalQuery = Depends(),
 ) -> CheckDataLonIntervalRes:
@@ -241,25 +319,69 @@ def invalid_lon_interval(
         raise HTTPException(
             status_code=404, detail=f"file {input_path} not found"
         )
-    file = pl.read_parquet(input_path)
+    file = frame_cache.read_parquet(input_path)
     df = check_data.find_invalid_lon_interval(file, query.interval)
-    df = (
-        df.select("date", "no", "lon_min", "lon_max", "interval")
-        .sort("date", "no")
-        .with_columns(pl.col("date").dt.to_string("%Y-%m-%d"))
+    return to_lon_interval_res(df)
+
+
+@router.get("/data/report", response_model=CheckDataReportRes)
+@offload(compute_executor)
+def invalid_report(
+    query: CheckDataReportQuery = Depends(),
+) -> CheckDataReportRes:
+    input_path = Path(query.input)
+    if not input_path.exists():
+        raise HTTPException(
+            status_code=404, detail=f"file {input_path} not found"
+        )
+    # 一度の読み込みで全ての検査を行う
+    file = frame_cache.read_parquet(input_path)
+    group_number, lat_range, lon_range, lat_interval, lon_interval = (
+        check_data.find_invalid_all(
+            file,
+            [
+                check_data.find_invalid_group_number,
+                partial(
+                    check_data.find_invalid_lat_range,
+                    threshold=query.lat_threshold,
+                ),
+                partial(
+                    check_data.find_invalid_lon_range,
+                    min_threshold=query.lon_min_threshold,
+                    max_threshold=query.lon_max_threshold,
+                ),
+                partial(
+                    check_data.find_invalid_lat_interval,
+                    interval=query.lat_interval,
+                ),
+                partial(
+                    check_data.find_invalid_lon_interval,
+                    interval=query.lon_interval,
+                ),
+            ],
+        )
     )
-    data = df.to_dict(as_series=False)
-    return CheckDataLonIntervalRes(
-        date=data["date"],
-        no=data["no"],
-        lon_min=data["lon_min"],
-        lon_max=data["lon_max"],
-        interval=data["interval"],
+    return CheckDataReportRes(
+        group_number=to_group_number_res(group_number),
+        lat_range=to_lat_range_res(lat_range),
+        lon_range=to_lon_range_res(lon_range),
+        lat_interval=to_lat_interval_res(lat_interval),
+        lon_interval=to_lon_interval_res(lon_interval),
     )
 
 
 @router.get("/finder", response_model=FinderRes)
 def check_finder(query: FinderQuery = Depends()) -> FinderRes:
-    search_path = Path("data")
-    result = finder.finder(search_path, query.year, query.month, query.day)
+    result = finder_index.find(query.year, query.month, query.day)
+    return FinderRes(result=result)
+
+
+@router.get("/finder/range", response_model=FinderRes)
+def check_finder_range(query: FinderRangeQuery = Depends()) -> FinderRes:
+    if query.start > query.end:
+        raise HTTPException(
+            status_code=400,
+            detail=f"start {query.start} is later than end {query.end}",
+        )
+    result = finder_index.find_range(query.start, query.end)
     return FinderRes(result=result)
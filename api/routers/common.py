@@ -0,0 +1,12 @@
+import os
+
+from api.libs.cache import FrameCache
+from api.libs.jobs import JobManager
+
+# 全てのルーターで共有し、同じファイルを何度も読み込まないようにする
+frame_cache = FrameCache(
+    int(os.environ.get("FRAME_CACHE_BYTES", str(512 * 1024**2)))
+)
+
+# 集計などの時間のかかる処理をリクエストから切り離して実行する
+job_manager = JobManager(int(os.environ.get("JOB_WORKERS", "1")))
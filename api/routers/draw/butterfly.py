@@ -1,19 +1,70 @@
-import multiprocessing as mp
-import tempfile
-from base64 import b64encode
+import json
+import os
+from datetime import date
 from pathlib import Path
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+import matplotlib as mpl
+import numpy.typing as npt
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic import BaseModel
 
+from api.libs import butterfly, butterfly_store, butterfly_tile
 from api.libs.butterfly_config import ButterflyDiagram
+from api.libs.cache import MemoryCache, create_key, fingerprint
 from api.models.draw import PreviewQuery, PreviewRes, SaveBody, SaveRes
+from api.routers.draw.common import match_etag, preview, render
 from api.tasks import butterfly as task_butterfly
+from api.tasks.pool import compute_executor, io_executor, offload
+
+
+class TileQuery(BaseModel):
+    filename: str
+    cmap: str = "binary"
+
+
+class TileInfoQuery(BaseModel):
+    filename: str
+
+
+class TileInfoRes(BaseModel):
+    tile_size: int
+    max_zoom: int
+    width: int
+    height: int
+    lat_min: int
+    lat_max: int
+    date_start: date
+    date_end: date
+
 
 router = APIRouter(prefix="/draw")
 
+tile_cache: MemoryCache[str, bytes] = MemoryCache(
+    int(os.environ.get("TILE_CACHE_BYTES", str(64 * 1024**2))), len
+)
+
+# タイルごとに画像を読み直さないよう、読み込んだ画像を保持する
+image_cache: MemoryCache[str, npt.NDArray[Any]] = MemoryCache(
+    int(os.environ.get("TILE_IMAGE_CACHE_BYTES", str(256 * 1024**2))),
+    lambda img: img.nbytes,
+)
+
+
+def find_image(input_path: Path) -> Path:
+    img_path = butterfly_store.find_image(input_path.with_suffix(""))
+    if img_path is None:
+        raise HTTPException(
+            status_code=404, detail=f"image {input_path} not found"
+        )
+    return img_path
+
 
 @router.get("/butterfly", response_model=PreviewRes)
-def draw_butterfly(query: PreviewQuery = Depends()) -> PreviewRes:
+@offload(io_executor)
+def draw_butterfly(
+    request: Request, query: PreviewQuery = Depends()
+) -> PreviewRes | Response:
     input_path = Path(query.filename)
     if not input_path.exists():
         raise HTTPException(
@@ -26,29 +77,26 @@ def draw_butterfly(query: PreviewQuery = Depends()) -> PreviewRes:
         )
     try:
         with config_path.open("r") as f:
-            ButterflyDiagram.model_validate_json(f.read())
+            config = ButterflyDiagram.model_validate_json(f.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    with tempfile.NamedTemporaryFile() as f_tmp:
-        ctx = mp.get_context("spawn")
-        p = ctx.Process(
-            target=task_butterfly.draw_butterfly_diagram,
-            args=(
-                str(input_path.with_suffix(".npz")),
-                str(input_path.with_suffix(".json")),
-                str(config_path),
-                f_tmp.name,
-            ),
-        )
-        p.start()
-        p.join()
-        img = b64encode(f_tmp.read()).decode()
-    return PreviewRes(img=img)
+    img_path = find_image(input_path)
+    return preview(
+        request,
+        query,
+        [img_path, input_path.with_suffix(".json")],
+        config,
+        task_butterfly.draw_butterfly_diagram,
+        str(img_path),
+        str(input_path.with_suffix(".json")),
+        str(config_path),
+    )
 
 
 @router.post("/butterfly", response_model=SaveRes)
+@offload(io_executor)
 def save_butterfly(body: SaveBody) -> SaveRes:
     input_path = Path(body.input)
     if not input_path.exists():
@@ -67,22 +115,86 @@ def save_butterfly(body: SaveBody) -> SaveRes:
         )
     try:
         with config_path.open("r") as f:
-            ButterflyDiagram.model_validate_json(f.read())
+            config = ButterflyDiagram.model_validate_json(f.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    ctx = mp.get_context("spawn")
-    p = ctx.Process(
-        target=task_butterfly.draw_butterfly_diagram,
-        args=(
-            str(input_path.with_suffix(".npz")),
-            str(input_path.with_suffix(".json")),
-            str(config_path),
-            str(output_path),
-        ),
-        kwargs={"fmt": body.format, "dpi": body.dpi},
+    img_path = find_image(input_path)
+    img = render(
+        [img_path, input_path.with_suffix(".json")],
+        config,
+        task_butterfly.draw_butterfly_diagram,
+        str(img_path),
+        str(input_path.with_suffix(".json")),
+        str(config_path),
+        fmt=body.format,
+        dpi=body.dpi,
     )
-    p.start()
-    p.join()
+    with output_path.open("wb") as f_img:
+        f_img.write(img)
     return SaveRes(output=str(output_path))
+
+
+def load_tile_image(img_path: Path) -> npt.NDArray[Any]:
+    key = fingerprint(img_path)
+    img = image_cache.get(key)
+    if img is None:
+        img = butterfly_store.load_image(img_path)
+        image_cache.put(key, img)
+    return img
+
+
+@router.get("/butterfly/tile", response_model=TileInfoRes)
+@offload(io_executor)
+def butterfly_tile_info(query: TileInfoQuery = Depends()) -> TileInfoRes:
+    input_path = Path(query.filename)
+    img_path = find_image(input_path)
+    info_path = input_path.with_suffix(".json")
+    if not info_path.exists():
+        raise HTTPException(
+            status_code=404, detail=f"file {info_path} not found"
+        )
+    with info_path.open("r") as f_info:
+        info = butterfly.ButterflyInfo.from_dict(json.load(f_info))
+    img = load_tile_image(img_path)
+    height, width = img.shape[:2]
+    return TileInfoRes(
+        tile_size=butterfly_tile.TILE_SIZE,
+        max_zoom=butterfly_tile.calc_max_zoom(height, width),
+        width=width,
+        height=height,
+        lat_min=info.lat_min,
+        lat_max=info.lat_max,
+        date_start=info.date_start,
+        date_end=info.date_end,
+    )
+
+
+@router.get("/butterfly/tile/{zoom}/{x}/{y}")
+@offload(compute_executor)
+def butterfly_tile_png(
+    request: Request, zoom: int, x: int, y: int, query: TileQuery = Depends()
+) -> Response:
+    if query.cmap not in mpl.colormaps:
+        raise HTTPException(
+            status_code=400, detail=f"cmap {query.cmap} not found"
+        )
+    img_path = find_image(Path(query.filename))
+    # 画像が更新されると識別子が変わり、古いタイルは使われなくなる
+    key = create_key(
+        fingerprint(img_path), str(zoom), str(x), str(y), query.cmap
+    )
+    headers = {"ETag": f'"{key[:32]}"', "Cache-Control": "no-cache"}
+    if match_etag(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    tile = tile_cache.get(key)
+    if tile is None:
+        img = load_tile_image(img_path)
+        try:
+            tile_img = butterfly_tile.create_tile(img, zoom, x, y)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+        tile = butterfly_tile.tile_to_png(tile_img, query.cmap)
+        tile_cache.put(key, tile)
+    return Response(content=tile, media_type="image/png", headers=headers)
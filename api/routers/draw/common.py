@@ -0,0 +1,93 @@
+import os
+from base64 import b64encode
+from collections.abc import Callable
+from pathlib import Path
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from api.libs.cache import (
+    DiskCache,
+    MemoryCache,
+    TieredCache,
+    create_key,
+    fingerprint,
+)
+from api.models.draw import PreviewQuery, PreviewRes
+from api.tasks.pool import render_pool
+
+render_cache = TieredCache(
+    MemoryCache(
+        int(os.environ.get("RENDER_CACHE_BYTES", str(64 * 1024**2))), len
+    ),
+    DiskCache(
+        Path("out/.cache/render"),
+        int(os.environ.get("RENDER_CACHE_DISK_BYTES", str(512 * 1024**2))),
+    ),
+)
+
+# 描画処理を変更した場合は、保存済みの画像を使わないよう更新する
+RENDER_VERSION = "1"
+
+
+def create_render_key(
+    fn: Callable[..., bytes],
+    input_paths: list[Path],
+    config: BaseModel,
+    fmt: str,
+    dpi: int | None,
+) -> str:
+    return create_key(
+        RENDER_VERSION,
+        fn.__module__,
+        fn.__qualname__,
+        *(fingerprint(path) for path in input_paths),
+        config.model_dump_json(),
+        fmt,
+        str(dpi),
+    )
+
+
+def match_etag(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags or "*" in tags
+
+
+def render(
+    input_paths: list[Path],
+    config: BaseModel,
+    fn: Callable[..., bytes],
+    *args: str | None,
+    fmt: str,
+    dpi: int | None = None,
+) -> bytes:
+    key = create_render_key(fn, input_paths, config, fmt, dpi)
+    img = render_cache.get(key)
+    if img is None:
+        img = render_pool.run(fn, *args, fmt=fmt, dpi=dpi)
+        render_cache.put(key, img)
+    return img
+
+
+def preview(
+    request: Request,
+    query: PreviewQuery,
+    input_paths: list[Path],
+    config: BaseModel,
+    fn: Callable[..., bytes],
+    *args: str | None,
+) -> PreviewRes | Response:
+    if not query.binary:
+        img = render(input_paths, config, fn, *args, fmt=query.format)
+        return PreviewRes(img=b64encode(img).decode())
+    key = create_render_key(fn, input_paths, config, query.format, None)
+    headers = {"ETag": f'"{key[:32]}"', "Cache-Control": "no-cache"}
+    if match_etag(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    img = render(input_paths, config, fn, *args, fmt=query.format)
+    return Response(
+        content=img, media_type=f"image/{query.format}", headers=headers
+    )
@@ -1,21 +1,21 @@
-import multiprocessing as mp
-import tempfile
-from base64 import b64encode
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
 from api.libs.observations_config import ObservationsMonthly
 from api.models.draw import PreviewQuery, PreviewRes, SaveBody, SaveRes
+from api.routers.draw.common import preview, render
 from api.tasks import observations as task_observations
+from api.tasks.pool import io_executor, offload
 
 router = APIRouter(prefix="/draw")
 
 
 @router.get("/monthly", response_model=PreviewRes)
+@offload(io_executor)
 def observations_draw_monthly_preview(
-    query: PreviewQuery = Depends(),
-) -> PreviewRes:
+    request: Request, query: PreviewQuery = Depends()
+) -> PreviewRes | Response:
     input_path = Path(query.filename)
     if not input_path.exists():
         raise HTTPException(
@@ -28,24 +28,24 @@ def observations_draw_monthly_preview(
         )
     try:
         with config_path.open("r") as f:
-            ObservationsMonthly.model_validate_json(f.read())
+            config = ObservationsMonthly.model_validate_json(f.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    with tempfile.NamedTemporaryFile() as f_tmp:
-        ctx = mp.get_context("spawn")
-        p = ctx.Process(
-            target=task_observations.draw_monthly_obs_days,
-            args=(str(input_path), str(config_path), f_tmp.name),
-        )
-        p.start()
-        p.join()
-        img = b64encode(f_tmp.read()).decode()
-    return PreviewRes(img=img)
+    return preview(
+        request,
+        query,
+        [input_path],
+        config,
+        task_observations.draw_monthly_obs_days,
+        str(input_path),
+        str(config_path),
+    )
 
 
 @router.post("/monthly", response_model=SaveRes)
+@offload(io_executor)
 def observations_draw_monthly_save(body: SaveBody) -> SaveRes:
     input_path = Path(body.input)
     if not input_path.exists():
@@ -64,17 +64,20 @@ def observations_draw_monthly_save(body: SaveBody) -> SaveRes:
         )
     try:
         with config_path.open("r") as f:
-            ObservationsMonthly.model_validate_json(f.read())
+            config = ObservationsMonthly.model_validate_json(f.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    ctx = mp.get_context("spawn")
-    p = ctx.Process(
-        target=task_observations.draw_monthly_obs_days,
-        args=(str(input_path), str(config_path), str(output_path)),
-        kwargs={"fmt": body.format, "dpi": body.dpi},
+    img = render(
+        [input_path],
+        config,
+        task_observations.draw_monthly_obs_days,
+        str(input_path),
+        str(config_path),
+        fmt=body.format,
+        dpi=body.dpi,
     )
-    p.start()
-    p.join()
+    with output_path.open("wb") as f_img:
+        f_img.write(img)
     return SaveRes(output=str(output_path))
@@ -1,24 +1,24 @@
-import multiprocessing as mp
-import tempfile
-from base64 import b64encode
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
 from api.libs.sunspot_number_config import (
     SunspotNumberHemispheric,
     SunspotNumberWholeDisk,
 )
 from api.models.draw import PreviewQuery, PreviewRes, SaveBody, SaveRes
+from api.routers.draw.common import preview, render
 from api.tasks import sunspot_number as task_sunspot_number
+from api.tasks.pool import io_executor, offload
 
 router = APIRouter(prefix="/draw")
 
 
 @router.get("/whole_disk", response_model=PreviewRes)
+@offload(io_executor)
 def sunspot_number_draw_whole_disk(
-    query: PreviewQuery = Depends(),
-) -> PreviewRes:
+    request: Request, query: PreviewQuery = Depends()
+) -> PreviewRes | Response:
     input_path = Path(query.filename)
     if not input_path.exists():
         raise HTTPException(
@@ -31,24 +31,26 @@ def sunspot_number_draw_whole_disk(
         )
     try:
         with config_path.open("r") as f:
-            SunspotNumberWholeDisk.model_validate_json(f.read(), strict=True)
+            config = SunspotNumberWholeDisk.model_validate_json(
+                f.read(), strict=True
+            )
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    with tempfile.NamedTemporaryFile() as f_tmp:
-        ctx = mp.get_context("spawn")
-        p = ctx.Process(
-            target=task_sunspot_number.draw_sunspot_number_whole_disk,
-            args=(str(input_path), str(config_path), f_tmp.name),
-        )
-        p.start()
-        p.join()
-        img = b64encode(f_tmp.read()).decode()
-    return PreviewRes(img=img)
+    return preview(
+        request,
+        query,
+        [input_path],
+        config,
+        task_sunspot_number.draw_sunspot_number_whole_disk,
+        str(input_path),
+        str(config_path),
+    )
 
 
 @router.post("/whole_disk", response_model=SaveRes)
+@offload(io_executor)
 def sunspot_number_save_whole_disk(body: SaveBody) -> SaveRes:
     input_path = Path(body.input)
     if not input_path.exists():
@@ -67,26 +69,32 @@ def sunspot_number_save_whole_disk(body: SaveBody) -> SaveRes:
         )
     try:
         with config_path.open("r") as f:
-            SunspotNumberWholeDisk.model_validate_json(f.read(), strict=True)
+            config = SunspotNumberWholeDisk.model_validate_json(
+                f.read(), strict=True
+            )
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    ctx = mp.get_context("spawn")
-    p = ctx.Process(
-        target=task_sunspot_number.draw_sunspot_number_whole_disk,
-        args=(str(input_path), str(config_path), str(output_path)),
-        kwargs={"fmt": body.format, "dpi": body.dpi},
+    img = render(
+        [input_path],
+        config,
+        task_sunspot_number.draw_sunspot_number_whole_disk,
+        str(input_path),
+        str(config_path),
+        fmt=body.format,
+        dpi=body.dpi,
     )
-    p.start()
-    p.join()
+    with output_path.open("wb") as f_img:
+        f_img.write(img)
     return SaveRes(output=str(output_path))
 
 
 @router.get("/hemispheric", response_model=PreviewRes)
+@offload(io_executor)
 def sunspot_number_draw_hemispheric(
-    query: PreviewQuery = Depends(),
-) -> PreviewRes:
+    request: Request, query: PreviewQuery = Depends()
+) -> PreviewRes | Response:
     input_path = Path(query.filename)
     if not input_path.exists():
         raise HTTPException(
@@ -99,24 +107,26 @@ def sunspot_number_draw_hemispheric(
         )
     try:
         with config_path.open("r") as f:
-            SunspotNumberHemispheric.model_validate_json(f.read(), strict=True)
+            config = SunspotNumberHemispheric.model_validate_json(
+                f.read(), strict=True
+            )
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    with tempfile.NamedTemporaryFile() as f_tmp:
-        ctx = mp.get_context("spawn")
-        p = ctx.Process(
-            target=task_sunspot_number.draw_sunspot_number_hemispheric,
-            args=(str(input_path), str(config_path), f_tmp.name),
-        )
-        p.start()
-        p.join()
-        img = b64encode(f_tmp.read()).decode()
-    return PreviewRes(img=img)
+    return preview(
+        request,
+        query,
+        [input_path],
+        config,
+        task_sunspot_number.draw_sunspot_number_hemispheric,
+        str(input_path),
+        str(config_path),
+    )
 
 
 @router.post("/hemispheric", response_model=SaveRes)
+@offload(io_executor)
 def sunspot_number_save_hemispheric(body: SaveBody) -> SaveRes:
     input_path = Path(body.input)
     if not input_path.exists():
@@ -135,17 +145,22 @@ def sunspot_number_save_hemispheric(body: SaveBody) -> SaveRes:
         )
     try:
         with config_path.open("r") as f:
-            SunspotNumberHemispheric.model_validate_json(f.read(), strict=True)
+            config = SunspotNumberHemispheric.model_validate_json(
+                f.read(), strict=True
+            )
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    ctx = mp.get_context("spawn")
-    p = ctx.Process(
-        target=task_sunspot_number.draw_sunspot_number_hemispheric,
-        args=(str(input_path), str(config_path), str(output_path)),
-        kwargs={"fmt": body.format, "dpi": body.dpi},
+    img = render(
+        [input_path],
+        config,
+        task_sunspot_number.draw_sunspot_number_hemispheric,
+        str(input_path),
+        str(config_path),
+        fmt=body.format,
+        dpi=body.dpi,
     )
-    p.start()
-    p.join()
+    with output_path.open("wb") as f_img:
+        f_img.write(img)
     return SaveRes(output=str(output_path))
@@ -1,22 +1,24 @@
-import multiprocessing as mp
-import tempfile
-from base64 import b64encode
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
 from api.libs.sunspot_number_with_flare_config import (
     SunspotNumberWithFlare,
     SunspotNumberWithFlareHemispheric,
 )
 from api.models.draw import PreviewQuery, PreviewRes, SaveBody, SaveRes
+from api.routers.draw.common import preview, render
 from api.tasks import sunspot_number_with_flare as tasks
+from api.tasks.pool import io_executor, offload
 
 router = APIRouter(prefix="/draw")
 
 
 @router.get("/with_flare", response_model=PreviewRes)
-def draw_with_flare(query: PreviewQuery = Depends()) -> PreviewRes:
+@offload(io_executor)
+def draw_with_flare(
+    request: Request, query: PreviewQuery = Depends()
+) -> PreviewRes | Response:
     input_path = Path(query.filename)
     if not input_path.exists():
         raise HTTPException(
@@ -29,24 +31,25 @@ def draw_with_flare(query: PreviewQuery = Depends()) -> PreviewRes:
         )
     try:
         with config_path.open("r") as f:
-            SunspotNumberWithFlare.model_validate_json(f.read())
+            config = SunspotNumberWithFlare.model_validate_json(f.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    with tempfile.NamedTemporaryFile() as f_tmp:
-        ctx = mp.get_context("spawn")
-        p = ctx.Process(
-            target=tasks.draw_sunspot_number_with_flare,
-            args=(str(input_path), None, str(config_path), f_tmp.name),
-        )
-        p.start()
-        p.join()
-        img = b64encode(f_tmp.read()).decode()
-    return PreviewRes(img=img)
+    return preview(
+        request,
+        query,
+        [input_path],
+        config,
+        tasks.draw_sunspot_number_with_flare,
+        str(input_path),
+        None,
+        str(config_path),
+    )
 
 
 @router.post("/with_flare", response_model=SaveRes)
+@offload(io_executor)
 def save_with_flare(body: SaveBody) -> SaveRes:
     input_path = Path(body.input)
     if not input_path.exists():
@@ -65,24 +68,31 @@ def save_with_flare(body: SaveBody) -> SaveRes:
         )
     try:
         with config_path.open("r") as f:
-            SunspotNumberWithFlare.model_validate_json(f.read())
+            config = SunspotNumberWithFlare.model_validate_json(f.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    ctx = mp.get_context("spawn")
-    p = ctx.Process(
-        target=tasks.draw_sunspot_number_with_flare,
-        args=(str(input_path), None, str(config_path), str(output_path)),
-        kwargs={"fmt": body.format, "dpi": body.dpi},
+    img = render(
+        [input_path],
+        config,
+        tasks.draw_sunspot_number_with_flare,
+        str(input_path),
+        None,
+        str(config_path),
+        fmt=body.format,
+        dpi=body.dpi,
     )
-    p.start()
-    p.join()
+    with output_path.open("wb") as f_img:
+        f_img.write(img)
     return SaveRes(output=str(output_path))
 
 
 @router.get("/with_flare_with_factor", response_model=PreviewRes)
-def draw_with_flare_with_factor(query: PreviewQuery = Depends()) -> PreviewRes:
+@offload(io_executor)
+def draw_with_flare_with_factor(
+    request: Request, query: PreviewQuery = Depends()
+) -> PreviewRes | Response:
     with_flare_path = Path(query.filename).with_name("with_flare.parquet")
     if not with_flare_path.exists():
         raise HTTPException(
@@ -100,29 +110,27 @@ def draw_with_flare_with_factor(query: PreviewQuery = Depends()) -> PreviewRes:
         )
     try:
         with config_path.open("r") as f_config:
-            SunspotNumberWithFlare.model_validate_json(f_config.read())
+            config = SunspotNumberWithFlare.model_validate_json(
+                f_config.read()
+            )
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    with tempfile.NamedTemporaryFile() as f_tmp:
-        ctx = mp.get_context("spawn")
-        p = ctx.Process(
-            target=tasks.draw_sunspot_number_with_flare,
-            args=(
-                str(with_flare_path),
-                str(factors_path),
-                str(config_path),
-                f_tmp.name,
-            ),
-        )
-        p.start()
-        p.join()
-        img = b64encode(f_tmp.read()).decode()
-    return PreviewRes(img=img)
+    return preview(
+        request,
+        query,
+        [with_flare_path, factors_path],
+        config,
+        tasks.draw_sunspot_number_with_flare,
+        str(with_flare_path),
+        str(factors_path),
+        str(config_path),
+    )
 
 
 @router.post("/with_flare_with_factor", response_model=SaveRes)
+@offload(io_executor)
 def save_with_flare_with_factor(body: SaveBody) -> SaveRes:
     with_flare_path = Path(body.input).with_name("with_flare.parquet")
     if not with_flare_path.exists():
@@ -148,29 +156,33 @@ def save_with_flare_with_factor(body: SaveBody) -> SaveRes:
         )
     try:
         with config_path.open("r") as f_config:
-            SunspotNumberWithFlare.model_validate_json(f_config.read())
+            config = SunspotNumberWithFlare.model_validate_json(
+                f_config.read()
+            )
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    ctx = mp.get_context("spawn")
-    p = ctx.Process(
-        target=tasks.draw_sunspot_number_with_flare,
-        args=(
-            str(with_flare_path),
-            str(factors_path),
-            str(config_path),
-            str(output_path),
-        ),
-        kwargs={"fmt": body.format, "dpi": body.dpi},
+    img = render(
+        [with_flare_path, factors_path],
+        config,
+        tasks.draw_sunspot_number_with_flare,
+        str(with_flare_path),
+        str(factors_path),
+        str(config_path),
+        fmt=body.format,
+        dpi=body.dpi,
     )
-    p.start()
-    p.join()
+    with output_path.open("wb") as f_img:
+        f_img.write(img)
     return SaveRes(output=str(output_path))
 
 
 @router.get("/hemispheric", response_model=PreviewRes)
-def draw_hemispheric(query: PreviewQuery = Depends()) -> PreviewRes:
+@offload(io_executor)
+def draw_hemispheric(
+    request: Request, query: PreviewQuery = Depends()
+) -> PreviewRes | Response:
     input_path = Path(query.filename)
     if not input_path.exists():
         raise HTTPException(
@@ -183,24 +195,27 @@ def draw_hemispheric(query: PreviewQuery = Depends()) -> PreviewRes:
         )
     try:
         with config_path.open("r") as f:
-            SunspotNumberWithFlareHemispheric.model_validate_json(f.read())
+            config = SunspotNumberWithFlareHemispheric.model_validate_json(
+                f.read()
+            )
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    with tempfile.NamedTemporaryFile() as f_tmp:
-        ctx = mp.get_context("spawn")
-        p = ctx.Process(
-            target=tasks.draw_sunspot_number_with_flare_hemispheric,
-            args=(str(input_path), None, str(config_path), f_tmp.name),
-        )
-        p.start()
-        p.join()
-        img = b64encode(f_tmp.read()).decode()
-    return PreviewRes(img=img)
+    return preview(
+        request,
+        query,
+        [input_path],
+        config,
+        tasks.draw_sunspot_number_with_flare_hemispheric,
+        str(input_path),
+        None,
+        str(config_path),
+    )
 
 
 @router.post("/hemispheric", response_model=SaveRes)
+@offload(io_executor)
 def save_hemispheric(body: SaveBody) -> SaveRes:
     input_path = Path(body.input)
     if not input_path.exists():
@@ -219,26 +234,33 @@ def save_hemispheric(body: SaveBody) -> SaveRes:
         )
     try:
         with config_path.open("r") as f:
-            SunspotNumberWithFlareHemispheric.model_validate_json(f.read())
+            config = SunspotNumberWithFlareHemispheric.model_validate_json(
+                f.read()
+            )
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    ctx = mp.get_context("spawn")
-    p = ctx.Process(
-        target=tasks.draw_sunspot_number_with_flare_hemispheric,
-        args=(str(input_path), None, str(config_path), str(output_path)),
-        kwargs={"fmt": body.format, "dpi": body.dpi},
+    img = render(
+        [input_path],
+        config,
+        tasks.draw_sunspot_number_with_flare_hemispheric,
+        str(input_path),
+        None,
+        str(config_path),
+        fmt=body.format,
+        dpi=body.dpi,
     )
-    p.start()
-    p.join()
+    with output_path.open("wb") as f_img:
+        f_img.write(img)
     return SaveRes(output=str(output_path))
 
 
 @router.get("/hemispheric_with_factors", response_model=PreviewRes)
+@offload(io_executor)
 def draw_hemispheric_with_factors(
-    query: PreviewQuery = Depends(),
-) -> PreviewRes:
+    request: Request, query: PreviewQuery = Depends()
+) -> PreviewRes | Response:
     with_flare_path = Path(query.filename).with_name("with_flare.parquet")
     if not with_flare_path.exists():
         raise HTTPException(
@@ -256,29 +278,27 @@ def draw_hemispheric_with_factors(
         )
     try:
         with config_path.open("r") as f:
-            SunspotNumberWithFlareHemispheric.model_validate_json(f.read())
+            config = SunspotNumberWithFlareHemispheric.model_validate_json(
+                f.read()
+            )
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    with tempfile.NamedTemporaryFile() as f_tmp:
-        ctx = mp.get_context("spawn")
-        p = ctx.Process(
-            target=tasks.draw_sunspot_number_with_flare_hemispheric,
-            args=(
-                str(with_flare_path),
-                str(factors_path),
-                str(config_path),
-                f_tmp.name,
-            ),
-        )
-        p.start()
-        p.join()
-        img = b64encode(f_tmp.read()).decode()
-    return PreviewRes(img=img)
+    return preview(
+        request,
+        query,
+        [with_flare_path, factors_path],
+        config,
+        tasks.draw_sunspot_number_with_flare_hemispheric,
+        str(with_flare_path),
+        str(factors_path),
+        str(config_path),
+    )
 
 
 @router.post("/hemispheric_with_factors", response_model=SaveRes)
+@offload(io_executor)
 def save_hemispheric_with_factors(body: SaveBody) -> SaveRes:
     with_flare_path = Path(body.input).with_name("with_flare.parquet")
     if not with_flare_path.exists():
@@ -304,22 +324,23 @@ def save_hemispheric_with_factors(body: SaveBody) -> SaveRes:
         )
     try:
         with config_path.open("r") as f:
-            SunspotNumberWithFlareHemispheric.model_validate_json(f.read())
+            config = SunspotNumberWithFlareHemispheric.model_validate_json(
+                f.read()
+            )
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    ctx = mp.get_context("spawn")
-    p = ctx.Process(
-        target=tasks.draw_sunspot_number_with_flare_hemispheric,
-        args=(
-            str(with_flare_path),
-            str(factors_path),
-            str(config_path),
-            str(output_path),
-        ),
-        kwargs={"fmt": body.format, "dpi": body.dpi},
+    img = render(
+        [with_flare_path, factors_path],
+        config,
+        tasks.draw_sunspot_number_with_flare_hemispheric,
+        str(with_flare_path),
+        str(factors_path),
+        str(config_path),
+        fmt=body.format,
+        dpi=body.dpi,
     )
-    p.start()
-    p.join()
+    with output_path.open("wb") as f_img:
+        f_img.write(img)
     return SaveRes(output=str(output_path))
@@ -1,9 +1,6 @@
-import multiprocessing as mp
-import tempfile
-from base64 import b64encode
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
 from api.libs.sunspot_number_with_silso_config import (
     SunspotNumberDiff,
@@ -14,13 +11,18 @@ from api.libs.sunspot_number_with_silso_config import (
     SunspotNumberWithSilso,
 )
 from api.models.draw import PreviewQuery, PreviewRes, SaveBody, SaveRes
+from api.routers.draw.common import preview, render
 from api.tasks import sunspot_number_with_silso as tasks
+from api.tasks.pool import io_executor, offload
 
 router = APIRouter(prefix="/draw")
 
 
 @router.get("/with_silso", response_model=PreviewRes)
-def draw_with_silso(query: PreviewQuery = Depends()) -> PreviewRes:
+@offload(io_executor)
+def draw_with_silso(
+    request: Request, query: PreviewQuery = Depends()
+) -> PreviewRes | Response:
     input_path = Path(query.filename)
     if not input_path.exists():
         raise HTTPException(
@@ -33,24 +35,24 @@ def draw_with_silso(query: PreviewQuery = Depends()) -> PreviewRes:
         )
     try:
         with config_path.open("r") as f:
-            SunspotNumberWithSilso.model_validate_json(f.read())
+            config = SunspotNumberWithSilso.model_validate_json(f.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    with tempfile.NamedTemporaryFile() as f_tmp:
-        ctx = mp.get_context("spawn")
-        p = ctx.Process(
-            target=tasks.draw_sunspot_number_with_silso,
-            args=(str(input_path), str(config_path), f_tmp.name),
-        )
-        p.start()
-        p.join()
-        img = b64encode(f_tmp.read()).decode()
-    return PreviewRes(img=img)
+    return preview(
+        request,
+        query,
+        [input_path],
+        config,
+        tasks.draw_sunspot_number_with_silso,
+        str(input_path),
+        str(config_path),
+    )
 
 
 @router.post("/with_silso", response_model=SaveRes)
+@offload(io_executor)
 def save_with_silso(body: SaveBody) -> SaveRes:
     input_path = Path(body.input)
     if not input_path.exists():
@@ -69,24 +71,30 @@ def save_with_silso(body: SaveBody) -> SaveRes:
         )
     try:
         with config_path.open("r") as f:
-            SunspotNumberWithSilso.model_validate_json(f.read())
+            config = SunspotNumberWithSilso.model_validate_json(f.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    ctx = mp.get_context("spawn")
-    p = ctx.Process(
-        target=tasks.draw_sunspot_number_with_silso,
-        args=(str(input_path), str(config_path), str(output_path)),
-        kwargs={"fmt": body.format, "dpi": body.dpi},
+    img = render(
+        [input_path],
+        config,
+        tasks.draw_sunspot_number_with_silso,
+        str(input_path),
+        str(config_path),
+        fmt=body.format,
+        dpi=body.dpi,
     )
-    p.start()
-    p.join()
+    with output_path.open("wb") as f_img:
+        f_img.write(img)
     return SaveRes(output=str(output_path))
 
 
 @router.get("/scatter", response_model=PreviewRes)
-def draw_scatter(query: PreviewQuery = Depends()) -> PreviewRes:
+@offload(io_executor)
+def draw_scatter(
+    request: Request, query: PreviewQuery = Depends()
+) -> PreviewRes | Response:
     with_silso_path = Path(query.filename).with_name("with_silso.parquet")
     if not with_silso_path.exists():
         raise HTTPException(
@@ -104,29 +112,25 @@ def draw_scatter(query: PreviewQuery = Depends()) -> PreviewRes:
         )
     try:
         with config_path.open("r") as f_config:
-            SunspotNumberScatter.model_validate_json(f_config.read())
+            config = SunspotNumberScatter.model_validate_json(f_config.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    with tempfile.NamedTemporaryFile() as f_tmp:
-        ctx = mp.get_context("spawn")
-        p = ctx.Process(
-            target=tasks.draw_scatter,
-            args=(
-                str(with_silso_path),
-                str(factor_r2_path),
-                str(config_path),
-                f_tmp.name,
-            ),
-        )
-        p.start()
-        p.join()
-        img = b64encode(f_tmp.read()).decode()
-    return PreviewRes(img=img)
+    return preview(
+        request,
+        query,
+        [with_silso_path, factor_r2_path],
+        config,
+        tasks.draw_scatter,
+        str(with_silso_path),
+        str(factor_r2_path),
+        str(config_path),
+    )
 
 
 @router.post("/scatter", response_model=SaveRes)
+@offload(io_executor)
 def save_scatter(body: SaveBody) -> SaveRes:
     with_silso_path = Path(body.input).with_name("with_silso.parquet")
     if not with_silso_path.exists():
@@ -150,29 +154,31 @@ def save_scatter(body: SaveBody) -> SaveRes:
         )
     try:
         with config_path.open("r") as f_config:
-            SunspotNumberScatter.model_validate_json(f_config.read())
+            config = SunspotNumberScatter.model_validate_json(f_config.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    ctx = mp.get_context("spawn")
-    p = ctx.Process(
-        target=tasks.draw_scatter,
-        args=(
-            str(with_silso_path),
-            str(factor_r2_path),
-            str(config_path),
-            str(output_path),
-        ),
-        kwargs={"fmt": body.format, "dpi": body.dpi},
+    img = render(
+        [with_silso_path, factor_r2_path],
+        config,
+        tasks.draw_scatter,
+        str(with_silso_path),
+        str(factor_r2_path),
+        str(config_path),
+        fmt=body.format,
+        dpi=body.dpi,
     )
-    p.start()
-    p.join()
+    with output_path.open("wb") as f_img:
+        f_img.write(img)
     return SaveRes(output=str(output_path))
 
 
 @router.get("/ratio", response_model=PreviewRes)
-def draw_ratio(query: PreviewQuery = Depends()) -> PreviewRes:
+@offload(io_executor)
+def draw_ratio(
+    request: Request, query: PreviewQuery = Depends()
+) -> PreviewRes | Response:
     ratio_diff_path = Path(query.filename).with_name("ratio_diff.parquet")
     if not ratio_diff_path.exists():
         raise HTTPException(
@@ -190,29 +196,25 @@ def draw_ratio(query: PreviewQuery = Depends()) -> PreviewRes:
         )
     try:
         with config_path.open("r") as f_config:
-            SunspotNumberRatio.model_validate_json(f_config.read())
+            config = SunspotNumberRatio.model_validate_json(f_config.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    with tempfile.NamedTemporaryFile() as f_tmp:
-        ctx = mp.get_context("spawn")
-        p = ctx.Process(
-            target=tasks.draw_ratio,
-            args=(
-                str(ratio_diff_path),
-                str(factor_r2_path),
-                str(config_path),
-                f_tmp.name,
-            ),
-        )
-        p.start()
-        p.join()
-        img = b64encode(f_tmp.read()).decode()
-    return PreviewRes(img=img)
+    return preview(
+        request,
+        query,
+        [ratio_diff_path, factor_r2_path],
+        config,
+        tasks.draw_ratio,
+        str(ratio_diff_path),
+        str(factor_r2_path),
+        str(config_path),
+    )
 
 
 @router.post("/ratio", response_model=SaveRes)
+@offload(io_executor)
 def save_ratio(body: SaveBody) -> SaveRes:
     ratio_diff_path = Path(body.input).with_name("ratio_diff.parquet")
     if not ratio_diff_path.exists():
@@ -236,29 +238,31 @@ def save_ratio(body: SaveBody) -> SaveRes:
         )
     try:
         with config_path.open("r") as f_config:
-            SunspotNumberRatio.model_validate_json(f_config.read())
+            config = SunspotNumberRatio.model_validate_json(f_config.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    ctx = mp.get_context("spawn")
-    p = ctx.Process(
-        target=tasks.draw_ratio,
-        args=(
-            str(ratio_diff_path),
-            str(factor_r2_path),
-            str(config_path),
-            str(output_path),
-        ),
-        kwargs={"fmt": body.format, "dpi": body.dpi},
+    img = render(
+        [ratio_diff_path, factor_r2_path],
+        config,
+        tasks.draw_ratio,
+        str(ratio_diff_path),
+        str(factor_r2_path),
+        str(config_path),
+        fmt=body.format,
+        dpi=body.dpi,
     )
-    p.start()
-    p.join()
+    with output_path.open("wb") as f_img:
+        f_img.write(img)
     return SaveRes(output=str(output_path))
 
 
 @router.get("/diff", response_model=PreviewRes)
-def draw_diff(query: PreviewQuery = Depends()) -> PreviewRes:
+@offload(io_executor)
+def draw_diff(
+    request: Request, query: PreviewQuery = Depends()
+) -> PreviewRes | Response:
     input_path = Path(query.filename)
     if not input_path.exists():
         raise HTTPException(
@@ -271,24 +275,24 @@ def draw_diff(query: PreviewQuery = Depends()) -> PreviewRes:
         )
     try:
         with config_path.open("r") as f_config:
-            SunspotNumberDiff.model_validate_json(f_config.read())
+            config = SunspotNumberDiff.model_validate_json(f_config.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    with tempfile.NamedTemporaryFile() as f_tmp:
-        ctx = mp.get_context("spawn")
-        p = ctx.Process(
-            target=tasks.draw_diff,
-            args=(str(input_path), str(config_path), f_tmp.name),
-        )
-        p.start()
-        p.join()
-        img = b64encode(f_tmp.read()).decode()
-    return PreviewRes(img=img)
+    return preview(
+        request,
+        query,
+        [input_path],
+        config,
+        tasks.draw_diff,
+        str(input_path),
+        str(config_path),
+    )
 
 
 @router.post("/diff", response_model=SaveRes)
+@offload(io_executor)
 def save_diff(body: SaveBody) -> SaveRes:
     input_path = Path(body.input)
     if not input_path.exists():
@@ -307,24 +311,30 @@ def save_diff(body: SaveBody) -> SaveRes:
         )
     try:
         with config_path.open("r") as f:
-            SunspotNumberDiff.model_validate_json(f.read())
+            config = SunspotNumberDiff.model_validate_json(f.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    ctx = mp.get_context("spawn")
-    p = ctx.Process(
-        target=tasks.draw_diff,
-        args=(str(input_path), str(config_path), str(output_path)),
-        kwargs={"fmt": body.format, "dpi": body.dpi},
+    img = render(
+        [input_path],
+        config,
+        tasks.draw_diff,
+        str(input_path),
+        str(config_path),
+        fmt=body.format,
+        dpi=body.dpi,
     )
-    p.start()
-    p.join()
+    with output_path.open("wb") as f_img:
+        f_img.write(img)
     return SaveRes(output=str(output_path))
 
 
 @router.get("/ratio_diff_1", response_model=PreviewRes)
-def draw_ratio_diff_1(query: PreviewQuery = Depends()) -> PreviewRes:
+@offload(io_executor)
+def draw_ratio_diff_1(
+    request: Request, query: PreviewQuery = Depends()
+) -> PreviewRes | Response:
     ratio_diff_path = Path(query.filename).with_name("ratio_diff.parquet")
     if not ratio_diff_path.exists():
         raise HTTPException(
@@ -342,29 +352,27 @@ def draw_ratio_diff_1(query: PreviewQuery = Depends()) -> PreviewRes:
         )
     try:
         with config_path.open("r") as f_config:
-            SunspotNumberRatioDiff1.model_validate_json(f_config.read())
+            config = SunspotNumberRatioDiff1.model_validate_json(
+                f_config.read()
+            )
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    with tempfile.NamedTemporaryFile() as f_tmp:
-        ctx = mp.get_context("spawn")
-        p = ctx.Process(
-            target=tasks.draw_ratio_diff_1,
-            args=(
-                str(ratio_diff_path),
-                str(factor_r2_path),
-                str(config_path),
-                f_tmp.name,
-            ),
-        )
-        p.start()
-        p.join()
-        img = b64encode(f_tmp.read()).decode()
-    return PreviewRes(img=img)
+    return preview(
+        request,
+        query,
+        [ratio_diff_path, factor_r2_path],
+        config,
+        tasks.draw_ratio_diff_1,
+        str(ratio_diff_path),
+        str(factor_r2_path),
+        str(config_path),
+    )
 
 
 @router.post("/ratio_diff_1", response_model=SaveRes)
+@offload(io_executor)
 def save_ratio_diff_1(body: SaveBody) -> SaveRes:
     ratio_diff_path = Path(body.input).with_name("ratio_diff.parquet")
     if not ratio_diff_path.exists():
@@ -388,29 +396,33 @@ def save_ratio_diff_1(body: SaveBody) -> SaveRes:
         )
     try:
         with config_path.open("r") as f_config:
-            SunspotNumberRatioDiff1.model_validate_json(f_config.read())
+            config = SunspotNumberRatioDiff1.model_validate_json(
+                f_config.read()
+            )
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    ctx = mp.get_context("spawn")
-    p = ctx.Process(
-        target=tasks.draw_ratio_diff_1,
-        args=(
-            str(ratio_diff_path),
-            str(factor_r2_path),
-            str(config_path),
-            str(output_path),
-        ),
-        kwargs={"fmt": body.format, "dpi": body.dpi},
+    img = render(
+        [ratio_diff_path, factor_r2_path],
+        config,
+        tasks.draw_ratio_diff_1,
+        str(ratio_diff_path),
+        str(factor_r2_path),
+        str(config_path),
+        fmt=body.format,
+        dpi=body.dpi,
     )
-    p.start()
-    p.join()
+    with output_path.open("wb") as f_img:
+        f_img.write(img)
     return SaveRes(output=str(output_path))
 
 
 @router.get("/ratio_diff_2", response_model=PreviewRes)
-def draw_ratio_diff_2(query: PreviewQuery = Depends()) -> PreviewRes:
+@offload(io_executor)
+def draw_ratio_diff_2(
+    request: Request, query: PreviewQuery = Depends()
+) -> PreviewRes | Response:
     input_path = Path(query.filename)
     if not input_path.exists():
         raise HTTPException(
@@ -423,24 +435,26 @@ def draw_ratio_diff_2(query: PreviewQuery = Depends()) -> PreviewRes:
         )
     try:
         with config_path.open("r") as f_config:
-            SunspotNumberRatioDiff2.model_validate_json(f_config.read())
+            config = SunspotNumberRatioDiff2.model_validate_json(
+                f_config.read()
+            )
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    with tempfile.NamedTemporaryFile() as f_tmp:
-        ctx = mp.get_context("spawn")
-        p = ctx.Process(
-            target=tasks.draw_ratio_diff_2,
-            args=(str(input_path), str(config_path), f_tmp.name),
-        )
-        p.start()
-        p.join()
-        img = b64encode(f_tmp.read()).decode()
-    return PreviewRes(img=img)
+    return preview(
+        request,
+        query,
+        [input_path],
+        config,
+        tasks.draw_ratio_diff_2,
+        str(input_path),
+        str(config_path),
+    )
 
 
 @router.post("/ratio_diff_2", response_model=SaveRes)
+@offload(io_executor)
 def save_ratio_diff_2(body: SaveBody) -> SaveRes:
     input_path = Path(body.input)
     if not input_path.exists():
@@ -459,17 +473,20 @@ def save_ratio_diff_2(body: SaveBody) -> SaveRes:
         )
     try:
         with config_path.open("r") as f:
-            SunspotNumberRatioDiff2.model_validate_json(f.read())
+            config = SunspotNumberRatioDiff2.model_validate_json(f.read())
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"config {config_path} is broken"
         ) from e
-    ctx = mp.get_context("spawn")
-    p = ctx.Process(
-        target=tasks.draw_ratio_diff_2,
-        args=(str(input_path), str(config_path), str(output_path)),
-        kwargs={"fmt": body.format, "dpi": body.dpi},
+    img = render(
+        [input_path],
+        config,
+        tasks.draw_ratio_diff_2,
+        str(input_path),
+        str(config_path),
+        fmt=body.format,
+        dpi=body.dpi,
     )
-    p.start()
-    p.join()
+    with output_path.open("wb") as f_img:
+        f_img.write(img)
     return SaveRes(output=str(output_path))
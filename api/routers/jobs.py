@@ -0,0 +1,89 @@
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from api.libs.jobs import FINISHED, Job, JobState
+from api.models.jobs import JobRes, JobsRes
+from api.routers.common import job_manager
+
+# 進捗を確認する秒単位の間隔
+EVENT_INTERVAL = 0.5
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+def to_datetime(timestamp: float | None) -> datetime | None:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def to_job_res(state: JobState) -> JobRes:
+    result = state["result"]
+    return JobRes(
+        id=state["id"],
+        name=state["name"],
+        status=state["status"],
+        progress=state["progress"],
+        message=state["message"],
+        result=result.model_dump() if isinstance(result, BaseModel) else None,
+        error=state["error"],
+        created_at=datetime.fromtimestamp(
+            state["created_at"], tz=timezone.utc
+        ),
+        started_at=to_datetime(state["started_at"]),
+        finished_at=to_datetime(state["finished_at"]),
+    )
+
+
+def get_job(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"job {job_id} not found")
+    return job
+
+
+@router.get("", response_model=JobsRes)
+def jobs_list() -> JobsRes:
+    return JobsRes(
+        jobs=[to_job_res(job.snapshot()) for job in job_manager.jobs()]
+    )
+
+
+@router.get("/{job_id}", response_model=JobRes)
+def jobs_get(job_id: str) -> JobRes:
+    return to_job_res(get_job(job_id).snapshot())
+
+
+@router.post("/{job_id}/cancel", response_model=JobRes)
+def jobs_cancel(job_id: str) -> JobRes:
+    job = get_job(job_id)
+    job_manager.cancel(job_id)
+    return to_job_res(job.snapshot())
+
+
+@router.get("/{job_id}/events")
+def jobs_events(request: Request, job_id: str) -> StreamingResponse:
+    job = get_job(job_id)
+
+    async def events() -> AsyncIterator[str]:
+        version = -1
+        while not await request.is_disconnected():
+            state = job.snapshot()
+            if state["version"] != version:
+                version = state["version"]
+                data = to_job_res(state).model_dump_json()
+                yield f"event: {state['status']}\ndata: {data}\n\n"
+            if state["status"] in FINISHED:
+                return
+            await asyncio.sleep(EVENT_INTERVAL)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -6,8 +6,10 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from api.libs import observations, observations_calendar
+from api.routers.common import frame_cache
 from api.routers.config.observations import router as router_config
 from api.routers.draw.observations import router as router_draw
+from api.tasks.pool import compute_executor, offload
 
 
 class ObservationsAgg(BaseModel):
@@ -29,12 +31,25 @@ class ObservationsCalendarRes(BaseModel):
     calendar: list[list[ObsDay]]
 
 
+class ObservationsCalendarMonth(BaseModel):
+    year: int
+    month: int
+    calendar: list[list[ObsDay]]
+
+
+class ObservationsCalendarsRes(BaseModel):
+    calendars: list[ObservationsCalendarMonth]
+
+
+MAX_CALENDAR_MONTHS = 120
+
 router = APIRouter(prefix="/observations", tags=["observations"])
 router.include_router(router_config)
 router.include_router(router_draw)
 
 
 @router.post("/agg", response_model=ObservationsAggRes)
+@offload(compute_executor)
 def observations_agg(body: ObservationsAgg) -> ObservationsAggRes:
     input_path = Path(body.filename)
     if not input_path.exists():
@@ -58,22 +73,63 @@ def observations_agg(body: ObservationsAgg) -> ObservationsAggRes:
     df_daily.write_parquet(output_paths["daily"])
     df_monthly = observations.calc_monthly_obs(df_daily.lazy()).collect()
     df_monthly.write_parquet(output_paths["monthly"])
+    for path in output_paths.values():
+        frame_cache.invalidate(path)
     return ObservationsAggRes(
         output_daily=str(output_paths["daily"]),
         output_monthly=str(output_paths["monthly"]),
     )
 
 
+def check_month(month: int) -> None:
+    months_in_year = observations_calendar.MONTHS_IN_YEAR
+    if not 1 <= month <= months_in_year:
+        raise HTTPException(
+            status_code=400,
+            detail=f"month must be between 1 and {months_in_year}",
+        )
+
+
 @router.get("/calendar", response_model=ObservationsCalendarRes)
+@offload(compute_executor)
 def observations_get_calendar(
     filename: str, year: int, month: int, first: int = 0
 ) -> ObservationsCalendarRes:
     input_path = Path(filename)
-    df = pl.read_parquet(input_path)
+    check_month(month)
+    df = frame_cache.read_parquet(input_path)
     cal = observations_calendar.create_calendar(df, year, month, first)
-    return ObservationsCalendarRes(
-        calendar=[
-            [ObsDay(date=day.date, obs=day.obs == 1) for day in week]
-            for week in cal["calendar"]
+    return ObservationsCalendarRes(calendar=to_obs_days(cal))
+
+
+@router.get("/calendars", response_model=ObservationsCalendarsRes)
+@offload(compute_executor)
+def observations_get_calendars(
+    filename: str, year: int, month: int = 1, months: int = 12, first: int = 0
+) -> ObservationsCalendarsRes:
+    input_path = Path(filename)
+    check_month(month)
+    if not 1 <= months <= MAX_CALENDAR_MONTHS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"months must be between 1 and {MAX_CALENDAR_MONTHS}",
+        )
+    df = frame_cache.read_parquet(input_path)
+    cals = observations_calendar.create_calendars(
+        df, year, month, months, first
+    )
+    return ObservationsCalendarsRes(
+        calendars=[
+            ObservationsCalendarMonth(
+                year=cal["year"], month=cal["month"], calendar=to_obs_days(cal)
+            )
+            for cal in cals
         ]
     )
+
+
+def to_obs_days(cal: observations_calendar.ObsCalendar) -> list[list[ObsDay]]:
+    return [
+        [ObsDay(date=day.date, obs=day.obs == 1) for day in week]
+        for week in cal["calendar"]
+    ]
@@ -4,9 +4,12 @@ import polars as pl
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from api.libs import sunspot_number
+from api.libs import jobs, sunspot_number
+from api.models.jobs import JobSubmitRes
+from api.routers.common import frame_cache, job_manager
 from api.routers.config.sunspot_number import router as router_config
 from api.routers.draw.sunspot_number import router as router_draw
+from api.tasks.pool import compute_executor, offload
 
 
 class SunspotNumberAgg(BaseModel):
@@ -26,7 +29,18 @@ router.include_router(router_draw)
 
 
 @router.post("/agg", response_model=SunspotNumberAggRes)
+@offload(compute_executor)
 def sunspot_number_main(body: SunspotNumberAgg) -> SunspotNumberAggRes:
+    return run_agg(body)
+
+
+@router.post("/agg/jobs", response_model=JobSubmitRes)
+def sunspot_number_main_job(body: SunspotNumberAgg) -> JobSubmitRes:
+    job = job_manager.submit("sunspot_number", run_agg, body)
+    return JobSubmitRes(job_id=job.id)
+
+
+def run_agg(body: SunspotNumberAgg) -> SunspotNumberAggRes:
     filename = Path(body.filename)
     if not filename.exists():
         raise HTTPException(
@@ -44,6 +58,7 @@ def sunspot_number_main(body: SunspotNumberAgg) -> SunspotNumberAggRes:
             raise HTTPException(
                 status_code=400, detail=f"file {path} already exists"
             )
+    jobs.progress(0.1, "calculating")
     df_spot, df_nospot = sunspot_number.split(pl.scan_parquet(filename))
     df_spot = df_spot.pipe(sunspot_number.calc_lat).pipe(
         sunspot_number.calc_sn
@@ -52,11 +67,14 @@ def sunspot_number_main(body: SunspotNumberAgg) -> SunspotNumberAggRes:
     df_raw = (
         pl.concat([df_spot, df_nospot]).pipe(sunspot_number.sort).collect()
     )
+    jobs.progress(0.7, "writing")
     df_raw.write_parquet(output_paths["raw"])
     df_daily = sunspot_number.agg_daily(df_raw)
     df_daily.write_parquet(output_paths["daily"])
     df_monthly = sunspot_number.agg_monthly(df_raw)
     df_monthly.write_parquet(output_paths["monthly"])
+    for path in output_paths.values():
+        frame_cache.invalidate(path)
     return SunspotNumberAggRes(
         output_raw=str(output_paths["raw"]),
         output_daily=str(output_paths["daily"]),
@@ -1,15 +1,17 @@
 import json
 from pathlib import Path
 
-import polars as pl
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from api.libs import sunspot_number_with_flare
+from api.libs import jobs, sunspot_number_with_flare
+from api.models.jobs import JobSubmitRes
+from api.routers.common import frame_cache, job_manager
 from api.routers.config.sunspot_number_with_flare import (
     router as router_config,
 )
 from api.routers.draw.sunspot_number_with_flare import router as router_draw
+from api.tasks.pool import compute_executor, offload
 
 
 class SunspotNumberWithFlareAgg(BaseModel):
@@ -34,9 +36,20 @@ router.include_router(router_draw)
 
 
 @router.post("/agg", response_model=SunspotNumberWithFlareAggRes)
+@offload(compute_executor)
 def with_flare_agg(
     body: SunspotNumberWithFlareAgg,
 ) -> SunspotNumberWithFlareAggRes:
+    return run_agg(body)
+
+
+@router.post("/agg/jobs", response_model=JobSubmitRes)
+def with_flare_agg_job(body: SunspotNumberWithFlareAgg) -> JobSubmitRes:
+    job = job_manager.submit("with_flare", run_agg, body)
+    return JobSubmitRes(job_id=job.id)
+
+
+def run_agg(body: SunspotNumberWithFlareAgg) -> SunspotNumberWithFlareAggRes:
     seiryo_path = Path(body.seiryo_path)
     if not seiryo_path.exists():
         raise HTTPException(
@@ -61,12 +74,15 @@ def with_flare_agg(
             raise HTTPException(
                 status_code=400, detail=f"file {path} already exists"
             )
-    df_seiryo = pl.read_parquet(seiryo_path)
+    jobs.progress(0.1, "loading")
+    df_seiryo = frame_cache.read_parquet(seiryo_path)
     df_flare = sunspot_number_with_flare.load_flare_files(
         files_north, files_south, files_total
     )
     df_with_flare = sunspot_number_with_flare.join_data(df_seiryo, df_flare)
+    jobs.progress(0.7, "writing")
     df_with_flare.write_parquet(output_paths["with_flare"])
+    frame_cache.invalidate(output_paths["with_flare"])
     factors = sunspot_number_with_flare.calc_factors(df_with_flare)
     with output_paths["factors"].open("w") as f:
         json.dump(factors, f)
@@ -1,15 +1,17 @@
 import json
 from pathlib import Path
 
-import polars as pl
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from api.libs import sunspot_number_with_silso
+from api.libs import jobs, sunspot_number_with_silso
+from api.models.jobs import JobSubmitRes
+from api.routers.common import frame_cache, job_manager
 from api.routers.config.sunspot_number_with_silso import (
     router as router_config,
 )
 from api.routers.draw.sunspot_number_with_silso import router as router_draw
+from api.tasks.pool import compute_executor, offload
 
 
 class SunspotNumberWithSilsoAgg(BaseModel):
@@ -33,9 +35,20 @@ router.include_router(router_draw)
 
 
 @router.post("/agg", response_model=SunspotNumberWithSilsoAggRes)
+@offload(compute_executor)
 def with_silso_agg(
     body: SunspotNumberWithSilsoAgg,
 ) -> SunspotNumberWithSilsoAggRes:
+    return run_agg(body)
+
+
+@router.post("/agg/jobs", response_model=JobSubmitRes)
+def with_silso_agg_job(body: SunspotNumberWithSilsoAgg) -> JobSubmitRes:
+    job = job_manager.submit("with_silso", run_agg, body)
+    return JobSubmitRes(job_id=job.id)
+
+
+def run_agg(body: SunspotNumberWithSilsoAgg) -> SunspotNumberWithSilsoAggRes:
     seiryo_path = Path(body.seiryo_path)
     if not seiryo_path.exists():
         raise HTTPException(
@@ -58,11 +71,13 @@ def with_silso_agg(
             raise HTTPException(
                 status_code=400, detail=f"file {path} already exists"
             )
-    df_seiryo = pl.read_parquet(seiryo_path)
+    jobs.progress(0.1, "loading")
+    df_seiryo = frame_cache.read_parquet(seiryo_path)
     df_silso = sunspot_number_with_silso.load_silso_data(silso_path)
     df_seiryo_with_silso = sunspot_number_with_silso.join_data(
         df_seiryo, df_silso
     )
+    jobs.progress(0.5, "writing")
     df_seiryo_with_silso.write_parquet(output_paths["with_silso"])
     df_seiryo_with_silso_truncated = sunspot_number_with_silso.truncate_data(
         df_seiryo_with_silso
@@ -79,6 +94,8 @@ def with_silso_agg(
         df_seiryo_with_silso_truncated, factor
     )
     df_ratio_and_diff.write_parquet(output_paths["ratio_diff"])
+    frame_cache.invalidate(output_paths["with_silso"])
+    frame_cache.invalidate(output_paths["ratio_diff"])
     return SunspotNumberWithSilsoAggRes(
         output_with_silso=str(output_paths["with_silso"]),
         output_factor_r2=str(output_paths["factor_r2"]),
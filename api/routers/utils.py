@@ -2,10 +2,11 @@ import csv
 from pathlib import Path
 
 import matplotlib.font_manager as fm
-import nkf
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
+from api.libs import check_file
+
 
 class FilesRes(BaseModel):
     files: list[str]
@@ -40,8 +41,7 @@ def file_csv(query: FileCsvQuery = Depends()) -> FileCsvRes:
         raise HTTPException(
             status_code=404, detail=f"file {input_path} not found"
         )
-    with input_path.open("rb") as fb:
-        encoding = nkf.guess(fb.read()).lower()
+    encoding = check_file.guess_encoding(input_path)
     with input_path.open("r", encoding=encoding) as f:
         reader = csv.reader(f)
         data = list(reader)
@@ -8,24 +8,18 @@ mpl.use("Agg")
 
 from api.libs import observations
 from api.libs.observations_config import ObservationsMonthly
+from api.tasks.utils import fig_to_bytes
 
 
 def draw_monthly_obs_days(
     data_path: str,
     config_path: str,
-    output_path: str,
     *,
     fmt: str = "png",
     dpi: int | None = None,
-) -> None:
+) -> bytes:
     df = pl.read_parquet(Path(data_path))
     with Path(config_path).open("r") as f_config:
         config = ObservationsMonthly(**json.load(f_config))
     fig = observations.draw_monthly_obs_days(df, config)
-    fig.savefig(
-        Path(output_path),
-        format=fmt,
-        dpi=dpi if dpi is not None else "figure",
-        bbox_inches="tight",
-        pad_inches=0.1,
-    )
+    return fig_to_bytes(fig, fmt=fmt, dpi=dpi)
@@ -0,0 +1,288 @@
+import asyncio
+import multiprocessing as mp
+import os
+import threading
+from collections.abc import Awaitable, Callable
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial, wraps
+from typing import ParamSpec, TypeVar
+
+import matplotlib as mpl
+import matplotlib.font_manager as fm
+
+mpl.use("Agg")
+
+# ワーカーの起動時に読み込ませるため、描画処理を全てインポートしておく
+from api.tasks import (  # noqa: F401
+    butterfly,
+    observations,
+    sunspot_number,
+    sunspot_number_with_flare,
+    sunspot_number_with_silso,
+)
+
+_P = ParamSpec("_P")
+_T = TypeVar("_T")
+
+
+def warm_up() -> None:
+    """ワーカーの初期化時にフォントを読み込む"""
+    fm.findfont(fm.FontProperties())
+
+
+def _ping() -> None:
+    pass
+
+
+def offload(
+    executor: Executor,
+) -> Callable[[Callable[_P, _T]], Callable[_P, Awaitable[_T]]]:
+    """同期処理を指定した実行器で動かす非同期関数へ変換するデコレーター
+
+    重い処理がFastAPIの既定のスレッドを占有しないようにする
+
+    Args:
+        executor (Executor): 処理を実行する実行器
+
+    Returns:
+        Callable[[Callable[_P, _T]], Callable[_P, Awaitable[_T]]]: デコレーター
+    """
+
+    def decorator(fn: Callable[_P, _T]) -> Callable[_P, Awaitable[_T]]:
+        @wraps(fn)
+        async def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _T:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                executor, partial(fn, *args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorator
+
+
+class ThreadPool(Executor):
+    """終了した後も、次に使われた時に作り直すスレッドプール
+
+    アプリケーションを同じプロセスで再び起動しても使えるようにする
+    """
+
+    def __init__(
+        self: "ThreadPool", max_workers: int, thread_name_prefix: str = ""
+    ) -> None:
+        """スレッドプールを作成する
+
+        Args:
+            max_workers (int): スレッドの最大数
+            thread_name_prefix (str, optional): スレッド名の接頭辞
+        """
+        if max_workers < 1:
+            msg = "max_workers must be greater than 0"
+            raise ValueError(msg)
+        self._max_workers = max_workers
+        self._thread_name_prefix = thread_name_prefix
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self: "ThreadPool") -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self._max_workers,
+                    thread_name_prefix=self._thread_name_prefix,
+                )
+            return self._executor
+
+    def submit(
+        self: "ThreadPool",
+        fn: Callable[_P, _T],
+        /,
+        *args: _P.args,
+        **kwargs: _P.kwargs,
+    ) -> "Future[_T]":
+        """処理をスレッドへ送る
+
+        Args:
+            fn (Callable[_P, _T]): 実行する関数
+            *args: 関数の引数
+            **kwargs: 関数のキーワード引数
+
+        Returns:
+            Future[_T]: 実行結果
+        """
+        return self._get_executor().submit(fn, *args, **kwargs)
+
+    def shutdown(
+        self: "ThreadPool",
+        wait: bool = True,  # noqa: FBT001, FBT002
+        *,
+        cancel_futures: bool = False,
+    ) -> None:
+        """全てのスレッドを終了する
+
+        Args:
+            wait (bool): 実行中の処理の完了を待つかどうか
+            cancel_futures (bool): 実行前の処理を取り消すかどうか
+        """
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+class WorkerPool:
+    """起動済みのプロセスを使い回すワーカープール"""
+
+    def __init__(
+        self: "WorkerPool",
+        max_workers: int,
+        *,
+        initializer: Callable[[], None] | None = None,
+    ) -> None:
+        """ワーカープールを作成する
+
+        Args:
+            max_workers (int): ワーカーの最大数
+            initializer (Callable[[], None] | None): ワーカーの初期化処理
+        """
+        if max_workers < 1:
+            msg = "max_workers must be greater than 0"
+            raise ValueError(msg)
+        self._max_workers = max_workers
+        self._initializer = initializer
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def max_workers(self: "WorkerPool") -> int:
+        return self._max_workers
+
+    def _get_executor(self: "WorkerPool") -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._max_workers,
+                    mp_context=mp.get_context("spawn"),
+                    initializer=self._initializer,
+                )
+            return self._executor
+
+    def _discard(self: "WorkerPool", executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            # 他のスレッドが既に作り直していれば何もしない
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def start(self: "WorkerPool") -> None:
+        """全てのワーカーを起動して初期化を済ませる"""
+        executor = self._get_executor()
+        for _ in range(self._max_workers):
+            executor.submit(_ping)
+
+    def submit(
+        self: "WorkerPool",
+        fn: Callable[_P, _T],
+        /,
+        *args: _P.args,
+        **kwargs: _P.kwargs,
+    ) -> "Future[_T]":
+        """処理をワーカーへ送る
+
+        Args:
+            fn (Callable[_P, _T]): 実行する関数
+            *args: 関数の引数
+            **kwargs: 関数のキーワード引数
+
+        Returns:
+            Future[_T]: 実行結果
+        """
+        executor = self._get_executor()
+        try:
+            return executor.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            self._discard(executor)
+            return self._get_executor().submit(fn, *args, **kwargs)
+
+    def run(
+        self: "WorkerPool",
+        fn: Callable[_P, _T],
+        /,
+        *args: _P.args,
+        **kwargs: _P.kwargs,
+    ) -> _T:
+        """処理をワーカーで実行し、完了を待つ
+
+        ワーカーが異常終了した場合はプールを作り直して一度だけ再実行する
+
+        Args:
+            fn (Callable[_P, _T]): 実行する関数
+            *args: 関数の引数
+            **kwargs: 関数のキーワード引数
+
+        Returns:
+            _T: 関数の戻り値
+        """
+        executor = self._get_executor()
+        try:
+            return executor.submit(fn, *args, **kwargs).result()
+        except BrokenProcessPool:
+            self._discard(executor)
+        return self._get_executor().submit(fn, *args, **kwargs).result()
+
+    def resize(self: "WorkerPool", max_workers: int) -> None:
+        """ワーカーの最大数を変更する
+
+        実行中の処理が終わり次第、古いワーカーは終了する
+
+        Args:
+            max_workers (int): ワーカーの最大数
+        """
+        if max_workers < 1:
+            msg = "max_workers must be greater than 0"
+            raise ValueError(msg)
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+            self._max_workers = max_workers
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def shutdown(self: "WorkerPool", *, wait: bool = True) -> None:
+        """全てのワーカーを終了する
+
+        Args:
+            wait (bool): 実行中の処理の完了を待つかどうか
+        """
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+render_pool = WorkerPool(
+    int(os.environ.get("RENDER_WORKERS", "2")), initializer=warm_up
+)
+
+check_pool = WorkerPool(
+    int(os.environ.get("CHECK_WORKERS", str(os.cpu_count() or 1)))
+)
+
+# polarsはGILを解放するため、データフレームを転送せずスレッドで計算する
+compute_executor = ThreadPool(
+    int(os.environ.get("COMPUTE_WORKERS", "2")), thread_name_prefix="compute"
+)
+
+# 描画プロセスの完了やファイルの読み書きを待つ処理を動かす
+io_executor = ThreadPool(
+    int(os.environ.get("IO_WORKERS", "8")), thread_name_prefix="io"
+)
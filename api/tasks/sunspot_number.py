@@ -11,45 +11,32 @@ from api.libs.sunspot_number_config import (
     SunspotNumberHemispheric,
     SunspotNumberWholeDisk,
 )
+from api.tasks.utils import fig_to_bytes
 
 
 def draw_sunspot_number_whole_disk(
     data_path: str,
     config_path: str,
-    output_path: str,
     *,
     fmt: str = "png",
     dpi: int | None = None,
-) -> None:
+) -> bytes:
     df = pl.read_parquet(Path(data_path))
     with Path(config_path).open("r") as f_config:
         config = SunspotNumberWholeDisk(**json.load(f_config))
     fig = sunspot_number.draw_sunspot_number_whole_disk(df, config)
-    fig.savefig(
-        Path(output_path),
-        format=fmt,
-        dpi=dpi if dpi is not None else "figure",
-        bbox_inches="tight",
-        pad_inches=0.1,
-    )
+    return fig_to_bytes(fig, fmt=fmt, dpi=dpi)
 
 
 def draw_sunspot_number_hemispheric(
     data_path: str,
     config_path: str,
-    output_path: str,
     *,
     fmt: str = "png",
     dpi: int | None = None,
-) -> None:
+) -> bytes:
     df = pl.read_parquet(Path(data_path))
     with Path(config_path).open("r") as f_config:
         config = SunspotNumberHemispheric(**json.load(f_config))
     fig = sunspot_number.draw_sunspot_number_hemispheric(df, config)
-    fig.savefig(
-        Path(output_path),
-        format=fmt,
-        dpi=dpi if dpi is not None else "figure",
-        bbox_inches="tight",
-        pad_inches=0.1,
-    )
+    return fig_to_bytes(fig, fmt=fmt, dpi=dpi)
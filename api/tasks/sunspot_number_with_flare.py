@@ -11,17 +11,17 @@ from api.libs.sunspot_number_with_flare_config import (
     SunspotNumberWithFlare,
     SunspotNumberWithFlareHemispheric,
 )
+from api.tasks.utils import fig_to_bytes
 
 
-def draw_sunspot_number_with_flare(  # noqa: PLR0913
+def draw_sunspot_number_with_flare(
     data_path: str,
     factors_path: str | None,
     config_path: str,
-    output_path: str,
     *,
     fmt: str = "png",
     dpi: int | None = None,
-) -> None:
+) -> bytes:
     df = pl.read_parquet(Path(data_path))
     if factors_path is not None:
         with Path(factors_path).open("r") as f_factors:
@@ -34,24 +34,17 @@ def draw_sunspot_number_with_flare(  # noqa: PLR0913
     fig = sunspot_number_with_flare.draw_sunspot_number_with_flare(
         df, config, factor=factor
     )
-    fig.savefig(
-        Path(output_path),
-        format=fmt,
-        dpi=dpi if dpi is not None else "figure",
-        bbox_inches="tight",
-        pad_inches=0.1,
-    )
+    return fig_to_bytes(fig, fmt=fmt, dpi=dpi)
 
 
-def draw_sunspot_number_with_flare_hemispheric(  # noqa: PLR0913
+def draw_sunspot_number_with_flare_hemispheric(
     data_path: str,
     factors_path: str | None,
     config_path: str,
-    output_path: str,
     *,
     fmt: str = "png",
     dpi: int | None = None,
-) -> None:
+) -> bytes:
     df = pl.read_parquet(Path(data_path))
     if factors_path is not None:
         with Path(factors_path).open("r") as f_factors:
@@ -66,10 +59,4 @@ def draw_sunspot_number_with_flare_hemispheric(  # noqa: PLR0913
     fig = sunspot_number_with_flare.draw_sunspot_number_with_flare_hemispheric(
         df, config, factor_north=factor_north, factor_south=factor_south
     )
-    fig.savefig(
-        Path(output_path),
-        format=fmt,
-        dpi=dpi if dpi is not None else "figure",
-        bbox_inches="tight",
-        pad_inches=0.1,
-    )
+    return fig_to_bytes(fig, fmt=fmt, dpi=dpi)
@@ -0,0 +1,20 @@
+from io import BytesIO
+
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+
+
+def fig_to_bytes(fig: Figure, *, fmt: str, dpi: int | None) -> bytes:
+    # ワーカーは使い回されるため、書き出し後に図を破棄する
+    buf = BytesIO()
+    try:
+        fig.savefig(
+            buf,
+            format=fmt,
+            dpi=dpi if dpi is not None else "figure",
+            bbox_inches="tight",
+            pad_inches=0.1,
+        )
+    finally:
+        plt.close(fig)
+    return buf.getvalue()
@@ -1,4 +1,6 @@
+import hashlib
 from datetime import date
+from pathlib import Path
 from random import sample
 
 import polars as pl
@@ -274,3 +276,67 @@ def test_sort_ar_row_order(
     assert_frame_equal(
         df_out, df_expected, check_column_order=False, check_row_order=True
     )
+
+
+def test_fingerprint_file(tmp_path: Path) -> None:
+    path = tmp_path / "data.csv"
+    path.write_text("date,no\n")
+    file = agg.fingerprint_file(path)
+    assert file.path == str(path)
+    assert file.size == 8
+    assert file.digest == hashlib.sha256(b"date,no\n").hexdigest()
+
+
+def test_fingerprint_file_reuse(tmp_path: Path) -> None:
+    path = tmp_path / "data.csv"
+    path.write_text("date,no\n")
+    previous = agg.fingerprint_file(path)
+    # 大きさと更新日時が同じならば内容を読まずに使い回す
+    stale = agg.SourceFile(
+        path=previous.path,
+        size=previous.size,
+        mtime=previous.mtime,
+        digest="stale",
+    )
+    assert agg.fingerprint_file(path, stale) is stale
+    path.write_text("date,num\n")
+    assert agg.fingerprint_file(path, stale).digest != "stale"
+
+
+def test_manifest(tmp_path: Path) -> None:
+    path = tmp_path / "out.manifest.json"
+    assert agg.load_manifest(path) == []
+    files = [
+        agg.SourceFile(path="a.csv", size=1, mtime=2, digest="x"),
+        agg.SourceFile(path="b.csv", size=3, mtime=4, digest="y"),
+    ]
+    agg.save_manifest(path, files)
+    assert agg.load_manifest(path) == files
+
+
+@pytest.mark.parametrize(
+    ("in_previous", "in_current", "out_appended"),
+    [
+        pytest.param([], [("a", "x")], True),
+        pytest.param([("a", "x")], [("a", "x")], True),
+        pytest.param([("a", "x")], [("a", "x"), ("b", "y")], True),
+        pytest.param([("a", "x")], [("a", "z"), ("b", "y")], False),
+        pytest.param([("a", "x")], [("b", "y"), ("a", "x")], False),
+        pytest.param([("a", "x"), ("b", "y")], [("a", "x")], False),
+    ],
+)
+def test_is_appended(
+    in_previous: list[tuple[str, str]],
+    in_current: list[tuple[str, str]],
+    out_appended: bool,
+) -> None:
+    def to_files(items: list[tuple[str, str]]) -> list[agg.SourceFile]:
+        return [
+            agg.SourceFile(path=path, size=0, mtime=0, digest=digest)
+            for path, digest in items
+        ]
+
+    assert (
+        agg.is_appended(to_files(in_previous), to_files(in_current))
+        == out_appended
+    )
@@ -1,8 +1,10 @@
 from datetime import date
 
+import numpy as np
 import polars as pl
 import pytest
 from polars.testing import assert_frame_equal
+from pytest_mock import MockerFixture
 
 from api.libs import butterfly
 
@@ -268,6 +270,75 @@ def test_adjust_dates(
     assert end == out_end
 
 
+@pytest.mark.parametrize(
+    ("in_start", "in_end", "in_delta", "out_start", "out_end"),
+    [
+        (
+            date(2002, 3, 3),
+            date(2003, 1, 4),
+            butterfly.DateDelta(days=1),
+            date(2002, 3, 3),
+            date(2003, 1, 4),
+        ),
+        (
+            date(2002, 3, 3),
+            date(2003, 1, 4),
+            butterfly.DateDelta(months=1),
+            date(2002, 3, 1),
+            date(2003, 1, 1),
+        ),
+        (
+            date(2002, 3, 3),
+            date(2003, 1, 4),
+            butterfly.DateDelta(years=1),
+            date(2002, 1, 1),
+            date(2003, 1, 1),
+        ),
+    ],
+)
+def test_align_dates(
+    in_start: date,
+    in_end: date,
+    in_delta: butterfly.DateDelta,
+    out_start: date,
+    out_end: date,
+) -> None:
+    start, end = butterfly.align_dates(in_start, in_end, in_delta)
+    assert start == out_start
+    assert end == out_end
+
+
+@pytest.mark.parametrize(
+    ("in_delta", "out_end"),
+    [
+        (butterfly.DateDelta(days=1), date(2003, 1, 4)),
+        (butterfly.DateDelta(days=7), date(2003, 1, 2)),
+    ],
+)
+def test_align_dates_level(
+    in_delta: butterfly.DateDelta, out_end: date
+) -> None:
+    df_in = pl.LazyFrame(
+        {
+            "date": [date(2002, 12, 20), date(2003, 1, 4)],
+            "lat_min": [10, -20],
+            "lat_max": [15, -15],
+        },
+        schema={"date": pl.Date, "lat_min": pl.Int8, "lat_max": pl.Int8},
+    )
+    interval = in_delta.to_interval()
+    start, end = butterfly.align_dates(
+        *butterfly.calc_date_limit(df_in), in_delta
+    )
+    df_out = butterfly.fill_lat(
+        butterfly.agg_lat(df_in, interval), start, end, interval
+    ).collect()
+
+    # 最後の月の途中までのデータも集計に含まれる
+    assert df_out["date"].max() == out_end
+    assert df_out.filter(pl.col("date") == out_end)["min"].to_list() == [[-20]]
+
+
 @pytest.mark.parametrize(
     (
         "in_date",
@@ -442,3 +513,89 @@ def test_calc_lat() -> None:
     )
     df_out = butterfly.calc_lat(df_in, info)
     assert_frame_equal(df_out, df_expected)
+
+
+@pytest.mark.parametrize(
+    ("in_fine", "in_coarse", "out_result"),
+    [
+        ("1mo", "3mo", True),
+        ("1mo", "1y", True),
+        ("3mo", "1y", True),
+        ("1d", "7d", True),
+        ("2mo", "3mo", False),
+        ("7d", "1mo", False),
+        ("1y", "3mo", False),
+    ],
+)
+def test_can_derive_lat(
+    in_fine: str, in_coarse: str, out_result: bool
+) -> None:
+    df_in = pl.DataFrame(
+        {
+            "date": pl.date_range(
+                date(2020, 1, 1), date(2022, 12, 31), "1d", eager=True
+            )
+        }
+    ).select(pl.col("date").dt.truncate(in_fine).unique())
+    assert butterfly.can_derive_lat(df_in, in_fine, in_coarse) is out_result
+
+
+def test_derive_lat() -> None:
+    df_in = pl.LazyFrame(
+        {
+            "date": [date(2020, 1, 1), date(2020, 2, 1), date(2020, 4, 1)],
+            "min": [[1, 2], [3], [4]],
+            "max": [[5, 6], [7], [8]],
+        },
+        schema={
+            "date": pl.Date,
+            "min": pl.List(pl.Int8),
+            "max": pl.List(pl.Int8),
+        },
+    )
+    df_expected = pl.LazyFrame(
+        {
+            "date": [date(2020, 1, 1), date(2020, 4, 1)],
+            "min": [[1, 2, 3], [4]],
+            "max": [[5, 6, 7], [8]],
+        },
+        schema={
+            "date": pl.Date,
+            "min": pl.List(pl.Int8),
+            "max": pl.List(pl.Int8),
+        },
+    )
+    df_out = butterfly.derive_lat(df_in.sort("date"), "3mo").sort("date")
+    assert_frame_equal(df_out, df_expected)
+
+
+def test_agg_lat_levels(mocker: MockerFixture) -> None:
+    rng = np.random.default_rng(0)
+    size = 2000
+    df_in = pl.LazyFrame(
+        {
+            "date": pl.Series(rng.integers(0, 365 * 30, size)).cast(pl.Date),
+            "lat_min": rng.integers(-40, 40, size),
+            "lat_max": rng.integers(-40, 40, size),
+        },
+        schema={"date": pl.Date, "lat_min": pl.Int8, "lat_max": pl.Int8},
+    )
+    intervals = [
+        butterfly.DateDelta(years=1),
+        butterfly.DateDelta(months=3),
+        butterfly.DateDelta(months=1),
+        butterfly.DateDelta(months=6),
+        butterfly.DateDelta(days=7),
+    ]
+    spy = mocker.spy(butterfly, "agg_lat")
+    levels = butterfly.agg_lat_levels(df_in, intervals)
+
+    # 黒点群データは月と週の集計にのみ使われる
+    assert sorted(call.args[1] for call in spy.call_args_list) == ["1mo", "7d"]
+    assert set(levels) == set(intervals)
+    for delta, df_out in levels.items():
+        df_expected = butterfly.agg_lat(df_in, delta.to_interval())
+        assert_frame_equal(
+            df_out.explode("min", "max").sort(pl.all()),
+            df_expected.explode("min", "max").sort(pl.all()).collect(),
+        )
@@ -144,3 +144,38 @@ def test_create_image(
     )
     out = butterfly_image.create_image(df_in, info)
     np.testing.assert_equal(out, out_img)
+
+
+def test_create_image_same_as_create_line() -> None:
+    rng = np.random.default_rng(0)
+    lat_min, lat_max = -30, 40
+    data_min: list[list[int]] = []
+    data_max: list[list[int]] = []
+    for _ in range(200):
+        n = rng.integers(0, 5)
+        # 範囲外や最小値と最大値が逆転した区間も含める
+        lats = rng.integers(-60, 60, size=(2, n))
+        data_min.append(lats[0].tolist())
+        data_max.append((lats[0] + rng.integers(-5, 20, size=n)).tolist())
+    df_in = pl.DataFrame(
+        {"min": data_min, "max": data_max},
+        schema={"min": pl.List(pl.Int8), "max": pl.List(pl.Int8)},
+    )
+    info = butterfly.ButterflyInfo(
+        lat_min,
+        lat_max,
+        date(2020, 2, 2),
+        date(2020, 2, 2),
+        butterfly.DateDelta(days=1),
+    )
+    expected = np.hstack(
+        [
+            butterfly_image.create_line(
+                row_min, row_max, lat_min, lat_max
+            ).reshape(-1, 1)
+            for row_min, row_max in zip(data_min, data_max, strict=True)
+        ]
+    )
+    out = butterfly_image.create_image(df_in, info)
+    assert out.dtype == np.uint8
+    np.testing.assert_equal(out, expected)
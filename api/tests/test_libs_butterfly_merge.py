@@ -1,10 +1,16 @@
 from datetime import date
+from pathlib import Path
 
 import numpy as np
 import polars as pl
 import pytest
 
-from api.libs import butterfly, butterfly_config, butterfly_merge
+from api.libs import (
+    butterfly,
+    butterfly_config,
+    butterfly_image,
+    butterfly_merge,
+)
 
 
 def test_merge_info() -> None:
@@ -161,6 +167,61 @@ def test_create_merged_image(
     np.testing.assert_equal(out, out_img)
 
 
+def test_create_merged_image_same_as_each_layer() -> None:
+    rng = np.random.default_rng(0)
+    info = butterfly.ButterflyInfo.from_dict(
+        {
+            "lat_min": -20,
+            "lat_max": 20,
+            "date_start": "2020-01-01",
+            "date_end": "2020-03-31",
+            "date_interval": "P1D",
+        }
+    )
+    dfl: list[pl.DataFrame] = []
+    for _ in range(16):
+        dates = pl.date_range(
+            date(2019, 12, 1), date(2020, 4, 30), "1d", eager=True
+        ).sample(fraction=0.5, seed=int(rng.integers(1000)))
+        counts = rng.integers(0, 4, dates.len())
+        # 同じ層の中で重なる区間や範囲外の区間も含める
+        data_min = [rng.integers(-30, 30, n).tolist() for n in counts]
+        data_max = [
+            [lat + int(rng.integers(0, 10)) for lat in lats]
+            for lats in data_min
+        ]
+        dfl.append(
+            pl.DataFrame(
+                {"date": dates, "min": data_min, "max": data_max},
+                schema={
+                    "date": pl.Date,
+                    "min": pl.List(pl.Int8),
+                    "max": pl.List(pl.Int8),
+                },
+            )
+        )
+    expected = np.zeros(
+        (
+            butterfly_merge.calc_lat_size(info),
+            butterfly_merge.calc_date_size(info),
+        ),
+        dtype=np.uint16,
+    )
+    for i, df in enumerate(dfl):
+        df_filled = butterfly.fill_lat(
+            df.lazy(),
+            info.date_start,
+            info.date_end,
+            info.date_interval.to_interval(),
+        ).collect()
+        expected |= butterfly_image.create_image(df_filled, info).astype(
+            np.uint16
+        ) << np.uint16(i)
+    out = butterfly_merge.create_merged_image(dfl, info)
+    assert out.dtype == np.uint16
+    np.testing.assert_equal(out, expected)
+
+
 @pytest.mark.parametrize(
     ("in_img", "in_cmap", "out_img"),
     [
@@ -205,3 +266,36 @@ def test_create_color_image(
         butterfly_config.ColorMap(cmap=in_cmap),
     )
     np.testing.assert_equal(out, out_img)
+
+
+@pytest.mark.parametrize("in_colors", [0, 1, 3, 15])
+def test_create_color_image_same_as_mask(in_colors: int) -> None:
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 1 << 4, (41, 100), dtype=np.uint16)
+    cmap = butterfly_config.ColorMap(
+        cmap=[
+            butterfly_config.Color(red=r, green=g, blue=b)
+            for r, g, b in rng.integers(0, 0x100, (in_colors, 3))
+        ]
+    )
+    expected = np.full((*img.shape, 3), 0xFF, dtype=np.uint8)
+    for i, c in enumerate(cmap.cmap, 1):
+        expected[img == i] = (c.red, c.green, c.blue)
+    np.testing.assert_equal(
+        butterfly_merge.create_color_image(img, cmap), expected
+    )
+
+
+def test_create_color_image_file(tmp_path: Path) -> None:
+    img = np.array([[0, 1], [2, 3]], dtype=np.uint16)
+    cmap = butterfly_config.ColorMap(
+        cmap=[
+            butterfly_config.Color(red=0xFF, green=0x00, blue=0x00),
+            butterfly_config.Color(red=0x00, green=0xFF, blue=0x00),
+        ]
+    )
+    path = tmp_path / "img.npy"
+    out = butterfly_merge.create_color_image_file(img, cmap, path)
+    expected = butterfly_merge.create_color_image(img, cmap)
+    np.testing.assert_equal(out, expected)
+    np.testing.assert_equal(np.load(path), expected)
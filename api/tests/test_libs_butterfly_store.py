@@ -0,0 +1,90 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from api.libs import butterfly_config, butterfly_merge, butterfly_store
+
+
+@pytest.mark.parametrize("in_fmt", ["npz", "npy"])
+def test_save_image(
+    tmp_path: Path, in_fmt: butterfly_store.ImageFormat
+) -> None:
+    img = np.arange(12, dtype=np.uint16).reshape(3, 4)
+    path = butterfly_store.save_image(tmp_path / "img", img, in_fmt)
+    assert path == tmp_path / f"img.{in_fmt}"
+    assert butterfly_store.find_image(tmp_path / "img") == path
+    out = butterfly_store.load_image(path)
+    assert out.dtype == np.uint16
+    np.testing.assert_equal(out, img)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [path.name]
+
+
+def test_save_image_replace_format(tmp_path: Path) -> None:
+    img = np.ones((2, 2), dtype=np.uint8)
+    butterfly_store.save_image(tmp_path / "img", img, "npz")
+    path = butterfly_store.save_image(tmp_path / "img", img * 2, "npy")
+    assert not (tmp_path / "img.npz").exists()
+    assert butterfly_store.find_image(tmp_path / "img") == path
+    np.testing.assert_equal(butterfly_store.load_image(path), img * 2)
+
+
+def test_load_image_mmap(tmp_path: Path) -> None:
+    img = np.ones((2, 2), dtype=np.uint8)
+    path = butterfly_store.save_image(tmp_path / "img", img, "npy")
+    assert isinstance(butterfly_store.load_image(path), np.memmap)
+
+
+@pytest.mark.parametrize("in_rows", [1, 7, 8, 9, 181])
+def test_save_image_bits(tmp_path: Path, in_rows: int) -> None:
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 2, (in_rows, 50), dtype=np.uint8)
+    path = butterfly_store.save_image(tmp_path / "img", img, "bits")
+    assert path == tmp_path / "img.npb"
+    assert butterfly_store.find_image(tmp_path / "img") == path
+    out = butterfly_store.load_image(path)
+    assert out.dtype == np.uint8
+    np.testing.assert_equal(out, img)
+    with np.load(path) as f:
+        assert f["bits"].shape == ((in_rows + 7) // 8, 50)
+
+
+def test_pack_image_not_binary() -> None:
+    with pytest.raises(ValueError, match="binary"):
+        butterfly_store.pack_image(np.array([[0, 1], [2, 0]], dtype=np.uint8))
+
+
+def test_find_image_not_found(tmp_path: Path) -> None:
+    assert butterfly_store.find_image(tmp_path / "img") is None
+
+
+@pytest.mark.parametrize("in_fmt", ["npz", "npy"])
+def test_save_color_image(
+    tmp_path: Path, in_fmt: butterfly_store.ArrayFormat
+) -> None:
+    img = np.array([[0, 1], [2, 3]], dtype=np.uint16)
+    cmap = butterfly_config.ColorMap(
+        cmap=[
+            butterfly_config.Color(red=0xFF, green=0x00, blue=0x00),
+            butterfly_config.Color(red=0x00, green=0xFF, blue=0x00),
+        ]
+    )
+    path = butterfly_store.save_color_image(
+        tmp_path / "img", img, cmap, in_fmt
+    )
+    np.testing.assert_equal(
+        butterfly_store.load_image(path),
+        butterfly_merge.create_color_image(img, cmap),
+    )
+    assert sorted(p.name for p in tmp_path.iterdir()) == [path.name]
+
+
+@pytest.mark.parametrize("in_fmt", ["npz", "npy", "bits"])
+def test_image_format(in_fmt: butterfly_store.ImageFormat) -> None:
+    path = butterfly_store.image_path(Path("img"), in_fmt)
+    assert butterfly_store.image_format(path) == in_fmt
+
+
+def test_image_format_unknown() -> None:
+    with pytest.raises(ValueError, match="unknown"):
+        butterfly_store.image_format(Path("img.png"))
@@ -0,0 +1,94 @@
+from io import BytesIO
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from api.libs import butterfly_tile
+
+
+@pytest.mark.parametrize(
+    ("in_factor", "out_img"),
+    [
+        (1, [[0, 1, 0], [0, 0, 2], [4, 0, 0]]),
+        (2, [[1, 2], [4, 0]]),
+        (3, [[7]]),
+        (4, [[7]]),
+    ],
+)
+def test_downsample(in_factor: int, out_img: list[list[int]]) -> None:
+    img = np.array([[0, 1, 0], [0, 0, 2], [4, 0, 0]], dtype=np.uint16)
+    out = butterfly_tile.downsample(img, in_factor)
+    assert out.dtype == np.uint16
+    np.testing.assert_equal(out, out_img)
+
+
+def test_downsample_color() -> None:
+    img = np.full((3, 3, 3), 0xFF, dtype=np.uint8)
+    img[0, 1] = (0xFF, 0x00, 0x00)
+    out = butterfly_tile.downsample(img, 2)
+    np.testing.assert_equal(
+        out,
+        [
+            [[0xFF, 0x00, 0x00], [0xFF, 0xFF, 0xFF]],
+            [[0xFF, 0xFF, 0xFF], [0xFF, 0xFF, 0xFF]],
+        ],
+    )
+
+
+@pytest.mark.parametrize(
+    ("in_zoom", "in_x", "in_y", "out_tile"),
+    [
+        (0, 0, 0, [[1, 0], [0, 0]]),
+        (1, 0, 0, [[1, 1], [0, 0]]),
+        (1, 1, 0, [[0, 0], [0, 0]]),
+        (2, 0, 0, [[1, 0], [0, 0]]),
+        (2, 1, 0, [[0, 0], [0, 1]]),
+        (3, 3, 1, [[1, 0], [0, 0]]),
+        (3, 4, 1, [[0, 0], [0, 0]]),
+    ],
+)
+def test_create_tile(
+    in_zoom: int, in_x: int, in_y: int, out_tile: list[list[int]]
+) -> None:
+    img = np.zeros((3, 9), dtype=np.uint8)
+    img[0, 0] = 1
+    img[2, 6] = 1
+    out = butterfly_tile.create_tile(img, in_zoom, in_x, in_y, tile_size=2)
+    np.testing.assert_equal(out, out_tile)
+
+
+@pytest.mark.parametrize(
+    ("in_zoom", "in_x", "in_y"),
+    [(-1, 0, 0), (4, 0, 0), (3, 5, 0), (3, 0, 2), (0, -1, 0)],
+)
+def test_create_tile_out_of_range(in_zoom: int, in_x: int, in_y: int) -> None:
+    img = np.zeros((3, 9), dtype=np.uint8)
+    with pytest.raises(ValueError, match=r"zoom|range"):
+        butterfly_tile.create_tile(img, in_zoom, in_x, in_y, tile_size=2)
+
+
+def test_create_tile_same_as_downsample() -> None:
+    rng = np.random.default_rng(0)
+    img = (rng.random((181, 3000)) < 0.01).astype(np.uint8)
+    zoom = 2
+    height, width = img.shape
+    max_zoom = butterfly_tile.calc_max_zoom(height, width)
+    expected = butterfly_tile.downsample(img, 1 << (max_zoom - zoom))
+    rows, cols = butterfly_tile.calc_tile_count(height, width, zoom)
+    out = np.block(
+        [
+            [butterfly_tile.create_tile(img, zoom, x, y) for x in range(cols)]
+            for y in range(rows)
+        ]
+    )
+    np.testing.assert_equal(
+        out[: expected.shape[0], : expected.shape[1]], expected
+    )
+
+
+@pytest.mark.parametrize("in_shape", [(4, 4), (4, 4, 3)])
+def test_tile_to_png(in_shape: tuple[int, ...]) -> None:
+    tile = np.zeros(in_shape, dtype=np.uint8)
+    out = plt.imread(BytesIO(butterfly_tile.tile_to_png(tile, "binary")))
+    assert out.shape[:2] == (4, 4)
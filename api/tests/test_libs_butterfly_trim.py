@@ -1,9 +1,12 @@
 from datetime import date
+from pathlib import Path
 
+import numpy as np
 import polars as pl
+import pytest
 from polars.testing import assert_frame_equal
 
-from api.libs import butterfly_trim
+from api.libs import butterfly, butterfly_image, butterfly_trim
 from api.libs.butterfly import ButterflyInfo, DateDelta
 
 
@@ -63,3 +66,135 @@ def test_trim_data() -> None:
     )
     df_out = butterfly_trim.trim_data(df_in, info)
     assert_frame_equal(df_out, df_expected)
+
+
+def test_trim_data_scan(tmp_path: Path) -> None:
+    info = ButterflyInfo(
+        -10, 10, date(1900, 1, 1), date(1999, 12, 1), DateDelta(months=1)
+    )
+    df = butterfly.fill_lat(
+        pl.LazyFrame(
+            {
+                "date": [date(1910, 3, 1), date(1955, 6, 1), date(1990, 1, 1)],
+                "min": [[1], [2, 3], [4]],
+                "max": [[5], [6, 7], [8]],
+            },
+            schema={
+                "date": pl.Date,
+                "min": pl.List(pl.Int8),
+                "max": pl.List(pl.Int8),
+            },
+        ),
+        info.date_start,
+        info.date_end,
+        info.date_interval.to_interval(),
+    ).collect()
+    path = tmp_path / "lat.parquet"
+    butterfly.write_lat(
+        df.sample(fraction=1, shuffle=True, seed=0), path, info
+    )
+    assert_frame_equal(pl.read_parquet(path), df)
+
+    trimmed_info = butterfly_trim.trim_info(
+        info, date_start=date(1950, 1, 1), date_end=date(1954, 12, 1)
+    )
+    df_out = butterfly_trim.trim_data(pl.scan_parquet(path), trimmed_info)
+    assert_frame_equal(df_out, butterfly_trim.trim_data(df, trimmed_info))
+    assert df_out.height == 60
+
+
+def create_lat_data(info: ButterflyInfo, seed: int) -> pl.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pl.date_range(
+        info.date_start,
+        info.date_end,
+        info.date_interval.to_interval(),
+        eager=True,
+    )
+    counts = rng.integers(0, 4, dates.len())
+    lat_min = rng.integers(-40, 40, counts.sum())
+    lat_max = lat_min + rng.integers(0, 10, counts.sum())
+    offsets = np.cumsum(counts)[:-1]
+    return pl.DataFrame(
+        {
+            "date": dates,
+            "min": [x.tolist() for x in np.split(lat_min, offsets)],
+            "max": [x.tolist() for x in np.split(lat_max, offsets)],
+        },
+        schema={
+            "date": pl.Date,
+            "min": pl.List(pl.Int8),
+            "max": pl.List(pl.Int8),
+        },
+    )
+
+
+@pytest.mark.parametrize(
+    ("in_lat_min", "in_lat_max", "in_date_start", "in_date_end", "out_view"),
+    [
+        (-10, 20, date(2003, 5, 1), date(2005, 1, 1), True),
+        (5, 5, None, None, True),
+        (None, None, date(1998, 1, 1), date(2004, 1, 1), False),
+        (-30, 10, None, date(2012, 1, 1), False),
+        (None, None, date(2003, 5, 15), None, False),
+    ],
+)
+def test_trim_image(
+    in_lat_min: int | None,
+    in_lat_max: int | None,
+    in_date_start: date | None,
+    in_date_end: date | None,
+    out_view: bool,
+) -> None:
+    info = ButterflyInfo(
+        -30, 30, date(2000, 1, 1), date(2010, 12, 1), DateDelta(months=1)
+    )
+    df = create_lat_data(info, 0)
+    img = butterfly_image.create_image(df, info)
+    trimmed_info = butterfly_trim.trim_info(
+        info, in_lat_min, in_lat_max, in_date_start, in_date_end
+    )
+    expected = butterfly_image.create_image(
+        butterfly_trim.trim_data(df, trimmed_info), trimmed_info
+    )
+    out = butterfly_trim.trim_image(img, info, trimmed_info)
+    np.testing.assert_equal(out, expected)
+    assert np.shares_memory(out, img) is out_view
+
+
+def test_trim_image_color() -> None:
+    info = ButterflyInfo(
+        0, 1, date(2020, 1, 1), date(2020, 2, 1), DateDelta(months=1)
+    )
+    img = np.zeros((3, 2, 3), dtype=np.uint8)
+    trimmed_info = butterfly_trim.trim_info(info, date_end=date(2020, 3, 1))
+    out = butterfly_trim.trim_image(img, info, trimmed_info)
+    np.testing.assert_equal(out[:, :2], 0)
+    np.testing.assert_equal(out[:, 2], 0xFF)
+
+
+@pytest.mark.parametrize(
+    ("in_lat_min", "in_lat_max", "in_interval"),
+    [
+        (-40, None, DateDelta(months=1)),
+        (None, 31, DateDelta(months=1)),
+        (None, None, DateDelta(months=3)),
+    ],
+)
+def test_trim_image_with_error(
+    in_lat_min: int | None, in_lat_max: int | None, in_interval: DateDelta
+) -> None:
+    info = ButterflyInfo(
+        -30, 30, date(2000, 1, 1), date(2010, 12, 1), DateDelta(months=1)
+    )
+    trimmed_info = ButterflyInfo(
+        in_lat_min if in_lat_min is not None else info.lat_min,
+        in_lat_max if in_lat_max is not None else info.lat_max,
+        info.date_start,
+        info.date_end,
+        in_interval,
+    )
+    with pytest.raises(ValueError, match=r"latitude|interval"):
+        butterfly_trim.trim_image(
+            np.zeros((121, 132), dtype=np.uint8), info, trimmed_info
+        )
@@ -0,0 +1,189 @@
+import os
+from pathlib import Path
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+from pytest_mock import MockerFixture
+
+from api.libs import cache
+
+
+def test_fingerprint(tmp_path: Path) -> None:
+    path = tmp_path / "data.parquet"
+    path.write_bytes(b"abc")
+    before = cache.fingerprint(path)
+    assert before == cache.fingerprint(path)
+    os.utime(path, ns=(0, 0))
+    assert before != cache.fingerprint(path)
+
+
+@pytest.mark.parametrize(
+    ("in_parts1", "in_parts2", "out_equal"),
+    [
+        pytest.param(("a", "b"), ("a", "b"), True),
+        pytest.param(("a", b"b"), ("a", "b"), True),
+        pytest.param(("a", "b"), ("b", "a"), False),
+        pytest.param(("a", "bc"), ("ab", "c"), False),
+        pytest.param(("a",), ("a", ""), False),
+    ],
+)
+def test_create_key(
+    in_parts1: tuple[str | bytes, ...],
+    in_parts2: tuple[str | bytes, ...],
+    out_equal: bool,
+) -> None:
+    key1 = cache.create_key(*in_parts1)
+    key2 = cache.create_key(*in_parts2)
+    assert (key1 == key2) == out_equal
+
+
+def test_memory_cache() -> None:
+    c: cache.MemoryCache[str, bytes] = cache.MemoryCache(10, len)
+    c.put("a", b"1234")
+    c.put("b", b"1234")
+    assert c.get("a") == b"1234"
+    assert c.nbytes == 8
+    c.put("c", b"1234")
+    assert c.get("a") == b"1234"
+    assert c.get("b") is None
+    assert c.get("c") == b"1234"
+    assert len(c) == 2
+    assert c.nbytes == 8
+
+
+def test_memory_cache_overwrite() -> None:
+    c: cache.MemoryCache[str, bytes] = cache.MemoryCache(10, len)
+    c.put("a", b"1234")
+    c.put("a", b"123456")
+    assert c.get("a") == b"123456"
+    assert c.nbytes == 6
+
+
+def test_memory_cache_too_large() -> None:
+    c: cache.MemoryCache[str, bytes] = cache.MemoryCache(10, len)
+    c.put("a", b"1234")
+    c.put("b", b"12345678901")
+    assert c.get("a") == b"1234"
+    assert c.get("b") is None
+    assert c.nbytes == 4
+
+
+def test_memory_cache_pop() -> None:
+    c: cache.MemoryCache[str, bytes] = cache.MemoryCache(10, len)
+    c.put("a", b"1234")
+    c.put("b", b"12")
+    c.pop("a")
+    c.pop("x")
+    assert "a" not in c
+    assert "b" in c
+    assert c.nbytes == 2
+    c.discard_if(lambda key: key == "b")
+    assert len(c) == 0
+    assert c.nbytes == 0
+
+
+def test_disk_cache(tmp_path: Path) -> None:
+    c = cache.DiskCache(tmp_path / "cache", 10)
+    assert c.get("a") is None
+    c.put("a", b"1234")
+    c.put("b", b"1234")
+    assert c.get("a") == b"1234"
+    c.put("c", b"1234")
+    assert c.get("a") == b"1234"
+    assert c.get("b") is None
+    assert c.get("c") == b"1234"
+    assert c.nbytes == 8
+    assert sorted(path.name for path in (tmp_path / "cache").iterdir()) == [
+        "a.cache",
+        "c.cache",
+    ]
+
+
+def test_disk_cache_reload(tmp_path: Path) -> None:
+    c = cache.DiskCache(tmp_path, 10)
+    c.put("a", b"1234")
+    c.put("b", b"1234")
+    os.utime(tmp_path / "a.cache", ns=(0, 0))
+    c = cache.DiskCache(tmp_path, 10)
+    assert c.nbytes == 8
+    c.put("c", b"1234")
+    assert c.get("a") is None
+    assert c.get("b") == b"1234"
+    assert c.get("c") == b"1234"
+
+
+def test_tiered_cache(tmp_path: Path) -> None:
+    memory: cache.MemoryCache[str, bytes] = cache.MemoryCache(10, len)
+    disk = cache.DiskCache(tmp_path, 100)
+    c = cache.TieredCache(memory, disk)
+    c.put("a", b"1234")
+    c.put("b", b"1234")
+    c.put("c", b"1234")
+    assert "a" not in memory
+    assert c.get("a") == b"1234"
+    assert "a" in memory
+    assert c.get("x") is None
+
+
+def test_tiered_cache_unwritable(tmp_path: Path) -> None:
+    # ファイルの下にはディレクトリを作成できない
+    (tmp_path / "file").touch()
+    memory: cache.MemoryCache[str, bytes] = cache.MemoryCache(10, len)
+    disk = cache.DiskCache(tmp_path / "file" / "cache", 100)
+    c = cache.TieredCache(memory, disk)
+    c.put("a", b"1234")
+    assert disk.get("a") is None
+    assert disk.nbytes == 0
+    assert c.get("a") == b"1234"
+
+
+def test_frame_cache(tmp_path: Path, mocker: MockerFixture) -> None:
+    path = tmp_path / "a.parquet"
+    df_a = pl.DataFrame({"a": [1, 2, 3]})
+    df_a.write_parquet(path)
+    c = cache.FrameCache(1024)
+    spy = mocker.spy(pl, "read_parquet")
+
+    assert_frame_equal(c.read_parquet(path), df_a)
+    assert_frame_equal(c.read_parquet(path), df_a)
+    spy.assert_called_once_with(path)
+
+    # 更新されたファイルは読み直し、古いデータフレームは破棄する
+    df_b = pl.DataFrame({"a": [4, 5, 6, 7]})
+    df_b.write_parquet(path)
+    os.utime(path, ns=(0, 0))
+    assert_frame_equal(c.read_parquet(path), df_b)
+    assert spy.call_count == 2
+    assert len(c) == 1
+    assert c.nbytes == df_b.estimated_size()
+
+    c.invalidate(path)
+    assert len(c) == 0
+    assert_frame_equal(c.read_parquet(path), df_b)
+    assert spy.call_count == 3
+
+
+def test_frame_cache_scan(tmp_path: Path, mocker: MockerFixture) -> None:
+    path = tmp_path / "a.parquet"
+    df = pl.DataFrame({"a": [1, 2, 3]})
+    df.write_parquet(path)
+    c = cache.FrameCache(1024)
+    spy = mocker.spy(pl, "scan_parquet")
+
+    # 保持していない場合はファイルを走査し、キャッシュには追加しない
+    assert_frame_equal(c.scan_parquet(path).collect(), df)
+    spy.assert_called_once_with(path)
+    assert len(c) == 0
+
+    c.read_parquet(path)
+    assert_frame_equal(c.scan_parquet(path).collect(), df)
+    assert spy.call_count == 1
+
+
+def test_frame_cache_too_large(tmp_path: Path) -> None:
+    path = tmp_path / "a.parquet"
+    pl.DataFrame({"a": range(1000)}).write_parquet(path)
+    c = cache.FrameCache(100)
+    assert c.read_parquet(path).height == 1000
+    assert len(c) == 0
@@ -1,4 +1,5 @@
 from datetime import date
+from functools import partial
 
 import polars as pl
 import pytest
@@ -52,6 +53,27 @@ def test_create_expected_group_numbers(in_no: int, out_no: list[int]) -> None:
             [],
             [],
         ),
+        (
+            [date(2020, 8, 20), date(2020, 8, 20), date(2020, 8, 21)],
+            [0, 0, 0],
+            [date(2020, 8, 20)],
+            [[0, 0]],
+            [[1, 2]],
+        ),
+        (
+            [date(2020, 8, 20), date(2020, 8, 20), date(2020, 8, 21)],
+            [3, 2, 1],
+            [date(2020, 8, 20)],
+            [[2, 3]],
+            [[1, 2]],
+        ),
+        (
+            [date(2020, 8, 20), date(2020, 8, 20), date(2020, 8, 21)],
+            [1, None, None],
+            [date(2020, 8, 20), date(2020, 8, 21)],
+            [[None, 1], [None]],
+            [[1], []],
+        ),
     ],
 )
 def test_find_invalid_group_number(
@@ -248,3 +270,57 @@ def test_find_invalid_lon_interval(
     assert_frame_equal(
         df_out, df_expected, check_column_order=False, check_row_order=False
     )
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_find_invalid_all(lazy: bool) -> None:
+    df_in = pl.DataFrame(
+        {
+            "date": [
+                date(2020, 8, 20),
+                date(2020, 8, 20),
+                date(2020, 8, 21),
+                date(2020, 8, 22),
+            ],
+            "no": [1, 1, 1, 1],
+            "lat_min": [-60, 0, 1, 2],
+            "lat_max": [0, 20, 3, 4],
+            "lon_min": [0, -200, 0, 0],
+            "lon_max": [10, 50, 10, 200],
+        },
+        schema={
+            "date": pl.Date,
+            "no": pl.UInt8,
+            "lat_min": pl.Int8,
+            "lat_max": pl.Int8,
+            "lon_min": pl.Int16,
+            "lon_max": pl.Int16,
+        },
+    )
+    df_list_out = check_data.find_invalid_all(
+        df_in.lazy() if lazy else df_in,
+        [
+            check_data.find_invalid_group_number,
+            partial(check_data.find_invalid_lat_range, threshold=50),
+            partial(
+                check_data.find_invalid_lon_range,
+                min_threshold=-180,
+                max_threshold=180,
+            ),
+            partial(check_data.find_invalid_lat_interval, interval=15),
+            partial(check_data.find_invalid_lon_interval, interval=30),
+        ],
+    )
+    df_list_expected = [
+        check_data.find_invalid_group_number(df_in),
+        check_data.find_invalid_lat_range(df_in, 50),
+        check_data.find_invalid_lon_range(df_in, -180, 180),
+        check_data.find_invalid_lat_interval(df_in, 15),
+        check_data.find_invalid_lon_interval(df_in, 30),
+    ]
+    for df_out, df_expected in zip(df_list_out, df_list_expected, strict=True):
+        assert df_out.height > 0
+        assert_frame_equal(
+            df_out.sort("date", maintain_order=True),
+            df_expected.sort("date", maintain_order=True),
+        )
@@ -1,3 +1,7 @@
+from io import StringIO
+from pathlib import Path
+from random import Random
+
 import pytest
 
 from api.libs import check_file
@@ -311,3 +315,82 @@ def test_validate_file(in_file: list[str], result: list[dict]) -> None:
     ret = check_file.validate_file(in_file)
     print(ret)
     assert ret == result
+
+
+@pytest.mark.parametrize(
+    ("in_text", "in_encoding", "in_size", "result"),
+    [
+        ("date,no\n", "ascii", 1024, "utf-8"),
+        ("日付,番号\n", "utf-8", 1024, "utf-8"),
+        ("日付,番号\n", "shift_jis", 1024, "shift_jis"),
+        ("日付,番号\n" * 10, "utf-8", 20, "utf-8"),
+        ("date,no\n" * 10 + "日付,番号\n", "shift_jis", 20, "shift_jis"),
+        ("date,no\n" * 10 + "日付,番号\n", "utf-8", 20, "utf-8"),
+    ],
+)
+def test_guess_encoding(
+    tmp_path: Path, in_text: str, in_encoding: str, in_size: int, result: str
+) -> None:
+    path = tmp_path / "data.csv"
+    path.write_text(in_text, encoding=in_encoding)
+    assert check_file.guess_encoding(path, in_size) == result
+
+
+def test_validate_path(tmp_path: Path) -> None:
+    path = tmp_path / "data.csv"
+    path.write_text(
+        "date,no,lat,lon,num\n2020/8/20,1,N12,E2~5,3\n,2,N3~6,W2,0\n",
+        encoding="shift_jis",
+    )
+    assert check_file.validate_path(path) == [
+        {"type": "field", "line": 3, "fields": ["num"]}
+    ]
+
+
+@pytest.mark.parametrize(
+    "in_text",
+    [
+        "",
+        "\n",
+        "date,no\n",
+        "date,no,lat,lon,num",
+        "date,no,lat,lon,num\n",
+        "date,no,lat,lon,num\n2020/8/20,1,N12,E2~5,3\n,2,N3~6,W2,4\n",
+        "date,no,lat,lon,num\n,1,N12,E2~5,3\n2020/8/20,2,N3~6,W2,4\n",
+        "date,no,lat,lon,num\n2020/8/20,1,N12,E2~5,3\n\n\n,2,N3~6,W2,0\n",
+        "date,no,lat,lon,num\n2020/8/20,1,N12,E2~5,3,foo\n2020/9/2,0,,,,\n",
+        "date,no,lat,lon,num\n2020/8/20,1,N12\n2020/8/21\n2020/8/22,0,,\n",
+        "date,no,lat,lon,num\n2020/8/20,0,,,\n2020/8/21,0,N1,,\n",
+        "date,no,lat,lon,num\n2020/8/20,-1,N1,E1,1\n2020-13-1,x,,,\n",
+        "date,no,lat,lon,num\n2020/8/20,1,nd,ND,1\n2020.2.30,1,S90,w360,1\n",
+        "date,no,lat,lon,num\n0000/1/1,1,N91,E361,1\n2020/1-1,1,0~N6,0~W6,1\n",
+        "date,no,lat,lon,num\n2020 1 1,1,N6~-6,12~W15,1\n",
+        "date,no,lat,lon,num\n2020/2/29,1,m1~p2,+3~-4,1\n",
+        "date,no,lat,lon,num\n2020/2/29,1,1~N6,12~-15,1\n2021/2/29,1,W3,N3,1\n",
+        "date,no,lat,lon,num\n2020/2/29,1,12.3,359.9,01\n2020/2/1,1,1.,E1.5~,1\n",
+        'date,no,lat,lon,num\n2020/8/20,1,"N1,2",E1,1\n',
+        "date,no,lat,lon,num\r\n2020/8/20,1,N1,E1,1\r\n2020/8/20,1,N1,E1,0\r\n",
+        "date,no,lat,lon,num\n2020/\uff18/20,1,N\uff11,E1,1\n",
+    ],
+)
+def test_validate_file_columnar(in_text: str) -> None:
+    expected = check_file.validate_file(StringIO(in_text))
+    assert check_file.validate_file_columnar(in_text) == expected
+
+
+def test_validate_file_columnar_random() -> None:
+    rng = Random(0)  # noqa: S311
+    cells = {
+        "date": ["", "2020/8/20", "2020-8-1", "2020/2/30", "2020/8-1", "x"],
+        "no": ["", "0", "1", "12", "-1", "a"],
+        "lat": ["", "ND", "N12", "s3~4", "m1~p2", "N91", "W3", "0~S6"],
+        "lon": ["", "nd", "E12", "w3~4", "-1~+2", "E361", "N3", "0~E6"],
+        "num": ["", "0", "1", "10", "-1", "b"],
+    }
+    lines = ["date,no,lat,lon,num"]
+    for _ in range(1000):
+        row = [rng.choice(values) for values in cells.values()]
+        lines.append(",".join(row[: rng.choice([2, 5, 5, 5, 6])]))
+    text = "\n".join(lines) + "\n"
+    expected = check_file.validate_file(StringIO(text))
+    assert check_file.validate_file_columnar(text) == expected
@@ -0,0 +1,110 @@
+import os
+from datetime import date
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from api.libs import finder
+
+
+@pytest.fixture
+def search_path(tmp_path: Path) -> Path:
+    path = tmp_path / "data"
+    path.mkdir()
+    (path / "a.csv").write_text(
+        "date,no,lat,lon,num\n"
+        "2020/8/1,1,N1,E1,1\n"
+        ",2,N1,E1,1\n"
+        "2020/8/1,3,N1,E1,1\n"
+        "2020-8-3,1,N1,E1,1\n"
+        "2020/13/1,1,N1,E1,1\n"
+        "2020/2/30,1,N1,E1,1\n"
+    )
+    (path / "b.csv").write_text(
+        "date,no,lat,lon,num\n2020/08/01,1,N1,E1,1\n2020/10/2,1,N1,E1,1\n"
+    )
+    return path
+
+
+@pytest.mark.parametrize(
+    ("in_date", "out_result"),
+    [
+        ((2020, 8, 1), [("a.csv", [2, 4]), ("b.csv", [2])]),
+        ((2020, 8, 3), [("a.csv", [5])]),
+        ((2020, 8, 2), []),
+    ],
+)
+def test_finder_index_find(
+    search_path: Path,
+    in_date: tuple[int, int, int],
+    out_result: list[tuple[str, list[int]]],
+) -> None:
+    index = finder.FinderIndex(search_path)
+    result = index.find(*in_date)
+    assert [(Path(r.path).name, r.lines) for r in result] == out_result
+    assert sorted(result, key=lambda r: r.path) == sorted(
+        finder.finder(search_path, *in_date), key=lambda r: r.path
+    )
+
+
+@pytest.mark.parametrize(
+    ("in_start", "in_end", "out_result"),
+    [
+        (
+            date(2020, 8, 1),
+            date(2020, 12, 31),
+            [("a.csv", [2, 4, 5]), ("b.csv", [2, 3])],
+        ),
+        (date(2020, 8, 2), date(2020, 9, 30), [("a.csv", [5])]),
+        (date(2020, 10, 2), date(2020, 10, 2), [("b.csv", [3])]),
+        (date(2021, 1, 1), date(2021, 12, 31), []),
+        # 存在しない日付の行は期間に含めない
+        (
+            date(2020, 1, 1),
+            date(2021, 12, 31),
+            [("a.csv", [2, 4, 5]), ("b.csv", [2, 3])],
+        ),
+    ],
+)
+def test_finder_index_find_range(
+    search_path: Path,
+    in_start: date,
+    in_end: date,
+    out_result: list[tuple[str, list[int]]],
+) -> None:
+    index = finder.FinderIndex(search_path)
+    result = index.find_range(in_start, in_end)
+    assert [(Path(r.path).name, r.lines) for r in result] == out_result
+
+
+def test_finder_index_refresh(search_path: Path) -> None:
+    index = finder.FinderIndex(search_path)
+    assert len(index.find(2020, 8, 3)) == 1
+    (search_path / "a.csv").write_text("date,no,lat,lon,num\n")
+    (search_path / "c.csv").write_text(
+        "date,no,lat,lon,num\n2020/8/3,1,N1,E1,1\n"
+    )
+    result = index.find(2020, 8, 3)
+    assert [(Path(r.path).name, r.lines) for r in result] == [("c.csv", [2])]
+    (search_path / "c.csv").unlink()
+    assert index.find(2020, 8, 3) == []
+
+
+def test_finder_index_persist(
+    search_path: Path, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    index_path = tmp_path / "cache" / "finder.json"
+    expected = finder.FinderIndex(search_path, index_path).find(2020, 8, 1)
+    assert index_path.exists()
+
+    # 変更の無いファイルは読み直さない
+    spy = mocker.spy(finder, "index_file")
+    assert finder.FinderIndex(search_path, index_path).find(2020, 8, 1) == (
+        expected
+    )
+    spy.assert_not_called()
+
+    os.utime(search_path / "b.csv", ns=(0, 0))
+    finder.FinderIndex(search_path, index_path).find(2020, 8, 1)
+    spy.assert_called_once_with(search_path / "b.csv")
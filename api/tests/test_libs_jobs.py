@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+
+from api.libs import jobs
+
+
+def wait_finished(job: jobs.Job, timeout: float = 5) -> None:
+    end = time.monotonic() + timeout
+    while not job.finished:
+        if time.monotonic() > end:
+            pytest.fail(f"job {job.id} did not finish")
+        time.sleep(0.01)
+
+
+def test_job_manager_done() -> None:
+    manager = jobs.JobManager(1)
+
+    def fn(a: int, *, b: int) -> int:
+        jobs.progress(0.5, "half")
+        return a + b
+
+    job = manager.submit("add", fn, 1, b=2)
+    wait_finished(job)
+    state = job.snapshot()
+    assert state["name"] == "add"
+    assert state["status"] == "done"
+    assert state["progress"] == 1.0
+    assert state["message"] == "half"
+    assert state["result"] == 3
+    assert state["started_at"] is not None
+    assert state["finished_at"] is not None
+    assert manager.get(job.id) is job
+    manager.shutdown()
+
+
+def test_job_manager_failed() -> None:
+    manager = jobs.JobManager(1)
+
+    def fn() -> None:
+        msg = "broken"
+        raise ValueError(msg)
+
+    job = manager.submit("fail", fn)
+    wait_finished(job)
+    assert job.status == "failed"
+    assert job.snapshot()["error"] == "broken"
+    manager.shutdown()
+
+
+def test_job_manager_cancel() -> None:
+    manager = jobs.JobManager(1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def fn() -> None:
+        started.set()
+        release.wait(5)
+        jobs.progress(0.5)
+
+    running = manager.submit("running", fn)
+    pending = manager.submit("pending", fn)
+    started.wait(5)
+    assert running.status == "running"
+    assert pending.status == "pending"
+
+    # 実行前のジョブはすぐに取り消される
+    manager.cancel(pending.id)
+    assert pending.status == "cancelled"
+
+    # 実行中のジョブは次の進捗の報告で中断する
+    manager.cancel(running.id)
+    assert running.status == "running"
+    release.set()
+    wait_finished(running)
+    assert running.status == "cancelled"
+    manager.shutdown()
+
+
+def test_job_manager_max_workers() -> None:
+    manager = jobs.JobManager(2)
+    lock = threading.Lock()
+    current = 0
+    peak = 0
+
+    def fn() -> None:
+        nonlocal current, peak
+        with lock:
+            current += 1
+            peak = max(peak, current)
+        time.sleep(0.05)
+        with lock:
+            current -= 1
+
+    job_list = [manager.submit("sleep", fn) for _ in range(6)]
+    for job in job_list:
+        wait_finished(job)
+    assert peak == 2
+    manager.shutdown()
+
+
+def test_job_manager_prune() -> None:
+    manager = jobs.JobManager(1, max_finished=2)
+    job_list = [manager.submit("noop", lambda: None) for _ in range(4)]
+    for job in job_list:
+        wait_finished(job)
+    assert manager.jobs() == job_list[2:]
+    assert manager.get(job_list[0].id) is None
+    manager.shutdown()
+
+
+def test_job_manager_restart() -> None:
+    manager = jobs.JobManager(1)
+    wait_finished(manager.submit("noop", lambda: None))
+    manager.shutdown()
+
+    # 終了した後も、再び登録したジョブは実行される
+    job = manager.submit("add", lambda: 1 + 2)
+    wait_finished(job)
+    assert job.status == "done"
+    assert job.snapshot()["result"] == 3
+    manager.shutdown()
+
+
+def test_progress_outside_job() -> None:
+    jobs.progress(0.5, "ignored")
@@ -1,6 +1,7 @@
 from datetime import date
 
 import polars as pl
+import pytest
 
 from api.libs import observations_calendar
 
@@ -99,9 +100,64 @@ def test_create_calendar() -> None:
     assert calendar == calendar_expected
 
 
+def test_calc_obs_days() -> None:
+    df_in = pl.LazyFrame(
+        {
+            "date": [
+                date(2020, 7, 31),
+                date(2020, 8, 1),
+                date(2020, 8, 3),
+                date(2020, 8, 3),
+                date(2020, 8, 4),
+            ],
+            "obs": [1, 1, 1, 0, 1],
+        },
+        schema={"date": pl.Date, "obs": pl.UInt8},
+    )
+    dates = [date(2020, 8, d) for d in range(1, 5)]
+    assert observations_calendar.calc_obs_days(df_in, dates) == [1, 0, 0, 1]
+    assert observations_calendar.calc_obs_days(df_in, []) == []
+
+
+def test_create_calendars() -> None:
+    dates = pl.date_range(
+        date(2019, 11, 1), date(2021, 2, 28), "1d", eager=True
+    )
+    df_in = pl.DataFrame(
+        {"date": dates, "obs": [i % 3 % 2 for i in range(dates.len())]},
+        schema={"date": pl.Date, "obs": pl.UInt8},
+    )
+    calendars = observations_calendar.create_calendars(df_in, 2019, 12, 14, 6)
+    assert [(c["year"], c["month"]) for c in calendars] == [
+        (2019, 12),
+        *[(2020, m) for m in range(1, 13)],
+        (2021, 1),
+    ]
+    for calendar in calendars:
+        assert calendar == observations_calendar.create_calendar(
+            df_in, calendar["year"], calendar["month"], 6
+        )
+        for week in calendar["calendar"]:
+            for day in week:
+                df_day = df_in.filter(pl.col("date") == day.date)
+                assert day.obs == df_day.item(0, "obs")
+
+
 def test_print_calendar() -> None:
     df = pl.DataFrame(
         {"date": [], "obs": []}, schema={"date": pl.Date, "obs": pl.UInt8}
     )
     calendar = observations_calendar.create_calendar(df, 2020, 2, 2)
     observations_calendar.print_calendar(calendar)
+
+
+@pytest.mark.parametrize("in_month", [0, 13])
+def test_create_calendars_invalid_month(in_month: int) -> None:
+    df_in = pl.DataFrame(
+        {"date": [date(2020, 1, 1)], "obs": [1]},
+        schema={"date": pl.Date, "obs": pl.UInt8},
+    )
+    with pytest.raises(ValueError, match="month must be between 1 and 12"):
+        observations_calendar.create_calendars(df_in, 2020, in_month)
+    with pytest.raises(ValueError, match="month must be between 1 and 12"):
+        observations_calendar.create_calendar(df_in, 2020, in_month)
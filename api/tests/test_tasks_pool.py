@@ -0,0 +1,73 @@
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pytest
+
+from api.tasks import pool
+
+
+def test_thread_pool_restart() -> None:
+    executor = pool.ThreadPool(1, thread_name_prefix="test")
+    assert executor.submit(lambda: 1 + 2).result() == 3
+    executor.shutdown()
+
+    # 終了した後も、次に使われた時に作り直す
+    future = executor.submit(threading.current_thread)
+    assert future.result().name.startswith("test")
+    executor.shutdown()
+
+
+def crash_once(path: Path, value: int) -> int:
+    # 最初の呼び出しのみワーカーを異常終了させる
+    if not path.exists():
+        path.touch()
+        os._exit(1)
+    return value
+
+
+def get_pid() -> int:
+    return os.getpid()
+
+
+def test_worker_pool_run() -> None:
+    workers = pool.WorkerPool(1)
+    assert workers.run(pow, 2, 10) == 1024
+    workers.shutdown()
+
+
+def test_worker_pool_crash(tmp_path: Path) -> None:
+    workers = pool.WorkerPool(1)
+    pid = workers.run(get_pid)
+
+    # 異常終了したワーカーはプールごと作り直し、一度だけ再実行する
+    assert workers.run(crash_once, tmp_path / "crashed", 3) == 3
+    assert (tmp_path / "crashed").exists()
+    assert workers.run(get_pid) != pid
+    workers.shutdown()
+
+
+def test_worker_pool_crash_twice(tmp_path: Path) -> None:
+    workers = pool.WorkerPool(1)
+    (tmp_path / "a").touch()
+    with pytest.raises(BrokenProcessPool):
+        workers.run(os._exit, 1)
+    # 再実行でも異常終了した場合、次の処理は新しいプールで実行する
+    assert workers.run(crash_once, tmp_path / "a", 5) == 5
+    workers.shutdown()
+
+
+def test_worker_pool_resize() -> None:
+    workers = pool.WorkerPool(1)
+    pid = workers.run(get_pid)
+    future = workers.submit(get_pid)
+
+    workers.resize(2)
+    assert workers.max_workers == 2
+    # 変更前に送った処理も完了し、以降の処理は新しいプールで実行する
+    assert future.result() == pid
+    futures = [workers.submit(pow, 2, i) for i in range(4)]
+    assert [f.result() for f in futures] == [1, 2, 4, 8]
+    assert workers.run(get_pid) != pid
+    workers.shutdown()
@@ -1,3 +1,4 @@
+import type { JobSubmitRes } from "@/api/jobs"
 import { post } from "@/utils/fetch"
 
 type AggRes = {
@@ -14,3 +15,10 @@ export async function postAgg(body: AggBody): Promise<AggRes["output"]> {
   const res = await post<AggRes, AggBody>("/api/agg", body)
   return res.output
 }
+
+export async function postAggJob(
+  body: AggBody,
+): Promise<JobSubmitRes["jobId"]> {
+  const res = await post<JobSubmitRes, AggBody>("/api/agg/jobs", body)
+  return res.jobId
+}
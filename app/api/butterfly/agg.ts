@@ -1,14 +1,22 @@
 import { post } from "@/utils/fetch"
 
+type AggLevel = {
+  interval: string
+  outputData: string
+  outputInfo: string
+}
+
 type AggRes = {
   outputData: string
   outputInfo: string
+  levels?: AggLevel[]
 }
 
 type AggBody = {
   inputName: string
   outputName: string
   overwrite: boolean
+  intervals?: string[]
 }
 
 export async function postAgg(url: string, body: AggBody): Promise<AggRes> {
@@ -1,5 +1,8 @@
 import { post } from "@/utils/fetch"
 
+export type ArrayFormat = "npz" | "npy"
+export type ImageFormat = ArrayFormat | "bits"
+
 type ImageRes = {
   outputImage: string
 }
@@ -7,6 +10,7 @@ type ImageRes = {
 type ImageBody = {
   inputName: string
   overwrite: boolean
+  format?: ImageFormat
 }
 
 export async function postImage(
@@ -1,3 +1,4 @@
+import type { ArrayFormat } from "@/api/butterfly/image"
 import { post } from "@/utils/fetch"
 
 type ImageColorRes = {
@@ -10,6 +11,7 @@ type ImageColorBody = {
   colorsName: string
   outputName: string
   overwrite: boolean
+  format?: ArrayFormat
 }
 
 export async function postImageColor(
@@ -1,3 +1,5 @@
+import type { ArrayFormat } from "@/api/butterfly/image"
+import type { JobSubmitRes } from "@/api/jobs"
 import { post } from "@/utils/fetch"
 
 type MergeRes = {
@@ -9,8 +11,19 @@ type MergeBody = {
   inputNames: string[]
   outputName: string
   overwrite: boolean
+  format?: ArrayFormat
 }
 
 export async function postMerge(body: MergeBody): Promise<MergeRes> {
   return await post<MergeRes, MergeBody>("/api/butterfly/merge", body)
 }
+
+export async function postMergeJob(
+  body: MergeBody,
+): Promise<JobSubmitRes["jobId"]> {
+  const res = await post<JobSubmitRes, MergeBody>(
+    "/api/butterfly/merge/jobs",
+    body,
+  )
+  return res.jobId
+}
@@ -0,0 +1,43 @@
+import { get } from "@/utils/fetch"
+
+type TileInfoRes = {
+  tileSize: number
+  maxZoom: number
+  width: number
+  height: number
+  latMin: number
+  latMax: number
+  dateStart: string
+  dateEnd: string
+}
+
+type TileInfoParams = {
+  filename: string
+}
+
+type TileParams = {
+  filename: string
+  cmap?: string
+}
+
+export async function getTileInfo(
+  params: TileInfoParams,
+): Promise<TileInfoRes> {
+  return await get<TileInfoRes, TileInfoParams>(
+    "/api/butterfly/draw/butterfly/tile",
+    params,
+  )
+}
+
+export function getTileUrl(
+  zoom: number,
+  x: number,
+  y: number,
+  params: TileParams,
+): string {
+  const searchParams = new URLSearchParams({ filename: params.filename })
+  if (params.cmap !== undefined) {
+    searchParams.set("cmap", params.cmap)
+  }
+  return `/api/butterfly/draw/butterfly/tile/${zoom}/${x}/${y}?${searchParams}`
+}
@@ -1,3 +1,4 @@
+import type { ImageFormat } from "@/api/butterfly/image"
 import { post } from "@/utils/fetch"
 
 type TrimRes = {
@@ -18,3 +19,21 @@ type TrimBody = {
 export async function postTrim(body: TrimBody): Promise<TrimRes> {
   return await post<TrimRes, TrimBody>("/api/butterfly/trim", body)
 }
+
+type TrimImageRes = {
+  outputInfo: string
+  outputImage: string
+}
+
+type TrimImageBody = TrimBody & {
+  format?: ImageFormat
+}
+
+export async function postTrimImage(
+  body: TrimImageBody,
+): Promise<TrimImageRes> {
+  return await post<TrimImageRes, TrimImageBody>(
+    "/api/butterfly/trim_image",
+    body,
+  )
+}
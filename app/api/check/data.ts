@@ -105,3 +105,29 @@ export async function getCheckDataLonInterval(
     params,
   )
 }
+
+type CheckDataReportRes = {
+  groupNumber: CheckDataGroupNumberRes
+  latRange: CheckDataLatRangeRes
+  lonRange: CheckDataLonRangeRes
+  latInterval: CheckDataLatIntervalRes
+  lonInterval: CheckDataLonIntervalRes
+}
+
+type CheckDataReportParams = {
+  input: string
+  latThreshold: number
+  lonMinThreshold: number
+  lonMaxThreshold: number
+  latInterval: number
+  lonInterval: number
+}
+
+export async function getCheckDataReport(
+  params: CheckDataReportParams,
+): Promise<CheckDataReportRes> {
+  return await get<CheckDataReportRes, CheckDataReportParams>(
+    "/api/check/data/report",
+    params,
+  )
+}
@@ -17,7 +17,12 @@ type ErrorField = {
   fields: string[]
 }
 
-type CheckFileError = ErrorHeader | ErrorRow | ErrorField
+type ErrorRead = {
+  type: "read"
+  message: string
+}
+
+type CheckFileError = ErrorHeader | ErrorRow | ErrorField | ErrorRead
 
 type CheckFileRes = {
   errors: CheckFileError[]
@@ -36,3 +41,27 @@ export async function getCheckFile(
   )
   return res.errors
 }
+
+type CheckFilesResult = {
+  path: string
+  errors: CheckFileError[]
+}
+
+type CheckFilesRes = {
+  results: CheckFilesResult[]
+}
+
+type CheckFilesParams = {
+  path: string
+  glob?: string
+}
+
+export async function getCheckFiles(
+  params: CheckFilesParams,
+): Promise<CheckFilesRes["results"]> {
+  const res = await get<CheckFilesRes, CheckFilesParams>(
+    "/api/check/files",
+    params,
+  )
+  return res.results
+}
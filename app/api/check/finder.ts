@@ -21,3 +21,18 @@ export async function getFinder(
   const res = await get<FinderRes, FinderParams>("/api/check/finder", params)
   return res.result
 }
+
+type FinderRangeParams = {
+  start: string
+  end: string
+}
+
+export async function getFinderRange(
+  params: FinderRangeParams,
+): Promise<FinderRes["result"]> {
+  const res = await get<FinderRes, FinderRangeParams>(
+    "/api/check/finder/range",
+    params,
+  )
+  return res.result
+}
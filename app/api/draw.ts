@@ -1,4 +1,4 @@
-import { get, post } from "@/utils/fetch"
+import { get, getBlob, post } from "@/utils/fetch"
 
 type GetDrawRes = {
   img: string
@@ -17,6 +17,21 @@ export async function getDraw(
   return res.img
 }
 
+type GetDrawImageParams = GetDrawParams & {
+  binary: boolean
+}
+
+export async function getDrawImage(
+  path: string,
+  params: GetDrawParams,
+): Promise<string> {
+  const blob = await getBlob<GetDrawImageParams>(path, {
+    ...params,
+    binary: true,
+  })
+  return URL.createObjectURL(blob)
+}
+
 type PostDrawRes = {
   output: string
 }
@@ -0,0 +1,56 @@
+import { toCamelCase } from "@/utils/convert_case"
+import { get, post } from "@/utils/fetch"
+
+export type JobStatus = "pending" | "running" | "done" | "failed" | "cancelled"
+
+export type Job<T = Record<string, unknown>> = {
+  id: string
+  name: string
+  status: JobStatus
+  progress: number
+  message: string
+  result: T | null
+  error: string | null
+  createdAt: string
+  startedAt: string | null
+  finishedAt: string | null
+}
+
+export type JobSubmitRes = {
+  jobId: string
+}
+
+type JobsRes = {
+  jobs: Job[]
+}
+
+export async function getJobs(): Promise<JobsRes["jobs"]> {
+  const res = await get<JobsRes>("/api/jobs")
+  return res.jobs
+}
+
+export async function getJob<T>(id: string): Promise<Job<T>> {
+  return await get<Job<T>>(`/api/jobs/${id}`)
+}
+
+export async function cancelJob<T>(id: string): Promise<Job<T>> {
+  return await post<Job<T>, object>(`/api/jobs/${id}/cancel`, {})
+}
+
+export function watchJob<T>(
+  id: string,
+  onUpdate: (job: Job<T>) => void,
+): () => void {
+  const source = new EventSource(`/api/jobs/${id}/events`)
+  const handler = (event: MessageEvent<string>) => {
+    const job = toCamelCase(JSON.parse(event.data)) as Job<T>
+    onUpdate(job)
+    if (!["pending", "running"].includes(job.status)) {
+      source.close()
+    }
+  }
+  for (const status of ["pending", "running", "done", "failed", "cancelled"]) {
+    source.addEventListener(status, handler)
+  }
+  return () => source.close()
+}
@@ -25,3 +25,31 @@ export async function getCalendar(
   )
   return res.calendar
 }
+
+type CalendarMonth = {
+  year: number
+  month: number
+  calendar: ObservationDay[][]
+}
+
+type CalendarsRes = {
+  calendars: CalendarMonth[]
+}
+
+type CalendarsParams = {
+  filename: string
+  year: number
+  month?: number
+  months?: number
+  first?: number
+}
+
+export async function getCalendars(
+  params: CalendarsParams,
+): Promise<CalendarsRes["calendars"]> {
+  const res = await get<CalendarsRes, CalendarsParams>(
+    "/api/observations/calendars",
+    params,
+  )
+  return res.calendars
+}
@@ -1,3 +1,4 @@
+import type { JobSubmitRes } from "@/api/jobs"
 import { post } from "@/utils/fetch"
 
 type AggRes = {
@@ -14,3 +15,13 @@ type AggBody = {
 export async function postAgg(body: AggBody): Promise<AggRes> {
   return await post<AggRes, AggBody>("/api/sunspot_number/agg", body)
 }
+
+export async function postAggJob(
+  body: AggBody,
+): Promise<JobSubmitRes["jobId"]> {
+  const res = await post<JobSubmitRes, AggBody>(
+    "/api/sunspot_number/agg/jobs",
+    body,
+  )
+  return res.jobId
+}
@@ -1,3 +1,4 @@
+import type { JobSubmitRes } from "@/api/jobs"
 import { post } from "@/utils/fetch"
 
 type AggRes = {
@@ -17,3 +18,13 @@ type AggBody = {
 export async function postAgg(body: AggBody): Promise<AggRes> {
   return await post<AggRes, AggBody>("/api/sunspot_number/with_flare/agg", body)
 }
+
+export async function postAggJob(
+  body: AggBody,
+): Promise<JobSubmitRes["jobId"]> {
+  const res = await post<JobSubmitRes, AggBody>(
+    "/api/sunspot_number/with_flare/agg/jobs",
+    body,
+  )
+  return res.jobId
+}
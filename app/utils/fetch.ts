@@ -51,6 +51,22 @@ export function get<T, U = object>(path: string, params?: U): Promise<T> {
   )
 }
 
+export async function getBlob<U = object>(
+  path: string,
+  params?: U,
+): Promise<Blob> {
+  const res = await fetch(
+    buildPathWithParams(path, params ? toSnakeCase(params) : undefined),
+  )
+
+  if (!res.ok) {
+    const data: { detail: string } = await res.json()
+    throw new FetchError(res.status, data.detail)
+  }
+
+  return res.blob()
+}
+
 export function post<T, U>(path: string, body: U): Promise<T> {
   return http<T>(path, {
     method: "POST",
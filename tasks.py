@@ -24,3 +24,8 @@ def lint(c: Context) -> None:
 def test(c: Context, *, cov: bool = False) -> None:
     cov_options = "--cov-report=term-missing --cov-report=html --cov api"
     c.run(f"pytest {cov_options if cov else ''} api", pty=True)
+
+
+@task
+def bench(c: Context, name: str = "agg") -> None:
+    c.run(f"python -m api.benchmarks.{name}", pty=True)